@@ -4,18 +4,60 @@ load_dotenv()
 
 import os
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from routes.gmail_responder_routes import router as gmail_responder_router
-from routes.gmail_summary_routes import router as gmail_summary_router
+from n8n.common import N8N_WARMUP_CONNECTIONS
+from n8n.n8n_async_client import warm_up_shards, close_async_client
+from thirdPartyIntegrations.google_oauth import close_http as close_google_http
+from workflows.debug_artifacts import debug_artifacts
+from workflows.token_refresh import token_refresher
+from workflows.reconciler import reconciler
+from workflows.garbage_collector import orphan_collector
+from workflows.execution_stats import execution_ingester
+from jobs.queue import job_store, job_workers
+from database.auth import token_verifier
+from observability.metrics import REGISTRY, MetricsMiddleware
+from observability.server_timing import ServerTimingMiddleware
+
+from routes.workflow_install_routes import router as workflow_install_router
+from routes.workflows_routes import router as workflows_router
 from routes.oAuth_handling import router as oauth_router
-from routes.gmail_ai_laeblling_route import router as gmail_ai_labelling_router
+from routes.jobs_routes import router as jobs_router
+from routes.admin_routes import router as admin_router
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pre-open pooled n8n connections (per shard) so the first installs skip the handshake
+    if N8N_WARMUP_CONNECTIONS > 0:
+        await warm_up_shards(N8N_WARMUP_CONNECTIONS)
+    token_verifier.start()
+    job_workers.start()
+    token_refresher.start()
+    reconciler.start()
+    orphan_collector.start()
+    execution_ingester.start()
+    yield
+    await execution_ingester.stop()
+    await orphan_collector.stop()
+    await reconciler.stop()
+    await token_refresher.stop()
+    await job_workers.stop()
+    await token_verifier.stop()
+    job_store.close()
+    await close_async_client()
+    await close_google_http()
+    debug_artifacts.close()
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ServerTimingMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,14 +65,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the dashboard read ETags to revalidate GET /workflows
+    expose_headers=["ETag"],
 )
 
-# Mount workflow specific routers
-app.include_router(gmail_responder_router, tags=["gmail-ai-responder"])
-app.include_router(gmail_summary_router, tags=["gmail-summary"])
+# Install endpoints for every template in workflows/catalog.py
+app.include_router(workflow_install_router, tags=["workflows"])
+app.include_router(workflows_router, tags=["workflows"])
 app.include_router(oauth_router, tags=["oauth"])
-app.include_router(gmail_ai_labelling_router, tags=["gmail-ai-labelling"])
+app.include_router(jobs_router, tags=["jobs"])
+app.include_router(admin_router, tags=["admin"])
 
 @app.get("/health")
 def health():
     return {"ok": True}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,84 @@
+# benchmarks/bench_auth.py
+# Per-request cost of resolving the user id from the Authorization token.
+#
+#   cd backend && python -m benchmarks.bench_auth --iterations 20000
+#
+# unverified   base64 decode of the payload (what deps.get_user_id used to do)
+# hs256        HMAC check on every request (verified-token cache disabled)
+# hs256+cache  HMAC check once, then verified-token cache hits
+# es256        ECDSA check against a JWKS key on every request
+# es256+cache  ECDSA check once, then verified-token cache hits
+import os
+import json
+import time
+import base64
+import asyncio
+import argparse
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from database.auth import TokenVerifier
+
+SECRET = "bench-secret-0123456789abcdef0123456789"
+CLAIMS = {"sub": "00000000-0000-0000-0000-000000000000", "aud": "authenticated", "role": "authenticated"}
+
+
+def _parse_without_verify(jwt_token: str) -> dict:
+    parts = jwt_token.split(".")
+    payload = parts[1] + "=" * (-len(parts[1]) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload.encode("utf-8")))
+
+
+def _es256_setup():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    jwk = json.loads(jwt.algorithms.ECAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update(kid="bench", alg="ES256", use="sig")
+    return private_key, {"keys": [jwk]}
+
+
+async def _time_async(fn, iterations: int) -> float:
+    await fn()  # warm caches and lazy imports
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        await fn()
+    return (time.perf_counter() - t0) / iterations * 1e6
+
+
+async def run(iterations: int):
+    claims = {**CLAIMS, "exp": int(time.time()) + 3600}
+    hs_token = jwt.encode(claims, SECRET, algorithm="HS256")
+    private_key, jwks = _es256_setup()
+    es_token = jwt.encode(claims, private_key, algorithm="ES256", headers={"kid": "bench"})
+
+    def verifier(cache_size: int) -> TokenVerifier:
+        v = TokenVerifier(secret=SECRET, jwks_url="unused", cache_size=cache_size)
+        v.load_jwks(jwks)
+        return v
+
+    async def unverified():
+        return _parse_without_verify(hs_token)["sub"]
+
+    variants = {
+        "unverified": unverified,
+        "hs256": lambda v=verifier(0): v.verify(hs_token),
+        "hs256+cache": lambda v=verifier(1000): v.verify(hs_token),
+        "es256": lambda v=verifier(0): v.verify(es_token),
+        "es256+cache": lambda v=verifier(1000): v.verify(es_token),
+    }
+    print(f"{'variant':<14}{'us/request':>12}")
+    for name, fn in variants.items():
+        print(f"{name:<14}{await _time_async(fn, iterations):>12.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--iterations", type=int, default=20000)
+    args = ap.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_n8n_pool.py
+# Per-install latency against a local stub n8n, with and without connection pooling.
+#
+#   cd backend && python -m benchmarks.bench_n8n_pool --installs 200 --concurrency 8 --connect-ms 5
+#
+# One responder install makes five n8n calls (3 credentials, create, activate).
+# --connect-ms adds a per-connection delay on the stub to model the TCP/TLS
+# handshake of a remote n8n; with 0 it only measures local socket setup.
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("N8N_BASE_URL", "http://127.0.0.1")
+os.environ.setdefault("N8N_API_KEY", "bench")
+
+import requests
+
+from benchmarks.stub_n8n import StubN8N
+from n8n.common import _headers
+from n8n.n8n_client import N8NClient
+
+
+def _unpooled_install(base: str) -> None:
+    # Mirrors the previous client: a module-level requests.post per call
+    for cred_type in ("gmailOAuth2", "openAiApi", "googlePalmApi"):
+        requests.post(
+            f"{base}/api/v1/credentials",
+            json={"name": "bench", "type": cred_type, "data": {}},
+            headers=_headers("bench"),
+            timeout=20,
+        ).raise_for_status()
+    r = requests.post(
+        f"{base}/api/v1/workflows",
+        json={"name": "bench", "nodes": [], "connections": {}, "settings": {}},
+        headers=_headers("bench"),
+        timeout=20,
+    )
+    r.raise_for_status()
+    requests.post(f"{base}/api/v1/workflows/{r.json()['id']}/activate", headers=_headers("bench"), timeout=20).raise_for_status()
+
+
+def _pooled_install(client: N8NClient) -> None:
+    for cred_type in ("gmailOAuth2", "openAiApi", "googlePalmApi"):
+        client.create_credential("bench", cred_type, {})
+    wid = client.create_workflow("bench", {"nodes": [], "connections": {}})
+    client.activate_workflow(wid)
+
+
+def _run(install, installs: int, concurrency: int) -> list:
+    def timed(_):
+        t0 = time.perf_counter()
+        install()
+        return (time.perf_counter() - t0) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(timed, range(installs)))
+
+
+def _report(label: str, samples: list, wall: float, connections: int) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<10} mean={statistics.mean(samples):7.2f}ms p50={statistics.median(samples):7.2f}ms "
+        f"p95={p95:7.2f}ms installs/s={len(samples) / wall:8.1f} connections={connections}"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--installs", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--request-ms", type=float, default=1.0, help="stub latency per request")
+    ap.add_argument("--connect-ms", type=float, default=5.0, help="stub latency per new connection")
+    ap.add_argument("--warmup", action="store_true", help="warm the pool before measuring")
+    args = ap.parse_args()
+
+    print(f"{args.installs} installs x 5 calls, concurrency={args.concurrency}, "
+          f"request={args.request_ms}ms connect={args.connect_ms}ms")
+
+    with StubN8N(args.request_ms / 1000, args.connect_ms / 1000) as stub:
+        t0 = time.perf_counter()
+        samples = _run(lambda: _unpooled_install(stub.base_url), args.installs, args.concurrency)
+        _report("unpooled", samples, time.perf_counter() - t0, stub.connections)
+
+    with StubN8N(args.request_ms / 1000, args.connect_ms / 1000) as stub:
+        client = N8NClient(stub.base_url, "bench", pool_size=args.concurrency)
+        if args.warmup:
+            client.warm_up()
+        t0 = time.perf_counter()
+        samples = _run(lambda: _pooled_install(client), args.installs, args.concurrency)
+        _report("pooled", samples, time.perf_counter() - t0, stub.connections)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
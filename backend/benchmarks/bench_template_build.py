@@ -0,0 +1,72 @@
+# benchmarks/bench_template_build.py
+# Build time and upload size per install for every template in templates/.
+#
+#   cd backend && python -m benchmarks.bench_template_build --iterations 2000
+#
+# legacy   deepcopy + per-node walk + json.dumps of the request body (what the
+#          builders did before templates were compiled; per-node logging excluded)
+# render   compiled template, structurally shared dict + json.dumps
+# body     compiled template, credentials spliced into the byte skeleton
+import argparse
+import copy
+import glob
+import json
+import os
+import time
+
+from workflows.template_compiler import CREDENTIAL_ROLES, CREDENTIAL_TYPE_ALIASES, compile_template
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+
+CREDS = {
+    "gmail": {"id": "101", "name": "gmail-oauth2-user-1700000000"},
+    "openai": {"id": "102", "name": "openai-shared-0123456789ab"},
+    "gemini": {"id": "103", "name": "gemini-shared-0123456789ab"},
+}
+
+
+def _legacy_body(tpl: dict, name: str) -> bytes:
+    wf = copy.deepcopy(tpl)
+    for n in wf["nodes"]:
+        n.setdefault("credentials", {})
+        for cred_type in list(n["credentials"]):
+            role = CREDENTIAL_ROLES.get(CREDENTIAL_TYPE_ALIASES.get(cred_type, cred_type))
+            if role:
+                n["credentials"][cred_type] = {"id": CREDS[role]["id"], "name": CREDS[role]["name"]}
+    body = {"name": name, "nodes": wf["nodes"], "connections": wf["connections"], "settings": {}}
+    return json.dumps(body).encode("utf-8")
+
+
+def _time(fn, iterations: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        out = fn()
+    return (time.perf_counter() - t0) / iterations * 1e6, len(out)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--iterations", type=int, default=2000)
+    args = ap.parse_args()
+
+    print(f"{'template':<24}{'variant':<9}{'us/build':>10}{'bytes':>9}")
+    for path in sorted(glob.glob(os.path.join(TEMPLATES_DIR, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            tpl = json.load(f)
+        template_id = os.path.splitext(os.path.basename(path))[0]
+        name = f"{template_id}-00000000-0000-0000-0000-000000000000"
+        compiled = compile_template(template_id, tpl)
+        creds = {role: CREDS[role] for role in compiled.roles}
+
+        variants = {
+            "legacy": lambda: _legacy_body(tpl, name),
+            "render": lambda: json.dumps({"name": name, **compiled.render(creds), "settings": {}}).encode("utf-8"),
+            "body": lambda: compiled.render_body(name, creds),
+        }
+        for variant, fn in variants.items():
+            us, size = _time(fn, args.iterations)
+            print(f"{template_id:<24}{variant:<9}{us:>10.1f}{size:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/fake_google.py
+# Stand-in for Google's OAuth token endpoint (authorization_code and
+# refresh_token grants). Point GOOGLE_TOKEN_ENDPOINT at `token_url`.
+# Refresh tokens starting with "revoked" get invalid_grant.
+import json
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+from .faults import Faults
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: dict):
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        form = dict(parse_qsl(self.rfile.read(length).decode("utf-8"))) if length else {}
+        faults = self.server.faults
+        faults.delay()
+        status = faults.error()
+        if status is not None:
+            return self._send(status, {"error": "temporarily_unavailable"})
+        if self.path != "/token":
+            return self._send(404, {"error": "not_found"})
+
+        grant = form.get("grant_type")
+        if grant not in ("authorization_code", "refresh_token"):
+            return self._send(400, {"error": "unsupported_grant_type"})
+        # Refresh tokens starting with "revoked" model a user who withdrew access
+        if grant == "refresh_token" and form.get("refresh_token", "").startswith("revoked"):
+            return self._send(400, {"error": "invalid_grant", "error_description": "Token has been expired or revoked."})
+        self.server.exchanges += 1
+        tokens = {
+            "access_token": f"ya29.{secrets.token_urlsafe(24)}",
+            "expires_in": 3599,
+            "scope": "https://www.googleapis.com/auth/gmail.modify openid email profile",
+            "token_type": "Bearer",
+        }
+        # Google only returns a refresh token on the initial code exchange
+        if grant == "authorization_code":
+            tokens["refresh_token"] = f"1//{secrets.token_urlsafe(32)}"
+        self._send(200, tokens)
+
+
+class FakeGoogle:
+    def __init__(self, faults: Faults = None, port: int = 0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.faults = faults or Faults()
+        self.httpd.exchanges = 0
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def token_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/token"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
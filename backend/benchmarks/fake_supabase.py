@@ -0,0 +1,296 @@
+# benchmarks/fake_supabase.py
+# In-memory stand-in for the Supabase PostgREST endpoint (/rest/v1/<table>),
+# covering what the backend uses: select with eq/neq/in/is/gt/gte/lt/lte/like
+# filters (also inside or=(...)/and(...) groups), order, limit/offset, single-object responses, insert, upsert
+# (on_conflict, merge/ignore duplicates), update and delete.
+import json
+import re
+import time
+import uuid
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from .faults import Faults
+
+
+def _as_text(value):
+    # PostgREST compares against the textual form of the column
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _split_top(expr: str) -> list:
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(expr):
+        depth += ch == "("
+        depth -= ch == ")"
+        if ch == "," and depth == 0:
+            parts.append(expr[start:i])
+            start = i + 1
+    parts.append(expr[start:])
+    return parts
+
+
+def _group(kind: str, body: str) -> tuple:
+    """Parse the inside of or=(...) / and(...) into a (None, kind, terms) filter."""
+    terms = []
+    for part in _split_top(body):
+        if part.startswith(("and(", "or(")):
+            inner_kind, _, rest = part.partition("(")
+            terms.append(_group(inner_kind, rest[:-1]))
+        else:
+            col, _, cond = part.partition(".")
+            op, _, arg = cond.partition(".")
+            terms.append((col, op, arg.strip('"')))
+    return None, kind, terms
+
+
+def _matches(row: dict, filters) -> bool:
+    for col, op, val in filters:
+        if col is None:
+            hits = (_matches(row, [term]) for term in val)
+            if not (any(hits) if op == "or" else all(hits)):
+                return False
+            continue
+        raw = row.get(col)
+        text = _as_text(raw)
+        if op == "eq" and text != val:
+            return False
+        if op == "neq" and text == val:
+            return False
+        if op == "in":
+            inner = val.strip("()")
+            if text not in ([v.strip('"') for v in inner.split(",")] if inner else []):
+                return False
+        if op == "is":
+            if val == "null" and raw is not None:
+                return False
+            if val == "not.null" and raw is None:
+                return False
+        if op in ("gt", "gte", "lt", "lte"):
+            if raw is None:
+                return False
+            if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+                a, b = raw, type(raw)(val)
+            else:
+                a, b = text, val
+            if not {"gt": a > b, "gte": a >= b, "lt": a < b, "lte": a <= b}[op]:
+                return False
+        if op == "like":
+            pattern = "^" + re.escape(val).replace("\\*", ".*").replace("%", ".*") + "$"
+            if text is None or not re.match(pattern, text):
+                return False
+    return True
+
+
+def _now(seq) -> str:
+    # Microsecond suffix from a counter keeps created_at strictly increasing
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + ".%06d+00:00" % (next(seq) % 1000000)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _parse(self):
+        url = urlsplit(self.path)
+        m = re.match(r"^/rest/v1/(\w+)$", url.path)
+        table = m.group(1) if m else None
+        filters, order, limit, offset, on_conflict = [], [], None, None, None
+        for key, val in parse_qsl(url.query, keep_blank_values=True):
+            if key == "select":
+                continue
+            if key == "or":
+                filters.append(_group("or", val[1:-1]))
+                continue
+            if key == "order":
+                for part in val.split(","):
+                    bits = part.split(".")
+                    order.append((bits[0], "desc" in bits[1:]))
+            elif key == "limit":
+                limit = int(val)
+            elif key == "offset":
+                offset = int(val)
+            elif key == "on_conflict":
+                on_conflict = val.split(",")
+            else:
+                op, _, arg = val.partition(".")
+                if op == "not":
+                    inner_op, _, inner_arg = arg.partition(".")
+                    op, arg = "is", "not.null" if inner_op == "is" and inner_arg == "null" else arg
+                filters.append((key, op, arg))
+        return table, filters, order, limit, offset, on_conflict
+
+    def _send(self, status: int, body, headers: dict = None):
+        raw = b"" if body is None else json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _inject(self) -> bool:
+        """Apply latency; send an injected error and return True if this request should fail."""
+        faults = self.server.faults
+        faults.delay()
+        status = faults.error()
+        if status is None:
+            return False
+        self._send(status, {"code": "PGRST000", "message": "injected failure", "details": None, "hint": None})
+        return True
+
+    def _table(self, name: str) -> list:
+        return self.server.db.setdefault(name, [])
+
+    def _out(self, rows: list, status: int = 200, total: int = None):
+        if "vnd.pgrst.object" in (self.headers.get("Accept") or ""):
+            if len(rows) != 1:
+                return self._send(406, {
+                    "code": "PGRST116",
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "details": f"The result contains {len(rows)} rows",
+                    "hint": None,
+                })
+            return self._send(status, rows[0])
+        self._send(status, rows, {"Content-Range": f"0-{max(len(rows) - 1, 0)}/{'*' if total is None else total}"})
+
+    def do_GET(self):
+        if self._inject():
+            return
+        table, filters, order, limit, offset, _ = self._parse()
+        with self.server.lock:
+            rows = [dict(r) for r in self._table(table) if _matches(r, filters)]
+        for col, desc in reversed(order):
+            rows.sort(key=lambda r: (r.get(col) is None, r.get(col) if r.get(col) is not None else ""), reverse=desc)
+        total = len(rows)
+        if offset:
+            rows = rows[offset:]
+        if limit is not None:
+            rows = rows[:limit]
+        # Prefer: count=exact reports the unpaginated total in Content-Range
+        self._out(rows, total=total if "count=exact" in (self.headers.get("Prefer") or "") else None)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_POST(self):
+        body = self._body()
+        if self._inject():
+            return
+        table, _, _, _, _, on_conflict = self._parse()
+        items = body if isinstance(body, list) else [body]
+        prefer = self.headers.get("Prefer") or ""
+        upsert = on_conflict or "merge-duplicates" in prefer or "ignore-duplicates" in prefer
+        out = []
+        with self.server.lock:
+            rows = self._table(table)
+            for item in items:
+                item = dict(item)
+                if upsert:
+                    keys = on_conflict or ["id"]
+                    existing = next((r for r in rows if all(str(r.get(k)) == str(item.get(k)) for k in keys)), None)
+                    if existing is not None:
+                        if "ignore-duplicates" in prefer:
+                            continue
+                        existing.update(item)
+                        existing["updated_at"] = _now(self.server.seq)
+                        out.append(dict(existing))
+                        continue
+                unique = self.server.unique.get(table)
+                if unique and any(all(str(r.get(k)) == str(item.get(k)) for k in unique) for r in rows):
+                    return self._send(409, {
+                        "code": "23505",
+                        "message": "duplicate key value violates unique constraint",
+                        "details": None,
+                        "hint": None,
+                    })
+                item.setdefault("id", next(self.server.seq) if table in self.server.int_ids else str(uuid.uuid4()))
+                now = _now(self.server.seq)
+                item.setdefault("created_at", now)
+                item.setdefault("updated_at", now)
+                rows.append(item)
+                out.append(dict(item))
+        if "return=minimal" in prefer:
+            return self._send(201, None)
+        self._out(out, 201)
+
+    def do_PATCH(self):
+        body = self._body()
+        if self._inject():
+            return
+        table, filters, *_ = self._parse()
+        out = []
+        with self.server.lock:
+            for row in self._table(table):
+                if _matches(row, filters):
+                    row.update(body)
+                    out.append(dict(row))
+        self._out(out)
+
+    def do_DELETE(self):
+        # The client may send an (empty) body; drain it so the keep-alive stream stays aligned
+        self._body()
+        if self._inject():
+            return
+        table, filters, *_ = self._parse()
+        with self.server.lock:
+            rows = self._table(table)
+            out = [r for r in rows if _matches(r, filters)]
+            rows[:] = [r for r in rows if not _matches(r, filters)]
+        self._out(out)
+
+
+class FakeSupabase:
+    """Run the fake on a background thread. `db` maps table name -> list of row dicts."""
+
+    def __init__(self, faults: Faults = None, port: int = 0, unique: dict = None, int_ids=("workflows",)):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.faults = faults or Faults()
+        self.httpd.db = {}
+        self.httpd.lock = threading.Lock()
+        self.httpd.seq = itertools.count(1)
+        # table -> columns that must be unique on plain insert
+        self.httpd.unique = unique or {}
+        # tables with bigint identity ids instead of uuids
+        self.httpd.int_ids = set(int_ids)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def db(self) -> dict:
+        return self.httpd.db
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,36 @@
+# benchmarks/faults.py
+# Latency and error injection shared by the fake n8n, Supabase and Google servers.
+import random
+import time
+
+
+class Faults:
+    """Per-request delay of `latency` +/- `jitter` seconds; `error_rate` of requests fail with `error_status`."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = random.Random(0)
+
+    def delay(self) -> None:
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter)))
+
+    def error(self):
+        """Status code to fail this request with, or None."""
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return self.error_status
+        return None
+
+    @classmethod
+    def parse(cls, spec: str) -> "Faults":
+        """Build from "latency_ms[:jitter_ms[:error_rate[:status]]]", e.g. "20:5:0.01:503"."""
+        parts = (spec or "0").split(":")
+        return cls(
+            latency=float(parts[0]) / 1000,
+            jitter=float(parts[1]) / 1000 if len(parts) > 1 else 0.0,
+            error_rate=float(parts[2]) if len(parts) > 2 else 0.0,
+            error_status=int(parts[3]) if len(parts) > 3 else 503,
+        )
@@ -0,0 +1,266 @@
+# benchmarks/load_test.py
+# End-to-end install load test of the real FastAPI app against local fakes.
+#
+#   cd backend && python -m benchmarks.load_test --concurrency 1,8,32 --installs 64
+#   cd backend && python -m benchmarks.load_test --save-baseline
+#
+# The fake n8n, Supabase and Google servers run in a child process, so their
+# request handling does not compete with the app for the GIL. The app runs
+# in-process (httpx ASGI transport) with its lifespan, so job workers, token
+# verification and all clients are the production code paths.
+#
+# One install = POST /workflows/{id}/install, then polling GET /jobs/{jobId}
+# until the job settles. Latency is measured over that whole span; installs/s
+# is completed installs over wall time at each concurrency level.
+#
+# --shards N runs N stub n8n servers and spreads tenants over them through
+# N8N_SHARDS (see n8n/sharding.py).
+#
+# Fault specs are "latency_ms[:jitter_ms[:error_rate[:status]]]", e.g.
+# --n8n 20:5:0.01:503 adds 20+/-5ms per n8n call and fails 1% with 503.
+#
+# Results are compared with benchmarks/baselines.json (same fault settings
+# only): p95 above, or installs/s below, the baseline by more than
+# --tolerance is flagged and the exit status is 1.
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import multiprocessing
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+JWT_SECRET = "load-test-secret-0123456789abcdef0123"
+DEFAULT_TEMPLATES = "gmail-ai-responder,gmail-summary,gmail-ai-labelling"
+
+
+def _serve_fakes(conn, n8n_spec: str, supabase_spec: str, google_spec: str, users: int, shards: int) -> None:
+    """Child process: start the fakes, seed token rows, report URLs, run until told to stop."""
+    from benchmarks.faults import Faults
+    from benchmarks.stub_n8n import StubN8N
+    from benchmarks.fake_supabase import FakeSupabase
+    from benchmarks.fake_google import FakeGoogle
+
+    n8n = [StubN8N(faults=Faults.parse(n8n_spec)).start() for _ in range(shards)]
+    supabase = FakeSupabase(faults=Faults.parse(supabase_spec)).start()
+    google = FakeGoogle(faults=Faults.parse(google_spec)).start()
+    supabase.db["user_integrations"] = [
+        {
+            "id": f"integration-{i}",
+            "user_id": f"bench-user-{i}",
+            "provider": "google",
+            "access_token": "ya29.bench",
+            "refresh_token": "1//bench",
+            "scope": "https://www.googleapis.com/auth/gmail.modify",
+            "expiry": "2099-01-01T00:00:00Z",
+            "created_at": "2024-01-01T00:00:00+00:00",
+        }
+        for i in range(users)
+    ]
+    conn.send({"n8n": [stub.base_url for stub in n8n], "supabase": supabase.url, "google": google.token_url})
+    conn.recv()
+    conn.send({
+        "n8nCreated": [stub.httpd.created for stub in n8n],
+        "n8nErrors": sum(stub.httpd.errors for stub in n8n),
+    })
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def _configure_env(urls: dict, args) -> None:
+    shards = [
+        {"name": "default" if i == 0 else f"shard-{i}", "url": url, "capacity": 100000}
+        for i, url in enumerate(urls["n8n"])
+    ]
+    os.environ.update(
+        N8N_BASE_URL=urls["n8n"][0],
+        N8N_SHARDS=json.dumps(shards) if len(shards) > 1 else "",
+        N8N_API_KEY="bench",
+        SUPABASE_URL=urls["supabase"],
+        # Any JWT-shaped value; the fake does not check it
+        SUPABASE_SERVICE_ROLE="eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.bench",
+        SUPABASE_JWT_SECRET=JWT_SECRET,
+        GOOGLE_TOKEN_ENDPOINT=urls["google"],
+        GOOGLE_CLIENT_ID="bench",
+        GOOGLE_CLIENT_SECRET="bench",
+        OPENAI_API_KEY="sk-bench",
+        GEMINI_API_KEY="bench",
+        JOBS_DB_PATH=os.path.join(tempfile.mkdtemp(prefix="load-test-"), "jobs.sqlite3"),
+        JOB_WORKERS=str(args.workers),
+        DEBUG_ARTIFACTS_MODE="off",
+    )
+
+
+async def _install(client, token: str, template_id: str, poll_interval: float) -> tuple:
+    """Returns (ok, accept_seconds, total_seconds)."""
+    headers = {"Authorization": f"Bearer {token}"}
+    t0 = time.perf_counter()
+    r = await client.post(f"/workflows/{template_id}/install", headers=headers)
+    accepted = time.perf_counter() - t0
+    if r.status_code != 202:
+        return False, accepted, time.perf_counter() - t0
+    job_id = r.json()["jobId"]
+    while True:
+        await asyncio.sleep(poll_interval)
+        job = (await client.get(f"/jobs/{job_id}", headers=headers)).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job["status"] == "succeeded", accepted, time.perf_counter() - t0
+
+
+async def _run_level(client, tokens: list, template_id: str, concurrency: int, poll_interval: float) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(token):
+        async with sem:
+            return await _install(client, token, template_id, poll_interval)
+
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(one(t) for t in tokens))
+    wall = time.perf_counter() - t0
+
+    ok = sorted(total for success, _, total in results if success)
+    accept = sorted(a for _, a, _ in results)
+    return {
+        "installs": len(results),
+        "errors": len(results) - len(ok),
+        "p50Ms": round(percentile(ok, 50) * 1000, 1),
+        "p95Ms": round(percentile(ok, 95) * 1000, 1),
+        "p99Ms": round(percentile(ok, 99) * 1000, 1),
+        "acceptP50Ms": round(percentile(accept, 50) * 1000, 2),
+        "installsPerSec": round(len(ok) / wall, 1) if wall else 0.0,
+    }
+
+
+async def _drive(args, templates: list, levels: list) -> dict:
+    import jwt
+    import httpx
+
+    from app.main import app
+    import logging
+    logging.getLogger().setLevel(logging.WARNING)
+
+    exp = int(time.time()) + 3600
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=120) as client:
+            for li, concurrency in enumerate(levels):
+                # Disjoint users per level so nothing is deduplicated across levels
+                users = range(li * args.installs, (li + 1) * args.installs)
+                tokens = [
+                    jwt.encode({"sub": f"bench-user-{u}", "aud": "authenticated", "exp": exp}, JWT_SECRET, algorithm="HS256")
+                    for u in users
+                ]
+                for template_id in templates:
+                    stats = await _run_level(client, tokens, template_id, concurrency, args.poll_ms / 1000)
+                    results.setdefault(template_id, {})[str(concurrency)] = stats
+                    print(
+                        f"{template_id:<22}{concurrency:>6}{stats['installs']:>8}{stats['errors']:>7}"
+                        f"{stats['p50Ms']:>9.1f}{stats['p95Ms']:>9.1f}{stats['p99Ms']:>9.1f}"
+                        f"{stats['acceptP50Ms']:>10.2f}{stats['installsPerSec']:>10.1f}",
+                        flush=True,
+                    )
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Human-readable regressions of `results` against `baseline["results"]`."""
+    regressions = []
+    for template_id, levels in results.items():
+        for level, stats in levels.items():
+            base = baseline.get("results", {}).get(template_id, {}).get(level)
+            if not base:
+                continue
+            if base["p95Ms"] and stats["p95Ms"] > base["p95Ms"] * (1 + tolerance):
+                regressions.append(f"{template_id} c={level}: p95 {stats['p95Ms']}ms vs baseline {base['p95Ms']}ms")
+            if stats["installsPerSec"] < base["installsPerSec"] * (1 - tolerance):
+                regressions.append(
+                    f"{template_id} c={level}: {stats['installsPerSec']} installs/s vs baseline {base['installsPerSec']}"
+                )
+            if stats["errors"] > base.get("errors", 0):
+                regressions.append(f"{template_id} c={level}: {stats['errors']} errors vs baseline {base.get('errors', 0)}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--templates", default=DEFAULT_TEMPLATES)
+    ap.add_argument("--concurrency", default="1,8,32", help="comma separated concurrency levels")
+    ap.add_argument("--installs", type=int, default=64, help="installs per template per level")
+    ap.add_argument("--shards", type=int, default=1, help="stub n8n instances")
+    ap.add_argument("--workers", type=int, default=int(os.environ.get("JOB_WORKERS", "4")))
+    ap.add_argument("--poll-ms", type=float, default=10)
+    ap.add_argument("--n8n", default="20:5", help="n8n fault spec")
+    ap.add_argument("--supabase", default="5:1", help="Supabase fault spec")
+    ap.add_argument("--google", default="50:10", help="Google token endpoint fault spec")
+    ap.add_argument("--baseline", default=BASELINES_PATH)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    args = ap.parse_args()
+
+    templates = [t for t in args.templates.split(",") if t]
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    settings = {
+        "installs": args.installs,
+        "workers": args.workers,
+        "shards": args.shards,
+        "n8n": args.n8n,
+        "supabase": args.supabase,
+        "google": args.google,
+    }
+
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe()
+    fakes = ctx.Process(
+        target=_serve_fakes,
+        args=(child, args.n8n, args.supabase, args.google, args.installs * len(levels), max(1, args.shards)),
+        daemon=True,
+    )
+    fakes.start()
+    urls = parent.recv()
+    _configure_env(urls, args)
+
+    print(f"{'template':<22}{'conc':>6}{'n':>8}{'errors':>7}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'accept50':>10}{'inst/s':>10}")
+    try:
+        results = asyncio.run(_drive(args, templates, levels))
+    finally:
+        parent.send("stop")
+        counters = parent.recv()
+        fakes.join(5)
+    print(
+        f"fake n8n: {sum(counters['n8nCreated'])} objects created {counters['n8nCreated']}, "
+        f"{counters['n8nErrors']} injected errors"
+    )
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against (run with --save-baseline)")
+        return
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != settings:
+        print(f"Baseline was recorded with different settings {baseline.get('settings')}; not comparing")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions beyond {args.tolerance:.0%} of baseline")
+
+
+if __name__ == "__main__":
+    main()
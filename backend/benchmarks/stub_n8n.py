@@ -0,0 +1,215 @@
+# benchmarks/stub_n8n.py
+# Minimal in-process stand-in for the n8n public REST API, used by the benchmarks.
+import json
+import itertools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from .faults import Faults
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + ".%03dZ" % (time.time() * 1000 % 1000)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep the connection alive between requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # keep-alive path would stall on Nagle + delayed ACK.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+        # Models the TCP + TLS handshake round trips a remote n8n would cost
+        if self.server.connect_latency:
+            time.sleep(self.server.connect_latency)
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: dict, headers: dict = None):
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _inject(self) -> bool:
+        """Apply latency; send an injected error and return True if this request should fail."""
+        faults = self.server.faults
+        faults.delay()
+        status = faults.error()
+        if status is None:
+            return False
+        self.server.errors += 1
+        self._send(status, {"message": "injected failure"}, {"Retry-After": "1"} if status == 429 else None)
+        return True
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            return self._send(200, {"status": "ok"})
+        url = urlsplit(self.path)
+        if url.path in ("/api/v1/workflows", "/api/v1/credentials"):
+            if self._inject():
+                return
+            store = self.server.workflows if url.path.endswith("workflows") else self.server.credentials
+            return self._send(200, self._list(store, dict(parse_qsl(url.query))))
+        if url.path == "/api/v1/executions":
+            if self._inject():
+                return
+            return self._send(200, self._executions(dict(parse_qsl(url.query))))
+        self._send(404, {"message": "not found"})
+
+    def _list(self, store: dict, query: dict) -> dict:
+        # Same shape as n8n: pages in id order, nextCursor until the last page
+        limit = int(query.get("limit", 100))
+        after = int(query.get("cursor") or 0)
+        active = query.get("active")
+        with self.server.lock:
+            rows = [
+                dict(item) for rid, item in sorted(store.items())
+                if rid > after and (active is None or str(item.get("active")).lower() == active)
+            ]
+        page = rows[:limit]
+        return {"data": page, "nextCursor": page[-1]["id"] if len(rows) > limit else None}
+
+    def _executions(self, query: dict) -> dict:
+        # n8n lists executions newest first; the cursor is the last id returned
+        limit = int(query.get("limit", 100))
+        before = int(query.get("cursor") or 0)
+        workflow_id = query.get("workflowId")
+        with self.server.lock:
+            rows = [
+                dict(ex) for eid, ex in sorted(self.server.executions.items(), reverse=True)
+                if (not before or eid < before) and (workflow_id is None or ex["workflowId"] == workflow_id)
+            ]
+        page = rows[:limit]
+        return {"data": page, "nextCursor": page[-1]["id"] if len(rows) > limit else None}
+
+    def _set_active(self, wid: str, active: bool) -> bool:
+        with self.server.lock:
+            wf = self.server.workflows.get(int(wid))
+            if wf is None:
+                return False
+            wf["active"] = active
+            wf["updatedAt"] = _now()
+            return True
+
+    def do_POST(self):
+        raw = self._read_body()
+        if self._inject():
+            return
+        if self.path == "/api/v1/credentials" or self.path == "/api/v1/workflows":
+            self.server.created += 1
+            rid = next(self.server.ids)
+            body = json.loads(raw or b"{}")
+            now = _now()
+            with self.server.lock:
+                if self.path == "/api/v1/workflows":
+                    self.server.workflows[rid] = {
+                        "id": str(rid), "name": body.get("name"), "active": False,
+                        "nodes": body.get("nodes") or [], "createdAt": now, "updatedAt": now,
+                    }
+                else:
+                    self.server.credentials[rid] = {
+                        "id": str(rid), "name": body.get("name"), "type": body.get("type"),
+                        "createdAt": now, "updatedAt": now,
+                    }
+            return self._send(200, {"id": str(rid)})
+        for action, active in (("/activate", True), ("/deactivate", False)):
+            if self.path.startswith("/api/v1/workflows/") and self.path.endswith(action):
+                if not self._set_active(self.path.split("/")[4], active):
+                    return self._send(404, {"message": "Not Found"})
+                return self._send(200, {"active": active})
+        self._send(404, {"message": "not found"})
+
+    def do_PATCH(self):
+        self._read_body()
+        if self._inject():
+            return
+        if self.path.startswith("/api/v1/credentials/"):
+            self.server.updated += 1
+            return self._send(200, {"id": self.path.rsplit("/", 1)[1]})
+        self._send(404, {"message": "not found"})
+
+    def do_DELETE(self):
+        if self._inject():
+            return
+        if self.path.startswith("/api/v1/credentials/") or self.path.startswith("/api/v1/workflows/"):
+            rid = self.path.rsplit("/", 1)[1]
+            store = self.server.workflows if self.path.startswith("/api/v1/workflows/") else self.server.credentials
+            if rid.isdigit():
+                with self.server.lock:
+                    store.pop(int(rid), None)
+            return self._send(200, {"id": rid})
+        self._send(404, {"message": "not found"})
+
+
+class StubN8N:
+    """Run the stub on a background thread; use as a context manager."""
+
+    def __init__(
+        self, request_latency: float = 0.0, connect_latency: float = 0.0, port: int = 0, faults: Faults = None
+    ):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        # `faults` supersedes the plain request latency when given
+        self.httpd.faults = faults or Faults(latency=request_latency)
+        self.httpd.connect_latency = connect_latency
+        self.httpd.connections = 0
+        self.httpd.created = 0
+        self.httpd.updated = 0
+        self.httpd.errors = 0
+        self.httpd.ids = itertools.count(1)
+        # id -> listing entry, as n8n returns them
+        self.httpd.workflows = {}
+        self.httpd.credentials = {}
+        self.httpd.executions = {}
+        self.httpd.execution_ids = itertools.count(1)
+        self.httpd.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def connections(self) -> int:
+        return self.httpd.connections
+
+    def add_execution(self, workflow_id, status: str = "success", started_at: str = None, stopped_at: str = None) -> str:
+        """Record a finished execution of `workflow_id`, as if n8n had run it."""
+        eid = next(self.httpd.execution_ids)
+        now = _now()
+        with self.httpd.lock:
+            self.httpd.executions[eid] = {
+                "id": str(eid), "workflowId": str(workflow_id), "status": status, "finished": status == "success",
+                "mode": "trigger", "startedAt": started_at or now, "stoppedAt": stopped_at or now,
+            }
+        return str(eid)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,194 @@
+# database/auth.py
+# Verification of Supabase access tokens.
+#
+# Keys: tokens are checked against SUPABASE_JWT_SECRET (HS256 projects) or the
+# project's JWKS (asymmetric signing keys). The JWKS is fetched once, refreshed
+# in the background, and re-fetched early when a token names an unknown kid.
+#
+# Verified tokens: a bounded LRU of sha256(token) -> (sub, exp) lets repeat
+# requests with the same token skip the signature check until it expires.
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import httpx
+import jwt
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_URL = os.environ["SUPABASE_URL"].rstrip("/")
+SUPABASE_JWT_SECRET = os.environ.get("SUPABASE_JWT_SECRET")
+SUPABASE_JWKS_URL = os.environ.get("SUPABASE_JWKS_URL", f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json")
+JWT_AUDIENCE = os.environ.get("JWT_AUDIENCE", "authenticated")
+JWT_LEEWAY_SECONDS = float(os.environ.get("JWT_LEEWAY_SECONDS", "30"))
+JWKS_REFRESH_INTERVAL = float(os.environ.get("JWKS_REFRESH_INTERVAL", "600"))
+# Minimum gap between out-of-band refreshes triggered by unknown kids
+JWKS_MIN_REFETCH_INTERVAL = float(os.environ.get("JWKS_MIN_REFETCH_INTERVAL", "30"))
+VERIFIED_TOKEN_CACHE_SIZE = int(os.environ.get("VERIFIED_TOKEN_CACHE_SIZE", "10000"))
+
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+
+class AuthError(Exception):
+    """The token is missing, malformed, expired or not signed by a trusted key."""
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of token hashes whose signature has already been checked."""
+
+    def __init__(self, maxsize: int = VERIFIED_TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # digest -> (sub, exp)
+        self._lock = threading.Lock()
+
+    def get(self, digest: bytes, now: float):
+        with self._lock:
+            entry = self._data.get(digest)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._data[digest]
+                self.misses += 1
+                return None
+            self._data.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, digest: bytes, sub: str, exp: float) -> None:
+        with self._lock:
+            self._data[digest] = (sub, exp)
+            self._data.move_to_end(digest)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class TokenVerifier:
+    def __init__(
+        self,
+        secret: str = SUPABASE_JWT_SECRET,
+        jwks_url: str = SUPABASE_JWKS_URL,
+        audience: str = JWT_AUDIENCE,
+        leeway: float = JWT_LEEWAY_SECONDS,
+        refresh_interval: float = JWKS_REFRESH_INTERVAL,
+        cache_size: int = VERIFIED_TOKEN_CACHE_SIZE,
+    ):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.leeway = leeway
+        self.refresh_interval = refresh_interval
+        self.cache = VerifiedTokenCache(cache_size)
+        self._keys = {}  # kid -> PyJWK
+        self._keys_fetched_at = 0.0
+        self._fetch_lock = asyncio.Lock()
+        self._refresher = None
+
+    # ---- keys -----------------------------------------------------------
+
+    def load_jwks(self, jwks: dict) -> None:
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            try:
+                key = jwt.PyJWK(jwk)
+            except jwt.PyJWTError as e:
+                logger.warning(f"Skipping unusable JWK kid={jwk.get('kid')}: {e}")
+                continue
+            keys[jwk.get("kid")] = key
+        self._keys = keys
+        self._keys_fetched_at = time.monotonic()
+
+    async def refresh_jwks(self, force: bool = False) -> None:
+        async with self._fetch_lock:
+            age = time.monotonic() - self._keys_fetched_at
+            # Another caller refreshed while we waited for the lock
+            if self._keys and age < (JWKS_MIN_REFETCH_INTERVAL if force else self.refresh_interval):
+                return
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                resp = await client.get(self.jwks_url)
+                resp.raise_for_status()
+            self.load_jwks(resp.json())
+            logger.info(f"Loaded {len(self._keys)} signing keys from {self.jwks_url}")
+
+    def start(self) -> None:
+        """Keep the JWKS warm in the background. No-op for HS256-only setups."""
+        if self.secret or self._refresher is not None:
+            return
+        self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+            self._refresher = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh_jwks()
+            except Exception as e:
+                logger.error(f"JWKS refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def _signing_key(self, token: str):
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise AuthError(f"Malformed token: {e}")
+
+        alg = header.get("alg")
+        if alg == "HS256":
+            if not self.secret:
+                raise AuthError("HS256 tokens are not accepted")
+            return self.secret, ["HS256"]
+        if alg not in ASYMMETRIC_ALGORITHMS:
+            raise AuthError(f"Unsupported token algorithm {alg}")
+
+        kid = header.get("kid")
+        key = self._keys.get(kid)
+        if key is None:
+            try:
+                await self.refresh_jwks(force=True)
+            except Exception as e:
+                raise AuthError(f"Signing keys unavailable: {e}")
+            key = self._keys.get(kid)
+            if key is None:
+                raise AuthError("Unknown signing key")
+        return key, [alg]
+
+    # ---- verification ---------------------------------------------------
+
+    async def verify(self, token: str) -> str:
+        """Return the token's `sub` claim, or raise AuthError."""
+        now = time.time()
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        sub = self.cache.get(digest, now)
+        if sub is not None:
+            return sub
+
+        key, algorithms = await self._signing_key(token)
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=algorithms,
+                audience=self.audience,
+                leeway=self.leeway,
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise AuthError(str(e))
+
+        self.cache.put(digest, claims["sub"], float(claims["exp"]))
+        return claims["sub"]
+
+
+token_verifier = TokenVerifier()
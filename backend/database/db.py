@@ -1,8 +1,22 @@
 # app/db.py
 import os
-from supabase import create_client, Client
+import asyncio
+from supabase import create_client, acreate_client, Client, AsyncClient
 
 SUPABASE_URL = os.environ["SUPABASE_URL"]
 SUPABASE_SERVICE_ROLE = os.environ["SUPABASE_SERVICE_ROLE"]
 
 sb: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE)
+
+# Async client for the request path. It has to be created inside a running loop,
+# so it is built on first use and shared afterwards.
+_async_sb: AsyncClient = None
+_async_sb_lock = asyncio.Lock()
+
+async def get_async_sb() -> AsyncClient:
+    global _async_sb
+    if _async_sb is None:
+        async with _async_sb_lock:
+            if _async_sb is None:
+                _async_sb = await acreate_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE)
+    return _async_sb
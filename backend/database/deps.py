@@ -1,23 +1,31 @@
 # app/deps.py
-#This reads the Supabase JWT from the Authorization header and extracts the user id. 
-# For a quick start we decode without verification. You can replace later with JWKS verification.
+# This reads the Supabase JWT from the Authorization header, verifies it and
+# extracts the user id. See database/auth.py for key handling and caching.
+import os
+import hmac
+import logging
+from typing import Optional
 from fastapi import Header, HTTPException
 
-def _parse_without_verify(jwt_token: str) -> dict:
-    import base64, json
-    parts = jwt_token.split(".")
-    if len(parts) != 3:
-        raise ValueError("Invalid JWT")
-    def pad(b: str) -> bytes:
-        b = b + "=" * (-len(b) % 4)
-        return b.encode("utf-8")
-    payload = json.loads(base64.urlsafe_b64decode(pad(parts[1])))
-    return payload
+from database.auth import AuthError, token_verifier
+
+logger = logging.getLogger(__name__)
+
+# Shared secret for operator endpoints under /admin; they are disabled when unset
+ADMIN_API_KEY = os.environ.get("ADMIN_API_KEY")
 
 async def get_user_id(authorization: str = Header(...)) -> str:
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(401, "Invalid or missing token")
     try:
-        token = authorization.split(" ")[1]
-        payload = _parse_without_verify(token)
-        return payload["sub"]
-    except Exception:
+        return await token_verifier.verify(token.strip())
+    except AuthError as e:
+        logger.info(f"Rejected token: {e}")
         raise HTTPException(401, "Invalid or missing token")
+
+async def require_admin(x_admin_key: Optional[str] = Header(None, alias="X-Admin-Key")) -> None:
+    if not ADMIN_API_KEY:
+        raise HTTPException(403, "Admin API is disabled")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key.encode(), ADMIN_API_KEY.encode()):
+        raise HTTPException(401, "Invalid admin key")
@@ -0,0 +1,90 @@
+# database/integration_cache.py
+# In-process cache of user_integrations rows keyed by (user_id, provider).
+# Entries expire after a TTL and the cache is bounded with LRU eviction. Token
+# writes go through `put`, so this process never serves a row older than its
+# own last write; other processes see changes within INTEGRATION_CACHE_TTL.
+# Hits, misses and evictions are exported on /metrics.
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from observability.metrics import INTEGRATION_CACHE_EVICTIONS, INTEGRATION_CACHE_LOOKUPS
+
+INTEGRATION_CACHE_TTL = float(os.environ.get("INTEGRATION_CACHE_TTL", "60"))
+INTEGRATION_CACHE_SIZE = int(os.environ.get("INTEGRATION_CACHE_SIZE", "10000"))
+
+_HITS = INTEGRATION_CACHE_LOOKUPS.labels("hit")
+_MISSES = INTEGRATION_CACHE_LOOKUPS.labels("miss")
+_EVICTIONS = INTEGRATION_CACHE_EVICTIONS.labels()
+
+
+class IntegrationCache:
+    def __init__(self, ttl: float = INTEGRATION_CACHE_TTL, maxsize: int = INTEGRATION_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()  # key -> (expires_at, row)
+        self._lock = threading.Lock()
+        # Bumped on every write/invalidation; lets `fill` drop reads that raced a write
+        self._generation = 0
+
+    def get(self, user_id: str, provider: str):
+        key = (user_id, provider)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                _MISSES.inc()
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            _HITS.inc()
+            return entry[1]
+
+    def generation(self) -> int:
+        return self._generation
+
+    def fill(self, user_id: str, provider: str, row: dict, generation: int) -> None:
+        """Cache a row read from the database, unless a write happened since `generation`."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._store((user_id, provider), row)
+
+    def put(self, user_id: str, provider: str, row: dict) -> None:
+        """Write-through after updating the row in the database."""
+        with self._lock:
+            self._generation += 1
+            self._store((user_id, provider), row)
+
+    def invalidate(self, user_id: str, provider: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.pop((user_id, provider), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "hitRatio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _store(self, key, row: dict) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, row)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+            _EVICTIONS.inc()
+
+
+integration_cache = IntegrationCache()
@@ -0,0 +1,76 @@
+# database/integrations.py
+# Lookups on the user_integrations table shared by the install route, the
+# OAuth callback and the provisioning workers.
+from fastapi import HTTPException
+
+from database.db import get_async_sb
+from database.integration_cache import integration_cache
+from database.sb_utils import execute, get_data, get_error
+from observability.metrics import time_stage
+
+
+async def get_google_integration(user_id: str):
+    """Most recent Google token row for the user, or None. Served from the cache when fresh."""
+    row = integration_cache.get(user_id, "google")
+    if row is not None:
+        return row
+
+    generation = integration_cache.generation()
+    sb = await get_async_sb()
+    with time_stage("integration_select"):
+        res = await execute(
+            sb.table("user_integrations")
+            .select("*")
+            .eq("user_id", user_id)
+            .eq("provider", "google")
+            .order("created_at", desc=True)
+            .limit(1),
+            "supabase-select",
+        )
+    err = get_error(res)
+    if err:
+        raise HTTPException(500, f"Supabase select error: {err}")
+    rows = get_data(res) or []
+    row = rows[0] if isinstance(rows, list) and rows else None
+    # Missing rows are not cached: the OAuth callback would create one right after
+    if row is not None:
+        integration_cache.fill(user_id, "google", row, generation)
+    return row
+
+
+# Users per `in` filter, keeps the PostgREST query string short
+INTEGRATION_BATCH_SIZE = 200
+
+
+async def get_google_integrations(user_ids: list) -> dict:
+    """Most recent Google token row per user for many users, {user_id: row}; users without one are absent."""
+    found = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        row = integration_cache.get(user_id, "google")
+        if row is not None:
+            found[user_id] = row
+        else:
+            missing.append(user_id)
+
+    generation = integration_cache.generation()
+    sb = await get_async_sb()
+    for i in range(0, len(missing), INTEGRATION_BATCH_SIZE):
+        with time_stage("integration_select"):
+            res = await execute(
+                sb.table("user_integrations")
+                .select("*")
+                .in_("user_id", missing[i:i + INTEGRATION_BATCH_SIZE])
+                .eq("provider", "google")
+                .order("created_at", desc=True),
+                "supabase-select",
+            )
+        err = get_error(res)
+        if err:
+            raise HTTPException(500, f"Supabase select error: {err}")
+        for row in get_data(res) or []:
+            # Rows arrive newest first, keep the first one per user
+            if row["user_id"] not in found:
+                found[row["user_id"]] = row
+                integration_cache.fill(row["user_id"], "google", row, generation)
+    return found
@@ -0,0 +1,13 @@
+-- Shared platform-key credentials in n8n (OpenAI, Gemini, ...).
+-- One row per logical secret ("slot"); the fingerprint is an HMAC of the
+-- secret material, never the secret itself.
+create table if not exists n8n_shared_credentials (
+    slot text primary key,
+    cred_type text not null,
+    fingerprint text not null,
+    n8n_credential_id text not null,
+    name text not null,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now(),
+    unique (cred_type, fingerprint)
+);
@@ -0,0 +1,13 @@
+-- Tenants are spread over several n8n instances (see n8n/sharding.py).
+-- Existing rows were all created on the original instance, "default".
+alter table workflows add column if not exists n8n_shard text not null default 'default';
+create index if not exists workflows_shard_status_idx on workflows (n8n_shard, status);
+create index if not exists workflows_user_id_idx on workflows (user_id);
+
+-- Shared credentials exist once per shard
+alter table n8n_shared_credentials add column if not exists n8n_shard text not null default 'default';
+alter table n8n_shared_credentials drop constraint if exists n8n_shared_credentials_pkey;
+alter table n8n_shared_credentials add primary key (slot, n8n_shard);
+alter table n8n_shared_credentials drop constraint if exists n8n_shared_credentials_cred_type_fingerprint_key;
+alter table n8n_shared_credentials add constraint n8n_shared_credentials_shard_fingerprint_key
+    unique (n8n_shard, cred_type, fingerprint);
@@ -0,0 +1,7 @@
+-- Proactive Google token refresh (workflows/token_refresh.py) reads only the
+-- rows about to expire, keyset-paged in (expiry, id) order, through this index.
+alter table user_integrations add column if not exists refresh_error text;
+drop index if exists user_integrations_refresh_due_idx;
+create index if not exists user_integrations_refresh_due_id_idx
+    on user_integrations (provider, expiry, id)
+    where refresh_error is null and refresh_token <> '';
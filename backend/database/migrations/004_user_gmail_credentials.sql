@@ -0,0 +1,12 @@
+-- One n8n Gmail credential per user and shard (workflows/gmail_credentials.py).
+-- The fingerprint is an HMAC of the credential data, never the tokens themselves.
+create table if not exists user_gmail_credentials (
+    user_id uuid not null,
+    n8n_shard text not null default 'default',
+    n8n_credential_id text not null,
+    name text not null,
+    fingerprint text not null,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now(),
+    primary key (user_id, n8n_shard)
+);
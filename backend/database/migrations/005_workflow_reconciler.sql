@@ -0,0 +1,11 @@
+-- Progress markers of background sync jobs (database/watermarks.py).
+create table if not exists sync_watermarks (
+    name text primary key,
+    value text not null,
+    updated_at timestamptz not null default now()
+);
+
+-- The reconciler (workflows/reconciler.py) corrects rows by n8n workflow id
+-- per shard, and sweeps a shard's rows in id order.
+create index if not exists workflows_shard_n8n_id_idx on workflows (n8n_shard, n8n_workflow_id);
+create index if not exists workflows_shard_id_idx on workflows (n8n_shard, id);
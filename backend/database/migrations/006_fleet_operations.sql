@@ -0,0 +1,21 @@
+-- Bulk pause/resume of tenant workflows (workflows/fleet.py). `cursor` is the
+-- last workflows.id handled, so an interrupted operation continues from it.
+create table if not exists fleet_operations (
+    id uuid primary key default gen_random_uuid(),
+    action text not null check (action in ('pause', 'resume')),
+    selector jsonb not null default '{}',
+    concurrency int not null default 8,
+    status text not null default 'queued',
+    cursor bigint not null default 0,
+    processed int not null default 0,
+    changed int not null default 0,
+    missing int not null default 0,
+    failed int not null default 0,
+    error text,
+    job_id text,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now()
+);
+
+-- Operations select rows by status in id order, optionally by template
+create index if not exists workflows_status_id_idx on workflows (status, id);
@@ -0,0 +1,2 @@
+-- GET /workflows pages through one user's rows newest first (keyset on id).
+create index if not exists workflows_user_id_id_idx on workflows (user_id, id desc);
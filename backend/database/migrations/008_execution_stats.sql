@@ -0,0 +1,81 @@
+-- Hourly execution rollups per n8n workflow (workflows/execution_stats.py).
+-- duration_buckets counts the executions of known duration per
+-- DURATION_BUCKETS_MS bucket; readers estimate percentiles from it.
+create table if not exists workflow_execution_stats (
+    n8n_shard text not null,
+    n8n_workflow_id text not null,
+    hour timestamptz not null,
+    workflow_id bigint not null,
+    user_id uuid not null,
+    executions integer not null default 0,
+    failures integer not null default 0,
+    duration_sum_ms bigint not null default 0,
+    duration_max_ms bigint not null default 0,
+    duration_buckets integer[] not null default '{}',
+    updated_at timestamptz not null default now(),
+    primary key (n8n_shard, n8n_workflow_id, hour)
+);
+
+-- GET /workflows/stats reads one user's recent hours.
+create index if not exists workflow_execution_stats_user_hour_idx on workflow_execution_stats (user_id, hour);
+
+-- Element-wise sum of two duration histograms; the shorter one counts as zeros.
+create or replace function add_duration_buckets(a integer[], b integer[])
+returns integer[]
+language sql
+immutable
+as $$
+    select coalesce(array_agg(coalesce(x, 0) + coalesce(y, 0) order by i), '{}')
+    from unnest(a, b) with ordinality as t(x, y, i)
+$$;
+
+-- Count the executions after since_id up to through_id of one shard exactly
+-- once: moves watermark `watermark_name` from since_id to through_id (creating
+-- it when since_id is null) and adds `rollups` into their rows in the same
+-- transaction, so a failed or repeated call has counted the range fully or
+-- not at all. Returns the rows written, or null when another pass already
+-- moved the watermark.
+create or replace function ingest_execution_stats(
+    watermark_name text, since_id text, through_id text, rollups jsonb
+)
+returns integer
+language plpgsql
+as $$
+declare
+    written integer;
+begin
+    if since_id is null then
+        insert into sync_watermarks (name, value) values (watermark_name, through_id)
+        on conflict (name) do nothing;
+    else
+        update sync_watermarks set value = through_id, updated_at = now()
+        where name = watermark_name and value = since_id;
+    end if;
+    if not found then
+        return null;
+    end if;
+
+    insert into workflow_execution_stats as s (
+        n8n_shard, n8n_workflow_id, hour, workflow_id, user_id,
+        executions, failures, duration_sum_ms, duration_max_ms, duration_buckets
+    )
+    select r.n8n_shard, r.n8n_workflow_id, r.hour, r.workflow_id, r.user_id,
+           r.executions, r.failures, r.duration_sum_ms, r.duration_max_ms, r.duration_buckets
+    from jsonb_to_recordset(rollups) as r(
+        n8n_shard text, n8n_workflow_id text, hour timestamptz, workflow_id bigint, user_id uuid,
+        executions integer, failures integer, duration_sum_ms bigint, duration_max_ms bigint,
+        duration_buckets integer[]
+    )
+    on conflict (n8n_shard, n8n_workflow_id, hour) do update set
+        workflow_id = excluded.workflow_id,
+        user_id = excluded.user_id,
+        executions = s.executions + excluded.executions,
+        failures = s.failures + excluded.failures,
+        duration_sum_ms = s.duration_sum_ms + excluded.duration_sum_ms,
+        duration_max_ms = greatest(s.duration_max_ms, excluded.duration_max_ms),
+        duration_buckets = add_duration_buckets(s.duration_buckets, excluded.duration_buckets),
+        updated_at = now();
+    get diagnostics written = row_count;
+    return written;
+end;
+$$;
@@ -1,3 +1,5 @@
+from observability.server_timing import span
+
 def get_data(res):
     # Works for both PostgrestResponse objects and dicts
     if res is None:
@@ -16,3 +18,8 @@ def get_error(res):
     if isinstance(res, dict):
         return res.get("error", None)
     return None
+
+async def execute(query, name: str):
+    # Await a supabase query builder, reported as a Server-Timing span (e.g. "supabase-select")
+    with span(name):
+        return await query.execute()
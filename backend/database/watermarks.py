@@ -0,0 +1,36 @@
+# database/watermarks.py
+# Named progress markers of background sync jobs, kept in sync_watermarks so
+# a restart resumes where the last pass stopped (e.g. the newest n8n
+# updatedAt the reconciler has handled on a shard).
+from datetime import datetime, timezone
+
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+
+WATERMARKS_TABLE = "sync_watermarks"
+
+
+async def get_watermark(name: str):
+    """Stored value of watermark `name`, or None if it was never set."""
+    sb = await get_async_sb()
+    res = await execute(sb.table(WATERMARKS_TABLE).select("value").eq("name", name).limit(1), "supabase-select")
+    err = get_error(res)
+    if err:
+        raise RuntimeError(f"Supabase select error: {err}")
+    rows = get_data(res) or []
+    return rows[0]["value"] if rows else None
+
+
+async def set_watermark(name: str, value: str) -> None:
+    sb = await get_async_sb()
+    res = await execute(
+        sb.table(WATERMARKS_TABLE).upsert(
+            {"name": name, "value": value, "updated_at": datetime.now(timezone.utc).isoformat()},
+            on_conflict="name",
+        ),
+        "supabase-upsert",
+    )
+    err = get_error(res)
+    if err:
+        raise RuntimeError(f"Supabase upsert error: {err}")
+
@@ -0,0 +1,61 @@
+# jobs/fleet_jobs.py
+# Fleet pause/resume operations (workflows/fleet.py) run as "fleet" jobs. A
+# job works on its operation for at most FLEET_SLICE_SECONDS, well inside
+# the job lease, then queues the next slice; a failed slice is retried by the
+# job queue and picks up from the operation's last checkpoint. Slices get
+# extra attempts, since n8n shedding load (FleetBackoff) fails them until the
+# breaker closes again.
+import os
+import asyncio
+import logging
+
+from workflows.fleet import FAILED, RUNNING, fleet_runner, get_operation, update_operation
+
+from .queue import job_workers
+from .worker import PermanentJobError
+
+logger = logging.getLogger(__name__)
+
+FLEET_JOB = "fleet"
+FLEET_SLICE_SECONDS = float(os.environ.get("FLEET_SLICE_SECONDS", "60"))
+FLEET_JOB_MAX_ATTEMPTS = int(os.environ.get("FLEET_JOB_MAX_ATTEMPTS", "10"))
+
+
+async def run_fleet_job(payload: dict) -> dict:
+    op_id = payload["operationId"]
+    op = await get_operation(op_id)
+    if op is None:
+        raise PermanentJobError(f"Unknown fleet operation {op_id}")
+
+    deadline = asyncio.get_running_loop().time() + FLEET_SLICE_SECONDS
+    try:
+        op = await fleet_runner.run_slice(op, deadline)
+    except Exception as e:
+        await update_operation(op_id, {"status": FAILED, "error": str(e)[:500]}, expect_status=(RUNNING,))
+        raise
+
+    if op["status"] == RUNNING:
+        job = await enqueue_operation(op)
+        logger.info(f"Fleet operation {op_id} continues from row {op['cursor']} in job {job['id']}")
+    return {
+        "operationId": op_id,
+        "status": op["status"],
+        "cursor": op["cursor"],
+        "processed": op.get("processed") or 0,
+    }
+
+
+async def enqueue_operation(op: dict) -> dict:
+    """Queue the next slice of `op`, starting at its checkpoint."""
+    job = await job_workers.enqueue(
+        FLEET_JOB,
+        {"operationId": op["id"]},
+        max_attempts=FLEET_JOB_MAX_ATTEMPTS,
+        # One queued slice per operation and checkpoint
+        dedupe_key=f"{FLEET_JOB}:{op['id']}:{op['cursor']}",
+    )
+    await update_operation(op["id"], {"job_id": job["id"]})
+    return job
+
+
+job_workers.register(FLEET_JOB, run_fleet_job)
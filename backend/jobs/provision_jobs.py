@@ -0,0 +1,47 @@
+# jobs/provision_jobs.py
+# Template installs run as "provision" jobs so the HTTP request returns as soon
+# as the job is queued instead of waiting on n8n.
+import logging
+
+from database.integrations import get_google_integration
+from workflows.catalog import templates
+from workflows.template_registry import UnknownTemplate
+from workflows.provisioning import provision_template
+
+from .queue import job_workers
+from .worker import PermanentJobError
+
+logger = logging.getLogger(__name__)
+
+PROVISION_JOB = "provision"
+
+
+async def run_provision_job(payload: dict) -> dict:
+    user_id = payload["userId"]
+    template_id = payload["templateId"]
+    try:
+        templates.get(template_id)
+    except UnknownTemplate:
+        raise PermanentJobError(f"Unknown template ID: {template_id}")
+
+    # Re-read on every attempt: tokens may have been refreshed since enqueue
+    integ_row = await get_google_integration(user_id)
+    if not integ_row:
+        raise PermanentJobError("No Google integration for user")
+
+    return await provision_template(user_id=user_id, template_id=template_id, integ_row=integ_row)
+
+
+async def enqueue_install(user_id: str, template_id: str) -> dict:
+    """Queue an install, or return the install already queued/running for this user and template."""
+    job = await job_workers.enqueue(
+        PROVISION_JOB,
+        {"userId": user_id, "templateId": template_id},
+        user_id=user_id,
+        dedupe_key=f"{PROVISION_JOB}:{user_id}:{template_id}",
+    )
+    logger.info(f"Queued install job {job['id']} templateId={template_id}, user={user_id}")
+    return job
+
+
+job_workers.register(PROVISION_JOB, run_provision_job)
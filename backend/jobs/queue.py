@@ -0,0 +1,8 @@
+# jobs/queue.py
+# Process-wide job store and worker pool. Handlers register themselves with
+# `job_workers.register(kind, handler)` when their module is imported.
+from .store import JobStore
+from .worker import JobWorkerPool
+
+job_store = JobStore()
+job_workers = JobWorkerPool(job_store)
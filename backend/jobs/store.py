@@ -0,0 +1,222 @@
+# jobs/store.py
+# Local SQLite persistence for background jobs, so queued and in-flight work
+# survives a restart. Running jobs hold a lease that their worker renews while
+# the handler runs; a job whose lease expired (its worker died) becomes
+# claimable again, unless it has used up its attempts, in which case it fails.
+# Only the current lease holder can record the outcome.
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+JOBS_DB_PATH = os.environ.get("JOBS_DB_PATH", "jobs.sqlite3")
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "120"))
+# How long a stored response answers retries carrying the same Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+_SCHEMA = """
+create table if not exists jobs (
+    id text primary key,
+    kind text not null,
+    user_id text,
+    payload text not null,
+    status text not null,
+    attempts integer not null default 0,
+    max_attempts integer not null,
+    run_at real not null,
+    locked_by text,
+    locked_until real,
+    result text,
+    error text,
+    dedupe_key text,
+    created_at real not null,
+    updated_at real not null
+);
+create index if not exists jobs_claim_idx on jobs (status, run_at);
+create table if not exists idempotency_keys (
+    user_id text not null,
+    key text not null,
+    fingerprint text not null,
+    status_code integer not null,
+    response text not null,
+    created_at real not null,
+    primary key (user_id, key)
+);
+create index if not exists idempotency_keys_created_idx on idempotency_keys (created_at);
+"""
+
+# At most one queued or running job per dedupe key
+_DEDUPE_INDEX = """
+create unique index if not exists jobs_active_dedupe_idx on jobs (dedupe_key)
+where dedupe_key is not null and status in ('queued', 'running');
+"""
+
+
+def _row_to_job(row: sqlite3.Row) -> dict:
+    if row is None:
+        return None
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+class JobStore:
+    """Thread-safe wrapper around one SQLite connection. Calls are blocking."""
+
+    def __init__(
+        self,
+        path: str = JOBS_DB_PATH,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        idempotency_ttl: float = IDEMPOTENCY_TTL_SECONDS,
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.idempotency_ttl = idempotency_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute("pragma synchronous=normal")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("pragma table_info(jobs)")}
+        if "dedupe_key" not in columns:
+            self._conn.execute("alter table jobs add column dedupe_key text")
+        self._conn.executescript(_DEDUPE_INDEX)
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: dict,
+        user_id: str = None,
+        max_attempts: int = 5,
+        delay: float = 0.0,
+        dedupe_key: str = None,
+    ) -> dict:
+        """Insert a job. If `dedupe_key` matches a queued or running job, return that job instead."""
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            cur = self._conn.execute(
+                "insert into jobs (id, kind, user_id, payload, status, max_attempts, run_at, dedupe_key, created_at, updated_at) "
+                "values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) on conflict do nothing",
+                (job_id, kind, user_id, json.dumps(payload), QUEUED, max_attempts, now + delay, dedupe_key, now, now),
+            )
+            if cur.rowcount == 0:
+                row = self._conn.execute(
+                    "select * from jobs where dedupe_key = ? and status in (?, ?)", (dedupe_key, QUEUED, RUNNING)
+                ).fetchone()
+                return _row_to_job(row)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> dict:
+        with self._lock:
+            row = self._conn.execute("select * from jobs where id = ?", (job_id,)).fetchone()
+        return _row_to_job(row)
+
+    def claim(self, worker_id: str) -> dict:
+        """Lease the next runnable job to `worker_id`, or return None."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("begin immediate")
+            try:
+                # A job that keeps killing or hanging its worker would otherwise be re-leased forever
+                self._conn.execute(
+                    "update jobs set status = ?, error = ?, locked_by = null, locked_until = null, updated_at = ? "
+                    "where status = ? and locked_until < ? and attempts >= max_attempts",
+                    (FAILED, "lease expired after max attempts", now, RUNNING, now),
+                )
+                row = self._conn.execute(
+                    "select id from jobs where (status = ? and run_at <= ?) or (status = ? and locked_until < ?) "
+                    "order by run_at limit 1",
+                    (QUEUED, now, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("commit")
+                    return None
+                self._conn.execute(
+                    "update jobs set status = ?, attempts = attempts + 1, locked_by = ?, locked_until = ?, updated_at = ? "
+                    "where id = ?",
+                    (RUNNING, worker_id, now + self.lease_seconds, now, row["id"]),
+                )
+                job = self._conn.execute("select * from jobs where id = ?", (row["id"],)).fetchone()
+                self._conn.execute("commit")
+            except Exception:
+                self._conn.execute("rollback")
+                raise
+        return _row_to_job(job)
+
+    def renew(self, job_id: str, worker_id: str) -> bool:
+        """Extend `worker_id`'s lease on a running job; False if the lease was lost."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "update jobs set locked_until = ?, updated_at = ? where id = ? and status = ? and locked_by = ?",
+                (now + self.lease_seconds, now, job_id, RUNNING, worker_id),
+            )
+        return cur.rowcount > 0
+
+    def complete(self, job_id: str, worker_id: str, result) -> bool:
+        return self._finish(job_id, worker_id, SUCCEEDED, result=json.dumps(result, default=str))
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry_at: float = None) -> bool:
+        """Record a failed attempt; requeue at `retry_at` or fail permanently if None.
+
+        Like complete(), a no-op returning False unless `worker_id` still holds the lease.
+        """
+        if retry_at is None:
+            return self._finish(job_id, worker_id, FAILED, error=error)
+        with self._lock:
+            cur = self._conn.execute(
+                "update jobs set status = ?, error = ?, run_at = ?, locked_by = null, locked_until = null, updated_at = ? "
+                "where id = ? and status = ? and locked_by = ?",
+                (QUEUED, error, retry_at, time.time(), job_id, RUNNING, worker_id),
+            )
+        return cur.rowcount > 0
+
+    def _finish(self, job_id: str, worker_id: str, status: str, result: str = None, error: str = None) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                "update jobs set status = ?, result = ?, error = ?, locked_by = null, locked_until = null, updated_at = ? "
+                "where id = ? and status = ? and locked_by = ?",
+                (status, result, error, time.time(), job_id, RUNNING, worker_id),
+            )
+        return cur.rowcount > 0
+
+    def next_run_at(self):
+        """Earliest run_at among queued jobs, used by idle workers to size their sleep."""
+        with self._lock:
+            row = self._conn.execute("select min(run_at) as t from jobs where status = ?", (QUEUED,)).fetchone()
+        return row["t"]
+
+    def get_idempotent(self, user_id: str, key: str):
+        """Stored (fingerprint, status_code, response) for a live key, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "select fingerprint, status_code, response from idempotency_keys "
+                "where user_id = ? and key = ? and created_at > ?",
+                (user_id, key, time.time() - self.idempotency_ttl),
+            ).fetchone()
+        if row is None:
+            return None
+        return row["fingerprint"], row["status_code"], json.loads(row["response"])
+
+    def save_idempotent(self, user_id: str, key: str, fingerprint: str, status_code: int, response: dict):
+        """Store a response unless a live one exists; returns whichever is stored."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("delete from idempotency_keys where created_at <= ?", (now - self.idempotency_ttl,))
+            self._conn.execute(
+                "insert into idempotency_keys (user_id, key, fingerprint, status_code, response, created_at) "
+                "values (?, ?, ?, ?, ?, ?) on conflict do nothing",
+                (user_id, key, fingerprint, status_code, json.dumps(response, default=str), now),
+            )
+        return self.get_idempotent(user_id, key)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
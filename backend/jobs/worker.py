@@ -0,0 +1,152 @@
+# jobs/worker.py
+# Pool of asyncio workers draining the JobStore. Failed attempts are retried
+# with exponential backoff and jitter until the job's max_attempts is reached.
+# While a handler runs, a heartbeat renews the job's lease so a slow install
+# is not claimed and run a second time by another worker.
+import os
+import time
+import socket
+import random
+import asyncio
+import logging
+
+import httpx
+import requests
+from fastapi import HTTPException
+
+from .store import JOB_LEASE_SECONDS, JobStore
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1.0"))
+JOB_BACKOFF_BASE = float(os.environ.get("JOB_BACKOFF_BASE", "2.0"))
+JOB_BACKOFF_MAX = float(os.environ.get("JOB_BACKOFF_MAX", "300"))
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("JOB_HEARTBEAT_SECONDS", str(JOB_LEASE_SECONDS / 4)))
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help."""
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, PermanentJobError):
+        return False
+    if isinstance(exc, HTTPException):
+        return exc.status_code >= 500
+    response = getattr(exc, "response", None)
+    if isinstance(exc, (httpx.HTTPStatusError, requests.HTTPError)) and response is not None:
+        return response.status_code in (408, 429) or response.status_code >= 500
+    return True
+
+
+def backoff_delay(attempt: int, base: float = JOB_BACKOFF_BASE, cap: float = JOB_BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff for the given (1-based) attempt."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class JobWorkerPool:
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._handlers = {}
+        self._tasks = []
+        self._wake = asyncio.Event()
+        self._stopping = False
+
+    def register(self, kind: str, handler) -> None:
+        """`handler` is `async fn(payload: dict) -> JSON-serialisable result`."""
+        self._handlers[kind] = handler
+
+    def notify(self) -> None:
+        """Wake idle workers, e.g. right after enqueueing."""
+        self._wake.set()
+
+    async def enqueue(
+        self, kind: str, payload: dict, user_id: str = None, max_attempts: int = 5, dedupe_key: str = None
+    ) -> dict:
+        job = await asyncio.to_thread(
+            self.store.enqueue, kind, payload, user_id, max_attempts, 0.0, dedupe_key
+        )
+        self.notify()
+        return job
+
+    def start(self) -> None:
+        self._stopping = False
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._tasks = [asyncio.create_task(self._worker(f"{prefix}-{i}")) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} job workers")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self.notify()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, worker_id: str) -> None:
+        while not self._stopping:
+            try:
+                job = await asyncio.to_thread(self.store.claim, worker_id)
+            except Exception as e:
+                logger.error(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                await self._idle()
+                continue
+            await self._run(job, worker_id)
+
+    async def _idle(self) -> None:
+        timeout = self.poll_interval
+        next_run = await asyncio.to_thread(self.store.next_run_at)
+        if next_run is not None:
+            timeout = max(0.0, min(timeout, next_run - time.time()))
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _heartbeat(self, job_id: str, worker_id: str) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                if not await asyncio.to_thread(self.store.renew, job_id, worker_id):
+                    logger.warning(f"Job {job_id} lease lost by {worker_id}; its outcome will not be recorded")
+                    return
+            except Exception as e:
+                logger.error(f"Job {job_id} lease renewal failed: {e}")
+
+    async def _run(self, job: dict, worker_id: str) -> None:
+        handler = self._handlers.get(job["kind"])
+        if handler is None:
+            await asyncio.to_thread(self.store.fail, job["id"], worker_id, f"No handler for job kind {job['kind']}")
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"], worker_id))
+        try:
+            result = await handler(job["payload"])
+        except asyncio.CancelledError:
+            # Shutting down: the lease expires and another worker picks it up
+            raise
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+            if is_retryable(e) and job["attempts"] < job["max_attempts"]:
+                delay = backoff_delay(job["attempts"])
+                logger.warning(f"Job {job['id']} attempt {job['attempts']} failed, retrying in {delay:.1f}s: {error}")
+                recorded = await asyncio.to_thread(self.store.fail, job["id"], worker_id, error, time.time() + delay)
+            else:
+                logger.error(f"Job {job['id']} failed after {job['attempts']} attempts: {error}")
+                recorded = await asyncio.to_thread(self.store.fail, job["id"], worker_id, error)
+            if not recorded:
+                logger.warning(f"Job {job['id']} outcome dropped: {worker_id} no longer holds its lease")
+            return
+        finally:
+            heartbeat.cancel()
+
+        if await asyncio.to_thread(self.store.complete, job["id"], worker_id, result):
+            logger.info(f"Job {job['id']} ({job['kind']}) succeeded")
+        else:
+            logger.warning(f"Job {job['id']} result dropped: {worker_id} no longer holds its lease")
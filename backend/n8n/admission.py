@@ -0,0 +1,255 @@
+# n8n/admission.py
+# Client-side admission control for calls to n8n, shared per base URL:
+#
+# - AIMDLimiter: concurrency limit that grows by ~1 per window of successful
+#   calls and is cut multiplicatively on overload (429/503, timeouts), so we
+#   settle near what n8n can actually serve instead of queueing into timeouts.
+# - RetryBudget: retries may add at most a fraction of the request rate, so
+#   retries cannot multiply load during an outage.
+# - CircuitBreaker: after consecutive failures calls fail fast for a cooldown,
+#   then a single probe decides whether to close again.
+#
+# n8n/n8n_async_client.py runs every call through all three.
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+N8N_LIMIT_INITIAL = int(os.environ.get("N8N_LIMIT_INITIAL", "8"))
+N8N_LIMIT_MIN = int(os.environ.get("N8N_LIMIT_MIN", "1"))
+N8N_LIMIT_MAX = int(os.environ.get("N8N_LIMIT_MAX", os.environ.get("N8N_POOL_SIZE", "20")))
+N8N_LIMIT_BACKOFF = float(os.environ.get("N8N_LIMIT_BACKOFF", "0.7"))
+# Longest a call waits for an admission slot before giving up
+N8N_ADMISSION_TIMEOUT = float(os.environ.get("N8N_ADMISSION_TIMEOUT", "30"))
+
+N8N_RETRY_MAX_ATTEMPTS = int(os.environ.get("N8N_RETRY_MAX_ATTEMPTS", "3"))
+N8N_RETRY_BASE_DELAY = float(os.environ.get("N8N_RETRY_BASE_DELAY", "0.2"))
+N8N_RETRY_MAX_DELAY = float(os.environ.get("N8N_RETRY_MAX_DELAY", "10"))
+# Retries allowed per request sent, plus a small floor so idle periods can still retry
+N8N_RETRY_BUDGET_RATIO = float(os.environ.get("N8N_RETRY_BUDGET_RATIO", "0.1"))
+N8N_RETRY_BUDGET_MIN_PER_SEC = float(os.environ.get("N8N_RETRY_BUDGET_MIN_PER_SEC", "1"))
+
+N8N_BREAKER_FAILURES = int(os.environ.get("N8N_BREAKER_FAILURES", "5"))
+N8N_BREAKER_COOLDOWN = float(os.environ.get("N8N_BREAKER_COOLDOWN", "30"))
+
+# n8n (or its proxy) is shedding load; the request was not processed
+OVERLOAD_STATUSES = {429, 503}
+# Worth retrying for idempotent calls; a POST may already have been applied
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "PATCH", "DELETE"}
+
+
+class CircuitOpenError(Exception):
+    """n8n is considered down; the call was not attempted."""
+
+    def __init__(self, base_url: str, retry_after: float):
+        super().__init__(f"n8n at {base_url} is unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class AdmissionTimeout(Exception):
+    """No concurrency slot became free within N8N_ADMISSION_TIMEOUT."""
+
+
+class AIMDLimiter:
+    def __init__(
+        self,
+        initial: int = N8N_LIMIT_INITIAL,
+        minimum: int = N8N_LIMIT_MIN,
+        maximum: int = N8N_LIMIT_MAX,
+        backoff: float = N8N_LIMIT_BACKOFF,
+        timeout: float = N8N_ADMISSION_TIMEOUT,
+    ):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+        self._last_decrease = 0.0
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the start time to pass back to `release`."""
+        async with self._cond:
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: self.in_flight < int(self.limit)), self.timeout
+                )
+            except asyncio.TimeoutError:
+                raise AdmissionTimeout(f"No n8n admission slot within {self.timeout}s (limit={int(self.limit)})")
+            self.in_flight += 1
+        return time.monotonic()
+
+    async def release(self, started: float, overloaded: bool) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                # One cut per congestion event: calls started before the last
+                # cut were already accounted for
+                if started >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self._last_decrease = time.monotonic()
+                    logger.warning(f"n8n overloaded, concurrency limit -> {int(self.limit)}")
+            elif self.limit < self.maximum:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+class RetryBudget:
+    def __init__(
+        self,
+        ratio: float = N8N_RETRY_BUDGET_RATIO,
+        min_per_sec: float = N8N_RETRY_BUDGET_MIN_PER_SEC,
+        max_tokens: float = None,
+    ):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.max_tokens = max_tokens if max_tokens is not None else max(10.0, min_per_sec * 10)
+        self._tokens = self.max_tokens
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._refilled) * self.min_per_sec)
+        self._refilled = now
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, base_url: str, failures: int = N8N_BREAKER_FAILURES, cooldown: float = N8N_BREAKER_COOLDOWN):
+        self.base_url = base_url
+        self.failure_threshold = failures
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless a call may go out now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self._opened_at + self.cooldown - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(self.base_url, remaining)
+            # Cooldown over: let one probe through (another one if the probe
+            # never reported back, e.g. its caller was cancelled)
+            now = time.monotonic()
+            if self._probing and now - self._probe_started < self.cooldown:
+                raise CircuitOpenError(self.base_url, self.cooldown)
+            self.state = self.HALF_OPEN
+            self._probing = True
+            self._probe_started = now
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"n8n circuit closed for {self.base_url}")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error(f"n8n circuit opened for {self.base_url} after {self._failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+def retry_after_seconds(value: str):
+    """Parse a Retry-After header (delta seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: float = None) -> float:
+    """Delay before retry number `attempt` (1-based); Retry-After wins when given."""
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(N8N_RETRY_MAX_DELAY, N8N_RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def is_idempotent(method: str, idempotent: bool = None) -> bool:
+    return method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+
+
+def may_retry_status(status: int, method: str, idempotent: bool = None) -> bool:
+    if is_idempotent(method, idempotent):
+        return status in RETRYABLE_STATUSES
+    # Creates are only replayed when n8n explicitly refused the request
+    return status in OVERLOAD_STATUSES
+
+
+class Admission:
+    """Admission state for one n8n base URL."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.breaker = CircuitBreaker(base_url)
+        self.budget = RetryBudget()
+        self._limiter = None
+
+    @property
+    def limiter(self) -> AIMDLimiter:
+        # Created on first async use so the asyncio primitives bind to the running loop
+        if self._limiter is None:
+            self._limiter = AIMDLimiter()
+        return self._limiter
+
+    def should_retry(self, attempt: int, retry_after: float = None) -> bool:
+        """Common gate: attempts left, Retry-After not beyond our max delay, budget available."""
+        if attempt >= N8N_RETRY_MAX_ATTEMPTS:
+            return False
+        if retry_after is not None and retry_after > N8N_RETRY_MAX_DELAY:
+            return False
+        if not self.budget.try_spend():
+            logger.warning(f"n8n retry budget exhausted for {self.base_url}")
+            return False
+        return True
+
+
+_admissions = {}
+_admissions_lock = threading.Lock()
+
+def admission_for(base_url: str) -> Admission:
+    base_url = base_url.rstrip("/")
+    with _admissions_lock:
+        adm = _admissions.get(base_url)
+        if adm is None:
+            adm = _admissions[base_url] = Admission(base_url)
+        return adm
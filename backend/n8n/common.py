@@ -0,0 +1,63 @@
+# n8n/common.py
+# Settings and request/payload helpers shared by the n8n clients: the asyncio
+# client that serves the app (n8n_async_client.py) and the threaded client
+# kept for the pooling benchmark (n8n_client.py).
+import os
+
+N8N_KEY = os.environ["N8N_API_KEY"]
+
+# Connection pool / timeout tuning. The connect timeout is kept short so a dead
+# n8n fails fast, while the read timeout covers slow workflow activation.
+N8N_POOL_SIZE = int(os.environ.get("N8N_POOL_SIZE", "20"))
+N8N_CONNECT_TIMEOUT = float(os.environ.get("N8N_CONNECT_TIMEOUT", "3.05"))
+N8N_READ_TIMEOUT = float(os.environ.get("N8N_READ_TIMEOUT", "20"))
+N8N_WARMUP_CONNECTIONS = int(os.environ.get("N8N_WARMUP_CONNECTIONS", "0"))
+# n8n caps list pages at 250
+N8N_LIST_PAGE_SIZE = int(os.environ.get("N8N_LIST_PAGE_SIZE", "250"))
+
+
+def _headers(api_key: str = None):
+    return {
+        "X-N8N-API-KEY": api_key or N8N_KEY,
+        "Content-Type": "application/json",
+        "Accept": "application/json"
+    }
+
+# Short Server-Timing labels for the credential types we provision
+_CRED_SPAN_LABELS = {"gmailOAuth2": "gmail", "openAiApi": "openai", "googlePalmApi": "gemini"}
+
+def _cred_span(op: str, cred_type: str) -> str:
+    return f"n8n-{op}-{_CRED_SPAN_LABELS.get(cred_type, cred_type)}"
+
+def _extract_id(j):
+    return j.get("id") if isinstance(j, dict) else j
+
+def _list_params(cursor: str, limit: int, **filters) -> dict:
+    params = {"limit": min(limit, 250)}
+    params.update({k: v for k, v in filters.items() if v is not None})
+    if cursor:
+        params["cursor"] = cursor
+    return params
+
+def _workflow_list_params(active: bool, cursor: str, limit: int) -> dict:
+    return _list_params(
+        cursor, limit, excludePinnedData="true", active=None if active is None else "true" if active else "false"
+    )
+
+def _gmail_credential_data(payload: dict) -> dict:
+    # Updated payload to match current n8n schema requirements
+    return {
+        "clientId": payload["clientId"],
+        "clientSecret": payload["clientSecret"],
+        "oauthTokenData": payload["oauthTokenData"],
+        # Add required schema properties
+        "sendAdditionalBodyProperties": False,
+        "additionalBodyProperties": {}
+    }
+
+def _gemini_credential_data(api_key: str) -> dict:
+    # googlePalmApi is the credential type n8n uses for Google Gemini
+    return {
+        "host": "https://generativelanguage.googleapis.com",
+        "apiKey": api_key
+    }
@@ -0,0 +1,273 @@
+# n8n/n8n_async_client.py
+# asyncio n8n client for the FastAPI request path: requests share the event
+# loop and one httpx connection pool per shard instead of holding a worker
+# thread each.
+import asyncio
+import logging
+
+import httpx
+
+from .common import (
+    N8N_POOL_SIZE,
+    N8N_CONNECT_TIMEOUT,
+    N8N_READ_TIMEOUT,
+    N8N_LIST_PAGE_SIZE,
+    _headers,
+    _list_params,
+    _workflow_list_params,
+    _extract_id,
+    _gmail_credential_data,
+    _cred_span,
+)
+from observability.server_timing import span
+from .sharding import SHARDS, get_shard
+from .admission import (
+    OVERLOAD_STATUSES,
+    admission_for,
+    backoff_delay,
+    is_idempotent,
+    may_retry_status,
+    retry_after_seconds,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _raise_for_status(resp: httpx.Response):
+    try:
+        resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise httpx.HTTPStatusError(f"{e} :: {resp.text}", request=e.request, response=resp) from e
+
+def _may_retry_error(exc: httpx.TransportError, method: str, idempotent: bool = None) -> bool:
+    # Connection never established: the request cannot have reached n8n
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    return is_idempotent(method, idempotent)
+
+
+class AsyncN8NClient:
+    """n8n REST client backed by a pooled keep-alive httpx.AsyncClient."""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        pool_size: int = N8N_POOL_SIZE,
+        connect_timeout: float = N8N_CONNECT_TIMEOUT,
+        read_timeout: float = N8N_READ_TIMEOUT,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.admission = admission_for(self.base_url)
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=_headers(api_key),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            # pool timeout bounds how long a call waits for a free connection
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+    async def request(
+        self, method: str, path: str, idempotent: bool = None, timing_name: str = "n8n", **kwargs
+    ) -> httpx.Response:
+        """Send a request through admission control (see n8n/admission.py).
+
+        `idempotent` overrides the method-based default for retry decisions,
+        e.g. activating a workflow is a safe-to-repeat POST. `timing_name`
+        labels the call, retries included, in the Server-Timing header.
+        """
+        with span(timing_name):
+            return await self._send(method, path, idempotent, **kwargs)
+
+    async def _send(self, method: str, path: str, idempotent: bool = None, **kwargs) -> httpx.Response:
+        adm = self.admission
+        adm.budget.record_request()
+        attempt = 0
+        while True:
+            attempt += 1
+            adm.breaker.check()
+            started = await adm.limiter.acquire()
+            r = error = None
+            try:
+                r = await self.http.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                error = e
+            finally:
+                overloaded = isinstance(error, httpx.TimeoutException) or (
+                    r is not None and r.status_code in OVERLOAD_STATUSES
+                )
+                await adm.limiter.release(started, overloaded)
+
+            if error is not None:
+                adm.breaker.record_failure()
+                if _may_retry_error(error, method, idempotent) and adm.should_retry(attempt):
+                    delay = backoff_delay(attempt)
+                    logger.warning(f"n8n {method} {path} failed ({error!r}), retry {attempt} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                raise error
+
+            if r.status_code >= 500:
+                adm.breaker.record_failure()
+            else:
+                adm.breaker.record_success()
+
+            if may_retry_status(r.status_code, method, idempotent):
+                retry_after = retry_after_seconds(r.headers.get("Retry-After"))
+                if adm.should_retry(attempt, retry_after):
+                    delay = backoff_delay(attempt, retry_after)
+                    logger.warning(f"n8n {method} {path} returned {r.status_code}, retry {attempt} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+            _raise_for_status(r)
+            return r
+
+    async def create_credential(self, name: str, cred_type: str, data: dict) -> dict:
+        r = await self.request(
+            "POST",
+            "/api/v1/credentials",
+            json={"name": name, "type": cred_type, "data": data},
+            timing_name=_cred_span("cred", cred_type),
+        )
+        return {"id": _extract_id(r.json()), "name": name}
+
+    async def update_credential(self, cred_id, name: str, cred_type: str, data: dict) -> dict:
+        await self.request(
+            "PATCH",
+            f"/api/v1/credentials/{cred_id}",
+            json={"name": name, "type": cred_type, "data": data},
+            timing_name=_cred_span("cred-update", cred_type),
+        )
+        return {"id": cred_id, "name": name}
+
+    async def delete_credential(self, cred_id) -> None:
+        await self.request("DELETE", f"/api/v1/credentials/{cred_id}", timing_name="n8n-cred-delete")
+
+    async def create_workflow(self, name: str, wf_json: dict):
+        r = await self.request(
+            "POST",
+            "/api/v1/workflows",
+            json={
+                "name": name,
+                "nodes": wf_json["nodes"],
+                "connections": wf_json["connections"],
+                "settings": {},
+            },
+            timing_name="n8n-create",
+        )
+        return _extract_id(r.json())
+
+    async def create_workflow_body(self, body: bytes):
+        """Create a workflow from an already serialised request body."""
+        r = await self.request("POST", "/api/v1/workflows", content=body, timing_name="n8n-create")
+        return _extract_id(r.json())
+
+    async def activate_workflow(self, wid) -> None:
+        await self.request("POST", f"/api/v1/workflows/{wid}/activate", idempotent=True, timing_name="n8n-activate")
+
+    async def deactivate_workflow(self, wid) -> None:
+        await self.request(
+            "POST", f"/api/v1/workflows/{wid}/deactivate", idempotent=True, timing_name="n8n-deactivate"
+        )
+
+    async def delete_workflow(self, wid) -> None:
+        await self.request("DELETE", f"/api/v1/workflows/{wid}", timing_name="n8n-delete")
+
+    async def list_workflows(self, active: bool = None, cursor: str = None, limit: int = N8N_LIST_PAGE_SIZE) -> tuple:
+        """One page of workflows; returns (workflows, cursor of the next page or None)."""
+        r = await self.request(
+            "GET", "/api/v1/workflows", params=_workflow_list_params(active, cursor, limit), timing_name="n8n-list"
+        )
+        j = r.json()
+        return j.get("data") or [], j.get("nextCursor")
+
+    async def list_executions(self, cursor: str = None, limit: int = N8N_LIST_PAGE_SIZE, workflow_id=None) -> tuple:
+        """One page of executions, newest first, without run data; returns (executions, next cursor or None)."""
+        r = await self.request(
+            "GET",
+            "/api/v1/executions",
+            params=_list_params(cursor, limit, workflowId=workflow_id, includeData="false"),
+            timing_name="n8n-exec-list",
+        )
+        j = r.json()
+        return j.get("data") or [], j.get("nextCursor")
+
+    async def list_credentials(self, cursor: str = None, limit: int = N8N_LIST_PAGE_SIZE) -> tuple:
+        """One page of credentials (metadata, no secrets); returns (credentials, next cursor or None)."""
+        r = await self.request(
+            "GET", "/api/v1/credentials", params=_list_params(cursor, limit), timing_name="n8n-cred-list"
+        )
+        j = r.json()
+        return j.get("data") or [], j.get("nextCursor")
+
+    async def warm_up(self, connections: int = None) -> int:
+        """Concurrently open up to `connections` pooled connections; see N8NClient.warm_up."""
+        connections = min(connections or self.pool_size, self.pool_size)
+
+        async def _ping():
+            try:
+                await self.http.get("/healthz")
+                return True
+            except httpx.HTTPError as e:
+                logger.warning(f"n8n warm-up request failed: {e}")
+                return False
+
+        warmed = sum(await asyncio.gather(*(_ping() for _ in range(connections))))
+        logger.info(f"n8n warm-up opened {warmed}/{connections} connections to {self.base_url}")
+        return warmed
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+
+# One pooled client per n8n shard
+_clients = {}
+
+def get_async_client(shard: str = None) -> AsyncN8NClient:
+    """Return the process wide async client for `shard`, creating it on first use."""
+    s = get_shard(shard)
+    client = _clients.get(s.name)
+    if client is None:
+        client = _clients[s.name] = AsyncN8NClient(s.base_url, s.api_key)
+    return client
+
+async def close_async_client() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+async def warm_up_shards(connections: int) -> None:
+    await asyncio.gather(*(get_async_client(name).warm_up(connections) for name in SHARDS))
+
+
+async def upsert_gmail_credential(name: str, payload: dict, shard: str = None, cred_id=None) -> dict:
+    """Update gmailOAuth2 credential `cred_id` in place, or create one if there is none
+    (or it was deleted in n8n). Returns its ID and name."""
+    client = get_async_client(shard)
+    data = _gmail_credential_data(payload)
+    if cred_id is not None:
+        try:
+            return await client.update_credential(cred_id, name, "gmailOAuth2", data)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                raise
+            logger.warning(f"Gmail credential {cred_id} no longer exists in n8n, creating a new one")
+    return await client.create_credential(name, "gmailOAuth2", data)
+
+async def create_workflow(name: str, wf_json: dict, shard: str = None) -> int:
+    return await get_async_client(shard).create_workflow(name, wf_json)
+
+async def create_workflow_body(body: bytes, shard: str = None) -> int:
+    return await get_async_client(shard).create_workflow_body(body)
+
+async def activate_workflow(wid: int, shard: str = None) -> None:
+    await get_async_client(shard).activate_workflow(wid)
+
+async def deactivate_workflow(wid, shard: str = None) -> None:
+    await get_async_client(shard).deactivate_workflow(wid)
+
+async def delete_workflow(wid, shard: str = None) -> None:
+    await get_async_client(shard).delete_workflow(wid)
@@ -1,126 +1,96 @@
-import os
+# n8n/n8n_client.py
+# Threaded n8n client sharing one keep-alive requests pool. The app talks to
+# n8n through n8n_async_client.py; this client only backs the pooled-vs-fresh
+# connection comparison in benchmarks/bench_n8n_pool.py.
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from .common import N8N_POOL_SIZE, N8N_CONNECT_TIMEOUT, N8N_READ_TIMEOUT, _headers, _extract_id
 
-N8N_BASE = os.environ["N8N_BASE_URL"].rstrip("/")
-N8N_KEY = os.environ["N8N_API_KEY"]
+logger = logging.getLogger(__name__)
 
-def _headers():
-    return {
-        "X-N8N-API-KEY": N8N_KEY,
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
 
 def _raise_for_status(resp: requests.Response):
     try:
         resp.raise_for_status()
     except requests.HTTPError as e:
-        raise requests.HTTPError(f"{e} :: {resp.text}") from e
-
-def upsert_gmail_credential(name: str, payload: dict) -> dict:
-    """Create a new gmailOAuth2 credential and return its ID and name."""
-    import time
-    unique_name = f"{name}-{int(time.time())}"
-    
-    # Updated payload to match current n8n schema requirements
-    credential_data = {
-        "clientId": payload["clientId"],
-        "clientSecret": payload["clientSecret"],
-        "oauthTokenData": payload["oauthTokenData"],
-        # Add required schema properties
-        "sendAdditionalBodyProperties": False,
-        "additionalBodyProperties": {}
-    }
-    
-    r = requests.post(
-        f"{N8N_BASE}/api/v1/credentials",
-        json={
-            "name": unique_name,
-            "type": "gmailOAuth2",
-            "data": credential_data,
-        },
-        headers=_headers(),
-        timeout=20,
-    )
-    _raise_for_status(r)
-    j = r.json()
-    
-    return {
-        "id": j.get("id") if isinstance(j, dict) else j,
-        "name": unique_name
-    }
-
-def upsert_openai_credential(name: str, api_key: str) -> dict:
-    """Create a new openAiApi credential and return its ID and name."""
-    import time
-    unique_name = f"{name}-{int(time.time())}"
-    
-    r = requests.post(
-        f"{N8N_BASE}/api/v1/credentials",
-        json={
-            "name": unique_name,
-            "type": "openAiApi",
-            "data": {
-                "apiKey": api_key
-            },
-        },
-        headers=_headers(),
-        timeout=20,
-    )
-    _raise_for_status(r)
-    j = r.json()
-    
-    return {
-        "id": j.get("id") if isinstance(j, dict) else j,
-        "name": unique_name
-    }
-
-def upsert_gemini_credential(name: str, api_key: str) -> dict:
-    """Create a new Google Gemini credential and return its ID and name."""
-    import time
-    unique_name = f"{name}-{int(time.time())}"
-    
-    r = requests.post(
-        f"{N8N_BASE}/api/v1/credentials",
-        json={
-            "name": unique_name,
-            "type": "googlePalmApi",  # Correct credential type for Google Gemini
-            "data": {
-                "host": "https://generativelanguage.googleapis.com",
-                "apiKey": api_key
+        raise requests.HTTPError(f"{e} :: {resp.text}", response=resp) from e
+
+
+class N8NClient:
+    """n8n REST client sharing one keep-alive connection pool across threads."""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        pool_size: int = N8N_POOL_SIZE,
+        connect_timeout: float = N8N_CONNECT_TIMEOUT,
+        read_timeout: float = N8N_READ_TIMEOUT,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        self.session.headers.update(_headers(api_key))
+        # pool_block keeps the pool bounded: callers wait for a free connection
+        # instead of opening (and then discarding) extra sockets under bursts.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        r = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        _raise_for_status(r)
+        return r
+
+    def create_credential(self, name: str, cred_type: str, data: dict) -> dict:
+        r = self.request("POST", "/api/v1/credentials", json={"name": name, "type": cred_type, "data": data})
+        return {"id": _extract_id(r.json()), "name": name}
+
+    def create_workflow(self, name: str, wf_json: dict):
+        r = self.request(
+            "POST",
+            "/api/v1/workflows",
+            json={
+                "name": name,
+                "nodes": wf_json["nodes"],
+                "connections": wf_json["connections"],
+                "settings": {},
             },
-        },
-        headers=_headers(),
-        timeout=20,
-    )
-    _raise_for_status(r)
-    j = r.json()
-    
-    return {
-        "id": j.get("id") if isinstance(j, dict) else j,
-        "name": unique_name
-    }
-
-def create_workflow(name: str, wf_json: dict) -> int:
-    r = requests.post(
-        f"{N8N_BASE}/api/v1/workflows",
-        json={
-            "name": name,
-            "nodes": wf_json["nodes"],
-            "connections": wf_json["connections"],
-            "settings": {},
-        },
-        headers=_headers(),
-        timeout=20,
-    )
-    _raise_for_status(r)
-    j = r.json()
-    return j.get("id") if isinstance(j, dict) else j
-
-def activate_workflow(wid: int) -> None:
-    r = requests.post(
-        f"{N8N_BASE}/api/v1/workflows/{wid}/activate",
-        headers=_headers(),
-        timeout=20,
-    )
-    _raise_for_status(r)
\ No newline at end of file
+        )
+        return _extract_id(r.json())
+
+    def activate_workflow(self, wid) -> None:
+        self.request("POST", f"/api/v1/workflows/{wid}/activate")
+
+    def warm_up(self, connections: int = None) -> int:
+        """Open up to `connections` pooled sockets ahead of the first request.
+
+        Returns the number of connections that were established. Failures are
+        logged and ignored.
+        """
+        connections = min(connections or self.pool_size, self.pool_size)
+
+        def _ping(_):
+            try:
+                # Any response (even 404) means the TCP/TLS handshake is done and
+                # the socket goes back into the pool.
+                self.session.get(f"{self.base_url}/healthz", timeout=self.timeout)
+                return True
+            except requests.RequestException as e:
+                logger.warning(f"n8n warm-up request failed: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=connections) as pool:
+            warmed = sum(pool.map(_ping, range(connections)))
+        logger.info(f"n8n warm-up opened {warmed}/{connections} connections to {self.base_url}")
+        return warmed
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,134 @@
+# n8n/sharding.py
+# Tenants are spread over a pool of n8n instances ("shards"), since one n8n
+# process only holds so many active polling workflows. Placement walks a
+# consistent-hash ring keyed by user id, with virtual nodes in proportion to
+# each shard's capacity, and takes the first shard that is not draining and
+# still has room. Adding a shard therefore only claims the users whose ring
+# position it takes over (see tools/rebalance_shards.py).
+#
+# N8N_SHARDS is a JSON list, e.g.
+#   [{"name": "default", "url": "http://n8n-a:5678", "capacity": 5000},
+#    {"name": "b", "url": "http://n8n-b:5678", "apiKey": "...", "capacity": 8000}]
+# apiKey defaults to N8N_API_KEY; "draining": true stops new placements.
+# Without N8N_SHARDS there is a single "default" shard at N8N_BASE_URL.
+# Rows created before sharding are on "default", so keep that name for the
+# original instance.
+import os
+import json
+import bisect
+import hashlib
+import logging
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD = "default"
+# Capacity of the implicit single shard, in active workflows
+N8N_DEFAULT_CAPACITY = int(os.environ.get("N8N_DEFAULT_CAPACITY", "5000"))
+# Ring points per N8N_DEFAULT_CAPACITY of shard capacity. The scale is fixed,
+# not relative to the other shards, so adding a shard leaves existing points put.
+N8N_RING_VNODES = int(os.environ.get("N8N_RING_VNODES", "128"))
+
+
+@dataclass(frozen=True)
+class Shard:
+    name: str
+    base_url: str
+    api_key: str
+    # Active workflows the instance is sized for
+    capacity: int
+    draining: bool = False
+
+
+def parse_shards(spec: str, default_url: str, default_key: str) -> dict:
+    """Shards by name from an N8N_SHARDS value (format at the top of this module)."""
+    if not spec:
+        return {DEFAULT_SHARD: Shard(DEFAULT_SHARD, default_url.rstrip("/"), default_key, N8N_DEFAULT_CAPACITY)}
+    shards = {}
+    for entry in json.loads(spec):
+        name = entry["name"]
+        if name in shards:
+            raise ValueError(f"Duplicate n8n shard name {name!r}")
+        capacity = int(entry.get("capacity", N8N_DEFAULT_CAPACITY))
+        if capacity <= 0:
+            raise ValueError(f"n8n shard {name!r} needs a positive capacity")
+        shards[name] = Shard(
+            name=name,
+            base_url=entry["url"].rstrip("/"),
+            api_key=entry.get("apiKey") or default_key,
+            capacity=capacity,
+            draining=bool(entry.get("draining", False)),
+        )
+    if not shards:
+        raise ValueError("N8N_SHARDS is empty")
+    if DEFAULT_SHARD not in shards:
+        logger.warning(f"N8N_SHARDS has no {DEFAULT_SHARD!r} shard; rows recorded before sharding cannot be routed")
+    return shards
+
+
+def _point(key: str) -> int:
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent-hash ring with capacity-weighted virtual nodes."""
+
+    def __init__(self, shards: dict, vnodes: int = N8N_RING_VNODES, unit: int = N8N_DEFAULT_CAPACITY):
+        points = []
+        for shard in shards.values():
+            for i in range(max(1, round(vnodes * shard.capacity / unit))):
+                points.append((_point(f"{shard.name}#{i}"), shard.name))
+        points.sort()
+        self._keys = [p for p, _ in points]
+        self._names = [n for _, n in points]
+        self._distinct = len(shards)
+
+    def walk(self, key: str):
+        """Yield each shard name once, in ring order starting at `key`."""
+        start = bisect.bisect(self._keys, _point(key))
+        seen = set()
+        for i in range(len(self._keys)):
+            name = self._names[(start + i) % len(self._keys)]
+            if name not in seen:
+                seen.add(name)
+                yield name
+                if len(seen) == self._distinct:
+                    return
+
+
+def pick_shard(user_id: str, loads: dict, shards: dict = None, ring: HashRing = None) -> str:
+    """First shard on the user's ring walk that is not draining and below capacity.
+
+    `loads` maps shard name to active workflows. When every shard is full the
+    least utilised one is used, so installs keep working while capacity is added.
+    """
+    shards = shards or SHARDS
+    ring = ring or RING
+    open_shards = []
+    for name in ring.walk(user_id):
+        shard = shards[name]
+        if shard.draining:
+            continue
+        if loads.get(name, 0) < shard.capacity:
+            return name
+        open_shards.append(shard)
+    if not open_shards:
+        raise RuntimeError("No n8n shard accepts new tenants (all draining)")
+    shard = min(open_shards, key=lambda s: loads.get(s.name, 0) / s.capacity)
+    logger.warning(f"All n8n shards at capacity, placing {user_id} on least utilised shard {shard.name}")
+    return shard.name
+
+
+def get_shard(name: str = None) -> Shard:
+    try:
+        return SHARDS[name or DEFAULT_SHARD]
+    except KeyError:
+        raise KeyError(f"Unknown n8n shard {name!r}") from None
+
+
+SHARDS = parse_shards(
+    os.environ.get("N8N_SHARDS", ""),
+    os.environ["N8N_BASE_URL"],
+    os.environ["N8N_API_KEY"],
+)
+RING = HashRing(SHARDS)
@@ -0,0 +1,272 @@
+# observability/metrics.py
+# Minimal Prometheus-style metrics (text exposition format 0.0.4).
+#
+# Recording is lock-free: every metric child keeps one value array per thread
+# and a thread only ever writes its own array, so the hot path is a
+# thread-local lookup plus a couple of float additions. The lock is taken only
+# when a thread records into a child for the first time and when /metrics
+# sums the shards.
+import time
+import asyncio
+import threading
+from bisect import bisect_left
+
+# Seconds; spans fast Supabase selects up to slow n8n activations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Shards:
+    """Per-thread value arrays that are summed on read."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def mine(self) -> list:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = [0.0] * self.size
+            with self._lock:
+                self._all.append(values)
+            self._local.values = values
+            return values
+
+    def total(self) -> list:
+        with self._lock:
+            shards = list(self._all)
+        out = [0.0] * self.size
+        for values in shards:
+            for i, v in enumerate(values):
+                out[i] += v
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric) -> None:
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Duplicate metric {metric.name}")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(v: float) -> str:
+    return repr(int(v)) if v == int(v) else repr(v)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=(), registry: Registry = REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _items(self):
+        with self._lock:
+            return list(self._children.items())
+
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shards.mine()[0] += amount
+
+    def value(self) -> float:
+        return self._shards.total()[0]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def samples(self):
+        return [f"{self.name}{_labels(self.labelnames, lv)} {_fmt(c.value())}" for lv, c in self._items()]
+
+
+class Gauge(_Metric):
+    """Up/down gauge. Per-thread deltas are summed, so inc/dec are lock-free too."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().inc(-amount)
+
+    def samples(self):
+        return [f"{self.name}{_labels(self.labelnames, lv)} {_fmt(c.value())}" for lv, c in self._items()]
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # one slot per bucket plus +Inf, then sum and count
+        self._shards = _Shards(len(buckets) + 3)
+
+    def observe(self, value: float) -> None:
+        values = self._shards.mine()
+        values[bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS, registry: Registry = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def samples(self):
+        out = []
+        for lv, child in self._items():
+            totals = child._shards.total()
+            cumulative = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), totals):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, lv, le)} {_fmt(cumulative)}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, lv)} {_fmt(totals[-2])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, lv)} {_fmt(totals[-1])}")
+        return out
+
+
+# ---- application metrics ---------------------------------------------------
+
+PROVISION_STAGE_SECONDS = Histogram(
+    "provision_stage_seconds", "Latency of provisioning stages (Supabase, n8n, Google)", ["stage"]
+)
+PROVISION_STAGE_ERRORS = Counter(
+    "provision_stage_errors_total", "Provisioning stage calls that raised", ["stage"]
+)
+INSTALLS_IN_FLIGHT = Gauge("installs_in_flight", "Workflow installs currently being provisioned")
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"]
+)
+INTEGRATION_CACHE_LOOKUPS = Counter(
+    "integration_cache_lookups_total", "user_integrations cache lookups by result", ["result"]
+)
+INTEGRATION_CACHE_EVICTIONS = Counter(
+    "integration_cache_evictions_total", "user_integrations cache entries evicted to stay within size"
+)
+GOOGLE_TOKEN_REFRESHES = Counter(
+    "google_token_refreshes_total", "Proactive Google token refreshes by outcome", ["outcome"]
+)
+WORKFLOW_DRIFT_CORRECTIONS = Counter(
+    "workflow_drift_corrections_total", "workflows rows the reconciler moved to a new status", ["status"]
+)
+N8N_ORPHAN_DELETES = Counter(
+    "n8n_orphan_deletes_total", "n8n resources deleted by install rollback, garbage collection or rebalancing", ["kind", "reason"]
+)
+FLEET_WORKFLOW_ACTIONS = Counter(
+    "fleet_workflow_actions_total", "Workflows paused or resumed by fleet operations", ["action", "outcome"]
+)
+EXECUTIONS_INGESTED = Counter(
+    "n8n_executions_ingested_total", "Finished n8n executions folded into execution stats", ["outcome"]
+)
+
+
+class time_stage:
+    """`with time_stage("create_workflow"): ...` records latency, and an error if the block raises."""
+
+    __slots__ = ("_child", "_stage", "_t0")
+
+    def __init__(self, stage: str):
+        self._stage = stage
+        self._child = PROVISION_STAGE_SECONDS.labels(stage)
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(time.perf_counter() - self._t0)
+        if exc_type is not None and not issubclass(exc_type, asyncio.CancelledError):
+            PROVISION_STAGE_ERRORS.labels(self._stage).inc()
+        return False
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP_REQUEST_SECONDS by route template (not raw path)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], path, str(status[0])).observe(time.perf_counter() - t0)
@@ -0,0 +1,92 @@
+# observability/server_timing.py
+# Request-scoped span recorder feeding the Server-Timing response header.
+#
+# Outbound calls (n8n, Supabase, Google) wrap themselves in `span(name)`. The
+# middleware installs a per-request list in a context variable and renders the
+# collected spans into the header. With SERVER_TIMING_ENABLED unset, or
+# outside a request (e.g. in job workers), `span` returns a shared no-op
+# context manager, so instrumented code pays one flag check.
+import os
+import time
+from contextvars import ContextVar
+
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+_spans: ContextVar = ContextVar("server_timing_spans", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("_name", "_spans", "_t0")
+
+    def __init__(self, name: str, spans: list):
+        self._name = name
+        self._spans = spans
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._spans.append((self._name, time.perf_counter() - self._t0))
+        return False
+
+
+def span(name: str):
+    """Time the enclosed block as `name` if the current request records spans."""
+    if not SERVER_TIMING_ENABLED:
+        return _NOOP
+    spans = _spans.get()
+    if spans is None:
+        return _NOOP
+    return _Span(name, spans)
+
+
+def render(spans: list, total: float) -> str:
+    # Repeated names get a numeric suffix so every call stays visible
+    seen = {}
+    parts = []
+    for name, seconds in spans:
+        seen[name] = seen.get(name, 0) + 1
+        label = name if seen[name] == 1 else f"{name}-{seen[name]}"
+        parts.append(f"{label};dur={seconds * 1000:.1f}")
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware adding a Server-Timing header built from the request's spans."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not SERVER_TIMING_ENABLED or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        spans = []
+        token = _spans.set(spans)
+        t0 = time.perf_counter()
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                header = render(list(spans), time.perf_counter() - t0)
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _spans.reset(token)
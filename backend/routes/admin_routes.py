@@ -0,0 +1,167 @@
+# app/routes/admin_routes.py
+# Operator endpoints, authenticated with the X-Admin-Key header.
+import json
+import logging
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from database.deps import require_admin
+from database.integration_cache import integration_cache
+from jobs.fleet_jobs import enqueue_operation
+from workflows.bulk import BULK_MAX_CONCURRENCY, BULK_MAX_ITEMS, bulk_provision
+from workflows.catalog import templates
+from workflows.fleet import (
+    CANCELLED,
+    FAILED,
+    PAUSE,
+    QUEUED,
+    RESUME,
+    RUNNING,
+    create_operation,
+    get_operation,
+    update_operation,
+    validate_selector,
+)
+from workflows.reconciler import reconciler
+from workflows.garbage_collector import orphan_collector
+from workflows.execution_stats import execution_ingester
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+class BulkInstallItem(BaseModel):
+    userId: str
+    templateId: str
+
+
+class BulkInstallBody(BaseModel):
+    items: List[BulkInstallItem]
+    concurrency: int = BULK_MAX_CONCURRENCY
+
+
+class FleetBody(BaseModel):
+    templateIds: List[str] = []
+    shards: List[str] = []
+    tiers: List[str] = []
+    # Required to act on every workflow when no filter is given
+    all: bool = False
+    concurrency: int = 8
+
+
+@router.post("/workflows/bulk-install")
+async def bulk_install(body: BulkInstallBody):
+    """Provision many (userId, templateId) pairs; streams one NDJSON line per item, then a summary."""
+    if not body.items:
+        raise HTTPException(400, "No items")
+    if len(body.items) > BULK_MAX_ITEMS:
+        raise HTTPException(413, f"At most {BULK_MAX_ITEMS} items per call")
+    logger.info(f"Bulk install of {len(body.items)} items, concurrency={body.concurrency}")
+
+    pairs = [(item.userId, item.templateId) for item in body.items]
+
+    async def lines():
+        async for result in bulk_provision(pairs, body.concurrency):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/integrations/cache")
+async def integration_cache_stats():
+    """Hit/miss/eviction counts, size and hit ratio of this process's user_integrations cache."""
+    return integration_cache.stats()
+
+
+@router.post("/workflows/reconcile")
+async def reconcile(full: bool = False):
+    """Run a reconcile pass now (a full sweep with ?full=true); returns per-shard counts."""
+    return await reconciler.tick(full=full or None)
+
+
+@router.post("/n8n/collect-orphans")
+async def collect_orphans(dry_run: bool = False):
+    """Delete unowned n8n workflows and credentials now (?dry_run=true only counts them)."""
+    return await orphan_collector.collect(dry_run=dry_run)
+
+
+@router.post("/executions/ingest")
+async def ingest_executions():
+    """Fold new n8n executions into the execution stats now; returns per-shard counts."""
+    return await execution_ingester.tick()
+
+
+def _operation_view(op: dict) -> dict:
+    return {
+        "operationId": op["id"],
+        "action": op["action"],
+        "selector": op["selector"],
+        "status": op["status"],
+        "cursor": op.get("cursor"),
+        "processed": op.get("processed") or 0,
+        "changed": op.get("changed") or 0,
+        "missing": op.get("missing") or 0,
+        "failed": op.get("failed") or 0,
+        "error": op.get("error"),
+        "jobId": op.get("job_id"),
+        "createdAt": op.get("created_at"),
+        "updatedAt": op.get("updated_at"),
+    }
+
+
+async def _start_fleet_operation(action: str, body: FleetBody) -> dict:
+    selector = validate_selector(body.model_dump())
+    unknown = [t for t in selector["templateIds"] if t not in templates.ids(include_disabled=True)]
+    if unknown:
+        raise HTTPException(400, f"Unknown template IDs: {unknown}")
+    op = await create_operation(action, selector, body.concurrency)
+    job = await enqueue_operation(op)
+    logger.info(f"Fleet {action} {op['id']} queued as job {job['id']}, selector={selector}")
+    return _operation_view({**op, "job_id": job["id"]})
+
+
+async def _operation_or_404(op_id: str) -> dict:
+    op = await get_operation(op_id)
+    if op is None:
+        raise HTTPException(404, "Fleet operation not found")
+    return op
+
+
+@router.post("/fleet/pause", status_code=202)
+async def fleet_pause(body: FleetBody):
+    """Deactivate every matching active workflow in n8n and mark it paused."""
+    return await _start_fleet_operation(PAUSE, body)
+
+
+@router.post("/fleet/resume", status_code=202)
+async def fleet_resume(body: FleetBody):
+    """Re-activate every matching paused workflow."""
+    return await _start_fleet_operation(RESUME, body)
+
+
+@router.get("/fleet/operations/{op_id}")
+async def fleet_operation(op_id: str):
+    return _operation_view(await _operation_or_404(op_id))
+
+
+@router.post("/fleet/operations/{op_id}/cancel")
+async def fleet_cancel(op_id: str):
+    """Stop an operation at its next checkpoint; workflows already handled keep their state."""
+    await _operation_or_404(op_id)
+    op = await update_operation(op_id, {"status": CANCELLED}, expect_status=(QUEUED, RUNNING, FAILED))
+    if op is None:
+        raise HTTPException(409, "Fleet operation already finished")
+    return _operation_view(op)
+
+
+@router.post("/fleet/operations/{op_id}/continue", status_code=202)
+async def fleet_continue(op_id: str):
+    """Continue a failed or cancelled operation from its last checkpoint."""
+    await _operation_or_404(op_id)
+    op = await update_operation(op_id, {"status": QUEUED}, expect_status=(FAILED, CANCELLED))
+    if op is None:
+        raise HTTPException(409, "Only failed or cancelled fleet operations can be continued")
+    job = await enqueue_operation(op)
+    return _operation_view({**op, "job_id": job["id"]})
@@ -0,0 +1,29 @@
+# app/routes/jobs_routes.py
+# Status of background jobs (e.g. template installs) for the calling user.
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+
+from database.deps import get_user_id
+from jobs.queue import job_store
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, user_id: str = Depends(get_user_id)):
+    job = await asyncio.to_thread(job_store.get, job_id)
+    # Other users' jobs are reported as missing rather than forbidden
+    if not job or job["user_id"] != user_id:
+        raise HTTPException(404, "Job not found")
+    return {
+        "jobId": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "maxAttempts": job["max_attempts"],
+        "templateId": job["payload"].get("templateId"),
+        "result": job["result"],
+        "error": job["error"],
+        "createdAt": job["created_at"],
+        "updatedAt": job["updated_at"],
+    }
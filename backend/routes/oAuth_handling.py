@@ -4,50 +4,65 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import RedirectResponse
 import time
 
-from database.db import sb
-from database.sb_utils import get_data, get_error
-from thirdPartyIntegrations.google_oauth import  exchange_code_for_tokens
-
-
-from workflows.gmail_ai_labelling.provision_n8n import provision_in_n8n as provision_in_n8n_labelling
-from workflows.gmail_summary.provision_n8n_summary import provision_in_n8n as provision_in_n8n_summary
-from workflows.gmail_ai_responder.provision_n8n_responder import provision_in_n8n as provision_in_n8n_responder
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+from database.integration_cache import integration_cache
+from thirdPartyIntegrations.google_oauth import exchange_code_for_tokens_async
+from workflows.catalog import templates
+from workflows.template_registry import UnknownTemplate
+from jobs.provision_jobs import enqueue_install
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
 
-def _upsert_user_integration_tokens(user_id: str, tokens: dict) -> None:
+async def _upsert_user_integration_tokens(user_id: str, tokens: dict) -> None:
     access_token = tokens.get("access_token")
     refresh_token = tokens.get("refresh_token", "")
     scope = tokens.get("scope", "")
     expires_in = int(tokens.get("expires_in", 3600))
     expiry_ts = int(time.time()) + expires_in
 
-    res = sb.table("user_integrations").upsert(
-        {
-            "user_id": user_id,
-            "provider": "google",
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "scope": scope,
-            "expiry": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(expiry_ts)),
-        },
-        on_conflict="user_id,provider",
-    ).execute()
+    sb = await get_async_sb()
+    res = await execute(
+        sb.table("user_integrations").upsert(
+            {
+                "user_id": user_id,
+                "provider": "google",
+                "access_token": access_token,
+                "refresh_token": refresh_token,
+                "scope": scope,
+                "expiry": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(expiry_ts)),
+                # Reconnecting re-enables proactive refresh (workflows/token_refresh.py)
+                "refresh_error": None,
+            },
+            on_conflict="user_id,provider",
+        ),
+        "supabase-upsert",
+    )
     err = get_error(res)
     if err:
+        integration_cache.invalidate(user_id, "google")
         raise HTTPException(500, f"Supabase upsert error: {err}")
 
+    # Write through so the install job that follows skips the select
+    rows = get_data(res) or []
+    if isinstance(rows, list) and rows:
+        integration_cache.put(user_id, "google", rows[0])
+    else:
+        integration_cache.invalidate(user_id, "google")
+
 
 
 @router.get("/oauth/google/callback")
-def google_callback(code: str, state: str):
+async def google_callback(code: str, state: str):
     logger.info(f"OAuth callback state={state}")
     try:
+        sb = await get_async_sb()
+
         # 1) Validate state & get user_id and template_id
-        s_res = sb.table("oauth_states").select("*").eq("state", state).maybe_single().execute()
+        s_res = await execute(sb.table("oauth_states").select("*").eq("state", state).maybe_single(), "supabase-select")
         err = get_error(s_res)
         if err:
             raise HTTPException(500, f"Supabase select error: {err}")
@@ -59,36 +74,22 @@ def google_callback(code: str, state: str):
         template_id = s["template_id"]
         
         # 2) Exchange code for tokens and upsert
-        tokens = exchange_code_for_tokens(code)
-        _upsert_user_integration_tokens(user_id, tokens)
+        tokens = await exchange_code_for_tokens_async(code)
+        await _upsert_user_integration_tokens(user_id, tokens)
         
         # 3) Delete used state
-        del_res = sb.table("oauth_states").delete().eq("state", state).execute()
+        await execute(sb.table("oauth_states").delete().eq("state", state), "supabase-delete")
         
-        # 4) Read back most recent tokens
-        r2 = sb.table("user_integrations").select("*").eq("user_id", user_id).eq("provider", "google").order("created_at", desc=True).limit(1).execute()
-        rows = get_data(r2) or []
-        row = rows[0] if isinstance(rows, list) and rows else rows
-        
-        # 5) Determine which template to use and provision
-        if template_id == "gmail-ai-responder":
-            from routes.gmail_responder_routes import GMAIL_AI_RESPONDER_TEMPLATE as template
-        elif template_id == "gmail-summary":
-            from routes.gmail_summary_routes import GMAIL_SUMMARY_TEMPLATE as template
-        else:
+        # 4) Queue the install of the template the flow was started for
+        try:
+            templates.get(template_id)
+        except UnknownTemplate:
             raise HTTPException(400, f"Unknown template ID: {template_id}")
-            
-        # Import the correct provision function
-        if template_id == "gmail-ai-responder":
-            result = provision_in_n8n_responder(user_id=user_id, template_id=template_id, integ_row=row, tpl=template)
-        elif template_id == "gmail-summary":
-            result = provision_in_n8n_summary(user_id=user_id, template_id=template_id, integ_row=row, tpl=template)
-        elif template_id == "gmail-ai-labelling":
-            result = provision_in_n8n_labelling(user_id=user_id, template_id=template_id, integ_row=row, tpl=template)
-            
-        # 6) Redirect back to frontend
+        job = await enqueue_install(user_id, template_id)
+
+        # 5) Redirect back to frontend, which polls the job
         frontend = os.environ.get("FRONTEND_ORIGIN", "http://localhost:3000")
-        url = f"{frontend}/dashboard?installed={template_id}&workflowId={result['workflowId']}"
+        url = f"{frontend}/dashboard?installing={template_id}&jobId={job['id']}"
         return RedirectResponse(url=url, status_code=302)
         
     except Exception as e:
@@ -0,0 +1,104 @@
+# app/routes/workflow_install_routes.py
+# Install endpoint for every template registered in workflows/catalog.py.
+# Installs are queued as background jobs; poll GET /jobs/{jobId} for the result.
+# Concurrent installs of the same template by the same user share one job, and
+# an Idempotency-Key header replays the stored response for retries.
+import asyncio
+import secrets
+import logging
+import traceback
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from database.deps import get_user_id
+from database.db import get_async_sb
+from database.integrations import get_google_integration
+from database.sb_utils import execute, get_error
+from thirdPartyIntegrations.google_oauth import build_auth_url
+from workflows.catalog import templates
+from workflows.template_registry import UnknownTemplate
+from jobs.provision_jobs import enqueue_install
+from jobs.queue import job_store
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+class InstallBody(BaseModel):
+    templateId: str
+
+
+@router.post("/workflows/{template_id}/install")
+async def install(
+    template_id: str,
+    user_id: str = Depends(get_user_id),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    if not idempotency_key:
+        status_code, content = await _install(template_id, user_id)
+        return JSONResponse(status_code=status_code, content=content)
+
+    if len(idempotency_key) > 255:
+        raise HTTPException(400, "Idempotency-Key must be at most 255 characters")
+
+    stored = await asyncio.to_thread(job_store.get_idempotent, user_id, idempotency_key)
+    if stored is None:
+        status_code, content = await _install(template_id, user_id)
+        # Only successful responses are stored, so failed attempts can be retried
+        stored = await asyncio.to_thread(
+            job_store.save_idempotent, user_id, idempotency_key, template_id, status_code, content
+        )
+    else:
+        logger.info(f"Replaying install response for Idempotency-Key={idempotency_key}, user={user_id}")
+
+    fingerprint, status_code, content = stored
+    if fingerprint != template_id:
+        raise HTTPException(422, "Idempotency-Key was already used for a different template")
+    return JSONResponse(status_code=status_code, content=content)
+
+
+async def _install(template_id: str, user_id: str):
+    logger.info(f"Install request. templateId={template_id}, user={user_id}")
+    try:
+        try:
+            templates.get(template_id)
+        except UnknownTemplate:
+            raise HTTPException(404, f"Unknown template ID: {template_id}")
+
+        # Check for existing Google tokens
+        tokens_row = await get_google_integration(user_id)
+
+        if not tokens_row:
+            state = secrets.token_urlsafe(24)
+            sb = await get_async_sb()
+            ins = await execute(
+                sb.table("oauth_states").insert({"state": state, "user_id": user_id, "template_id": template_id}),
+                "supabase-insert",
+            )
+            if get_error(ins):
+                raise HTTPException(500, f"Supabase insert error: {get_error(ins)}")
+
+            auth_url = build_auth_url(state)
+            return status.HTTP_200_OK, {"needsAuth": True, "authUrl": auth_url, "state": state, "templateId": template_id}
+
+        # Tokens exist, hand off to the provisioning workers
+        job = await enqueue_install(user_id, template_id)
+        return status.HTTP_202_ACCEPTED, {"jobId": job["id"], "status": job["status"], "templateId": template_id}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Install failed: {e}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, f"Install failed: {e}")
+
+
+@router.post("/workflows/install")
+async def install_by_body(
+    body: InstallBody,
+    user_id: str = Depends(get_user_id),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    return await install(body.templateId, user_id, idempotency_key)
@@ -0,0 +1,87 @@
+# app/routes/workflows_routes.py
+# The calling user's workflows for the dashboard: newest first, keyset
+# paginated on id, merged with cached live n8n state (workflows/live_status.py).
+# Responses carry a weak ETag over their content, so a dashboard revalidating
+# with If-None-Match gets an empty 304 when nothing changed. Execution stats
+# come from the hourly rollups in workflows/execution_stats.py.
+import json
+import hashlib
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, Response
+
+from database.deps import get_user_id
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+from workflows.live_status import live_status
+from workflows.execution_stats import EXECUTION_STATS_MAX_HOURS, user_execution_stats
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+WORKFLOWS_PAGE_DEFAULT = 100
+WORKFLOWS_PAGE_MAX = 500
+LIST_COLUMNS = "id,template_id,name,description,status,n8n_workflow_id,n8n_shard,created_at,updated_at"
+
+
+def _etag(body: dict) -> str:
+    raw = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return f'W/"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+
+def _not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # Weak comparison: W/"x" and "x" name the same representation
+    return "*" in tags or etag.removeprefix("W/") in (t.removeprefix("W/") for t in tags)
+
+
+@router.get("/workflows")
+async def list_workflows(
+    limit: int = Query(WORKFLOWS_PAGE_DEFAULT, ge=1, le=WORKFLOWS_PAGE_MAX),
+    cursor: Optional[str] = None,
+    user_id: str = Depends(get_user_id),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+):
+    """One page of the user's workflows; pass the returned nextCursor for the next one."""
+    sb = await get_async_sb()
+    q = sb.table("workflows").select(LIST_COLUMNS).eq("user_id", user_id)
+    if cursor:
+        if not cursor.isdigit():
+            raise HTTPException(400, "Invalid cursor")
+        q = q.lt("id", int(cursor))
+    # One extra row tells whether another page exists
+    res = await execute(q.order("id", desc=True).limit(limit + 1), "supabase-select")
+    err = get_error(res)
+    if err:
+        raise HTTPException(500, f"Supabase select error: {err}")
+    rows = get_data(res) or []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    live = await live_status.lookup([row for row in rows if row["status"] != "deleted"])
+    items = []
+    for row in rows:
+        shard = row.pop("n8n_shard")
+        items.append({**row, "n8n": live.get((shard, str(row["n8n_workflow_id"])))})
+    body = {"items": items, "nextCursor": str(rows[-1]["id"]) if has_more else None}
+
+    headers = {"ETag": _etag(body), "Cache-Control": "private, no-cache"}
+    if _not_modified(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(body, headers=headers)
+
+
+@router.get("/workflows/stats")
+async def workflow_stats(
+    hours: int = Query(24, ge=1, le=EXECUTION_STATS_MAX_HOURS),
+    user_id: str = Depends(get_user_id),
+):
+    """Execution counts, success rate and duration percentiles per workflow over the last `hours`."""
+    try:
+        workflows = await user_execution_stats(user_id, hours)
+    except RuntimeError as e:
+        raise HTTPException(500, str(e))
+    return {"hours": hours, "workflows": workflows}
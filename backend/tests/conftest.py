@@ -0,0 +1,31 @@
+# tests/conftest.py
+# Modules read their required settings at import; give them inert values so
+# unit tests import without a .env. Nothing here is ever contacted.
+import os
+
+import pytest
+
+for name, value in {
+    "SUPABASE_URL": "http://127.0.0.1:9",
+    "SUPABASE_SERVICE_ROLE": "test-service-role",
+    "SUPABASE_JWT_SECRET": "test-jwt-secret-0123456789abcdef",
+    "N8N_BASE_URL": "http://127.0.0.1:9",
+    "N8N_API_KEY": "test",
+    "OPENAI_API_KEY": "test",
+    "GEMINI_API_KEY": "test",
+    "GOOGLE_CLIENT_ID": "test",
+    "GOOGLE_CLIENT_SECRET": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def fake_sb(monkeypatch):
+    """An in-memory Supabase (benchmarks/fake_supabase.py) behind database.db.get_async_sb."""
+    import database.db as db
+    from benchmarks.fake_supabase import FakeSupabase
+
+    with FakeSupabase() as fake:
+        monkeypatch.setattr(db, "SUPABASE_URL", fake.url)
+        monkeypatch.setattr(db, "_async_sb", None)
+        yield fake
@@ -0,0 +1,103 @@
+# tests/test_admission.py
+import asyncio
+import time
+
+import pytest
+
+from n8n.admission import (
+    AdmissionTimeout,
+    AIMDLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    may_retry_status,
+    retry_after_seconds,
+)
+
+
+def test_limiter_grows_additively_and_cuts_once_per_congestion_event():
+    async def main():
+        lim = AIMDLimiter(initial=4, minimum=1, maximum=8, backoff=0.5, timeout=1)
+        started = await lim.acquire()
+        await lim.release(started, overloaded=False)
+        assert lim.limit == pytest.approx(4.25)
+
+        # Two calls in flight when overload hits: only the first cut applies
+        a, b = await lim.acquire(), await lim.acquire()
+        await lim.release(a, overloaded=True)
+        assert lim.limit == pytest.approx(2.125)
+        await lim.release(b, overloaded=True)
+        assert lim.limit == pytest.approx(2.125)
+        assert lim.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_limiter_respects_bounds_and_times_out():
+    async def main():
+        lim = AIMDLimiter(initial=1, minimum=1, maximum=1, backoff=0.5, timeout=0.05)
+        held = await lim.acquire()
+        with pytest.raises(AdmissionTimeout):
+            await lim.acquire()
+        await lim.release(held, overloaded=True)
+        assert lim.limit == 1
+        await lim.release(await lim.acquire(), overloaded=False)
+        assert lim.limit == 1
+
+    asyncio.run(main())
+
+
+def test_retry_budget_is_bounded_by_request_rate():
+    budget = RetryBudget(ratio=0.5, min_per_sec=0.0, max_tokens=2)
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+    budget.record_request()
+    assert not budget.try_spend()
+    budget.record_request()
+    assert budget.try_spend()
+
+
+def test_breaker_opens_after_threshold_and_probes_once_after_cooldown():
+    breaker = CircuitBreaker("http://n8n", failures=2, cooldown=0.05)
+    breaker.check()
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    time.sleep(0.06)
+    breaker.check()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.check()
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker("http://n8n", failures=1, cooldown=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_only_idempotent_calls_retry_ambiguous_statuses():
+    assert may_retry_status(502, "GET")
+    assert not may_retry_status(502, "POST")
+    assert may_retry_status(502, "POST", idempotent=True)
+    assert may_retry_status(429, "POST")
+    assert not may_retry_status(400, "GET")
+
+
+def test_retry_after_parsing():
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("soon") is None
+    assert 0 <= retry_after_seconds(time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 5))) <= 6
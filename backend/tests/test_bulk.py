@@ -0,0 +1,82 @@
+# tests/test_bulk.py
+import asyncio
+
+from workflows import bulk
+
+
+def _provisioned(user_id: str, template_id: str, workflow_id: str) -> dict:
+    return {
+        "workflowId": workflow_id,
+        "templateVersion": "v1",
+        "timing": {"totalMs": 1},
+        "row": {
+            "user_id": user_id,
+            "template_id": template_id,
+            "name": template_id,
+            "n8n_workflow_id": workflow_id,
+            "n8n_shard": "a",
+            "status": "active",
+            "workflow_config": {},
+        },
+    }
+
+
+def test_failed_batch_sends_one_failed_line_per_item(fake_sb, monkeypatch):
+    rolled_back = []
+    inserts = []
+    real_insert = bulk.insert_workflow_rows
+
+    async def fake_integrations(user_ids):
+        return {user_id: {"user_id": user_id} for user_id in user_ids if user_id != "nobody"}
+
+    async def fake_provision(user_id, template_id, integ_row, providers=None, record=True):
+        return _provisioned(user_id, template_id, f"{user_id}-{template_id}")
+
+    async def flaky_insert(rows):
+        inserts.append([row["n8n_workflow_id"] for row in rows])
+        # The second batch is lost; every other batch is recorded
+        if len(inserts) == 2:
+            raise RuntimeError("Supabase insert error: timeout")
+        await real_insert(rows)
+
+    async def fake_delete(shard, workflow_ids=(), credential_ids=(), reason="rollback"):
+        rolled_back.extend(workflow_ids)
+        return len(workflow_ids), 0
+
+    monkeypatch.setattr(bulk, "BULK_RECORD_BATCH_SIZE", 2)
+    monkeypatch.setattr(bulk, "get_google_integrations", fake_integrations)
+    monkeypatch.setattr(bulk, "provision_template", fake_provision)
+    monkeypatch.setattr(bulk, "insert_workflow_rows", flaky_insert)
+    monkeypatch.setattr(bulk, "delete_n8n_resources", fake_delete)
+    fake_sb.db["workflows"] = []
+
+    pairs = [
+        (user_id, template_id)
+        for user_id in ("u1", "u2", "u3")
+        for template_id in ("gmail-summary", "gmail-ai-labelling")
+    ]
+    pairs += [("nobody", "gmail-summary"), ("u1", "gmail-summary")]
+
+    async def main():
+        return [line async for line in bulk.bulk_provision(pairs, concurrency=2)]
+
+    lines = asyncio.run(main())
+
+    items = [line for line in lines if line["type"] == "item"]
+    summary = lines[-1]
+    statuses = {(line["userId"], line["templateId"]): line["status"] for line in items}
+    assert len(items) == len(statuses) == 7
+    failed_batch = set(inserts[1])
+    assert set(rolled_back) == failed_batch
+    for (user_id, template_id), status in statuses.items():
+        if user_id == "nobody":
+            assert status == "needsAuth"
+        elif f"{user_id}-{template_id}" in failed_batch:
+            assert status == "failed"
+        else:
+            assert status == "provisioned"
+    recorded = {row["n8n_workflow_id"] for row in fake_sb.db["workflows"]}
+    assert len(recorded) == 4 and not recorded & failed_batch
+    assert summary == {
+        "type": "summary", "requested": 7, "provisioned": 4, "failed": 3, "recorded": 4, "rolledBack": 2,
+    }
@@ -0,0 +1,165 @@
+# tests/test_execution_stats.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from workflows import execution_stats
+from workflows.execution_stats import DURATION_BUCKETS_MS, ExecutionStatsIngester, Rollup, percentile
+
+
+def _buckets(**counts) -> list:
+    out = [0] * len(DURATION_BUCKETS_MS)
+    for index, n in counts.items():
+        out[int(index[1:])] = n
+    return out
+
+
+def test_percentile_of_empty_histogram_is_none():
+    assert percentile(_buckets(), 0.5, 0) is None
+
+
+def test_percentile_interpolates_within_the_bucket():
+    # 10 executions in (100, 250]: the median sits halfway through the bucket
+    assert percentile(_buckets(b2=10), 0.5, 240) == 175
+    # Never above the largest duration seen
+    assert percentile(_buckets(b2=10), 1.0, 240) == 240
+
+
+def test_percentile_open_ended_bucket_is_bounded_by_max():
+    assert percentile(_buckets(b14=1), 0.99, 4_000_000) <= 4_000_000
+
+
+def test_rollup_merge_adds_counts_and_histograms():
+    a, b = Rollup(), Rollup()
+    for ms in (40, 80, 120):
+        a.add(False, ms)
+    b.add(True, 5000)
+    b.add(True)
+
+    merged = Rollup()
+    merged.merge(a.as_row())
+    merged.merge(b.as_row())
+
+    assert merged.executions == 5
+    assert merged.failures == 2
+    assert merged.duration_sum_ms == 5240
+    assert merged.duration_max_ms == 5000
+    assert merged.buckets == [x + y for x, y in zip(a.buckets, b.buckets)]
+    summary = merged.summary()
+    assert summary["successRate"] == 0.6
+    # The execution of unknown duration is left out of the average
+    assert summary["avgMs"] == 1310
+
+
+def test_rollup_merge_accepts_a_shorter_stored_histogram():
+    merged = Rollup()
+    merged.merge({"executions": 2, "duration_buckets": [1, 1]})
+    assert merged.buckets[:3] == [1, 1, 0]
+
+
+class FakeIngester(ExecutionStatsIngester):
+    def __init__(self, pages: list, since=None):
+        super().__init__()
+        self.pages = pages
+        self.since = since
+        self.commits = []
+
+    async def _pages(self, shard, max_pages=None):
+        for page in self.pages:
+            yield page
+
+    async def _owners(self, shard, wids):
+        return {wid: (int(wid), "user-1") for wid in wids}
+
+    async def _commit(self, key, since, through, rows):
+        self.commits.append((since, through, rows))
+        if since != self.since:
+            return None
+        self.since = through
+        return len(rows)
+
+
+def _ts(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _ingest(ingester: FakeIngester, monkeypatch) -> dict:
+    async def watermark(key):
+        return ingester.since
+
+    monkeypatch.setattr(execution_stats, "get_watermark", watermark)
+    return asyncio.run(ingester.ingest_shard("default"))
+
+
+def test_crashed_execution_without_stopped_at_counts_as_failure(monkeypatch):
+    t = datetime.now(timezone.utc) - timedelta(minutes=5)
+    ingester = FakeIngester([[
+        {"id": 3, "workflowId": "1", "status": "crashed", "startedAt": _ts(t), "stoppedAt": None},
+        {"id": 2, "workflowId": "1", "status": "success", "startedAt": _ts(t), "stoppedAt": _ts(t + timedelta(seconds=1))},
+    ]])
+
+    stats = _ingest(ingester, monkeypatch)
+
+    assert stats["executions"] == 2 and stats["pending"] == 0
+    (since, through, rows), = ingester.commits
+    assert (since, through) == (None, "3")
+    assert rows[0]["executions"] == 2
+    assert rows[0]["failures"] == 1
+    assert sum(rows[0]["duration_buckets"]) == 1
+
+
+def test_pending_execution_holds_the_watermark_below_it(monkeypatch):
+    t = datetime.now(timezone.utc) - timedelta(minutes=5)
+    ingester = FakeIngester([[
+        {"id": 7, "workflowId": "1", "status": "success", "startedAt": _ts(t), "stoppedAt": _ts(t)},
+        {"id": 6, "workflowId": "1", "status": "running", "startedAt": _ts(t), "stoppedAt": None},
+        {"id": 5, "workflowId": "1", "status": "error", "startedAt": _ts(t), "stoppedAt": _ts(t)},
+    ]], since="4")
+
+    stats = _ingest(ingester, monkeypatch)
+
+    assert stats["pending"] == 1
+    (since, through, rows), = ingester.commits
+    assert (since, through) == ("4", "5")
+    assert rows[0]["executions"] == 1 and rows[0]["failures"] == 1
+
+
+def test_stale_pending_execution_without_started_at_uses_created_at(monkeypatch):
+    old = datetime.now(timezone.utc) - timedelta(seconds=execution_stats.EXECUTION_STATS_MAX_PENDING_SECONDS + 60)
+    t = datetime.now(timezone.utc) - timedelta(minutes=5)
+    ingester = FakeIngester([[
+        {"id": 9, "workflowId": "1", "status": "success", "startedAt": _ts(t), "stoppedAt": _ts(t)},
+        {"id": 8, "workflowId": "1", "status": "new", "startedAt": None, "createdAt": _ts(old)},
+    ]], since="7")
+
+    stats = _ingest(ingester, monkeypatch)
+
+    assert stats == {"executions": 1, "pending": 0, "rows": 1, "unowned": 0}
+    assert ingester.commits[0][1] == "9"
+
+
+def test_undated_pending_execution_ages_across_passes(monkeypatch):
+    pages = [[{"id": 2, "workflowId": "1", "status": "waiting", "startedAt": None}]]
+    ingester = FakeIngester(pages, since="1")
+    assert _ingest(ingester, monkeypatch)["pending"] == 1
+    assert ingester.commits == []
+
+    # A later pass finds it still waiting long after it was first seen
+    ingester._undated["default"][2] -= execution_stats.EXECUTION_STATS_MAX_PENDING_SECONDS
+    _ingest(ingester, monkeypatch)
+    assert ingester.commits[0][:2] == ("1", "2")
+
+
+def test_range_counted_by_another_pass_is_not_reported(monkeypatch):
+    t = datetime.now(timezone.utc)
+    ingester = FakeIngester([[
+        {"id": 5, "workflowId": "1", "status": "success", "startedAt": _ts(t), "stoppedAt": _ts(t)},
+    ]], since="4")
+
+    async def moved(key):
+        return "4"
+
+    ingester.since = "5"
+    monkeypatch.setattr(execution_stats, "get_watermark", moved)
+    stats = asyncio.run(ingester.ingest_shard("default"))
+
+    assert stats["executions"] == 0 and stats["rows"] == 0
@@ -0,0 +1,168 @@
+# tests/test_fleet.py
+import asyncio
+
+import httpx
+import pytest
+
+from n8n.admission import CircuitOpenError
+from n8n.sharding import DEFAULT_SHARD
+from workflows import fleet
+from workflows.fleet import FAILED, PAUSE, RESUME, SUCCEEDED, FleetBackoff, FleetRunner
+
+SELECT_ALL = {"templateIds": [], "shards": [], "tiers": []}
+
+
+class FakeN8N:
+    def __init__(self):
+        self.active = {}
+        # n8n workflow id -> exception to raise instead of handling the call
+        self.errors = {}
+        self.on_deactivate = None
+
+    async def _call(self, wid, active: bool):
+        if wid in self.errors:
+            raise self.errors[wid]
+        self.active[wid] = active
+        if not active and self.on_deactivate:
+            self.on_deactivate(wid)
+
+    async def deactivate_workflow(self, wid):
+        await self._call(wid, False)
+
+    async def activate_workflow(self, wid):
+        await self._call(wid, True)
+
+
+@pytest.fixture
+def n8n(monkeypatch):
+    client = FakeN8N()
+    monkeypatch.setattr(fleet, "get_async_client", lambda shard: client)
+    return client
+
+
+def _rows(n: int, status: str = "active") -> list:
+    return [
+        {"id": i, "user_id": "user-1", "template_id": "gmail-summary", "n8n_workflow_id": str(i),
+         "n8n_shard": DEFAULT_SHARD, "status": status}
+        for i in range(1, n + 1)
+    ]
+
+
+def _statuses(fake_sb) -> dict:
+    return {row["n8n_workflow_id"]: row["status"] for row in fake_sb.db["workflows"]}
+
+
+def _status_error(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://n8n/api/v1/workflows/1/deactivate")
+    return httpx.HTTPStatusError(str(code), request=request, response=httpx.Response(code, request=request))
+
+
+async def _run(action: str, steps, page_size: int = 2):
+    """Create an operation, then run `steps(runner, op)`; returns its result."""
+    op = await fleet.create_operation(action, SELECT_ALL, 4)
+    return await steps(FleetRunner(page_size=page_size), op)
+
+
+def test_pause_pages_through_every_row_and_syncs_status(fake_sb, n8n):
+    fake_sb.db["workflows"] = _rows(5) + [{**_rows(1, "paused")[0], "id": 6, "n8n_workflow_id": "6"}]
+
+    async def steps(runner, op):
+        return await runner.run_slice(op, asyncio.get_running_loop().time() + 10)
+
+    op = asyncio.run(_run(PAUSE, steps))
+
+    assert op["status"] == SUCCEEDED
+    assert (op["cursor"], op["processed"], op["changed"], op["failed"]) == (5, 5, 5, 0)
+    assert set(_statuses(fake_sb).values()) == {"paused"}
+    assert n8n.active == {str(i): False for i in range(1, 6)}
+
+
+def test_slice_resumes_from_the_checkpoint(fake_sb, n8n):
+    fake_sb.db["workflows"] = _rows(5, "paused")
+
+    async def steps(runner, op):
+        # As left by an earlier slice that handled rows 1 and 2
+        op = await fleet.update_operation(op["id"], {"status": "running", "cursor": 2, "processed": 2})
+        return await runner.run_slice(op, asyncio.get_running_loop().time() + 10)
+
+    op = asyncio.run(_run(RESUME, steps))
+
+    assert op["status"] == SUCCEEDED and op["cursor"] == 5 and op["processed"] == 5
+    assert n8n.active == {"3": True, "4": True, "5": True}
+    assert _statuses(fake_sb) == {"1": "paused", "2": "paused", "3": "active", "4": "active", "5": "active"}
+
+
+def test_cursor_advances_page_by_page(fake_sb, n8n):
+    fake_sb.db["workflows"] = _rows(5)
+    cursors = []
+
+    class Recording(FleetRunner):
+        async def _page(self, op):
+            cursors.append(op["cursor"])
+            return await super()._page(op)
+
+    async def steps(runner, op):
+        return await Recording(page_size=2).run_slice(op, asyncio.get_running_loop().time() + 10)
+
+    asyncio.run(_run(PAUSE, steps))
+
+    assert cursors == [0, 2, 4, 5]
+
+
+def test_open_breaker_keeps_the_checkpoint_instead_of_skipping_rows(fake_sb, n8n):
+    fake_sb.db["workflows"] = _rows(4)
+    breaker = CircuitOpenError("http://n8n", 30)
+    n8n.errors = {"2": breaker, "3": breaker}
+
+    async def steps(runner, op):
+        with pytest.raises(FleetBackoff):
+            await runner.run_slice(op, asyncio.get_running_loop().time() + 10)
+        stalled = await fleet.get_operation(op["id"])
+        n8n.errors = {}
+        # The job queue retries the slice once n8n recovers
+        return stalled, await runner.run_slice(stalled, asyncio.get_running_loop().time() + 10)
+
+    stalled, done = asyncio.run(_run(PAUSE, steps))
+
+    # Row 1 was settled and recorded; the page is redone from the old checkpoint
+    assert stalled["cursor"] == 0 and stalled["changed"] == 1 and stalled["processed"] == 1
+    assert done["status"] == SUCCEEDED and done["changed"] == 4 and done["failed"] == 0
+    assert set(_statuses(fake_sb).values()) == {"paused"}
+
+
+def test_rows_that_keep_failing_end_the_operation_failed(fake_sb, n8n):
+    fake_sb.db["workflows"] = _rows(3)
+    n8n.errors = {"2": _status_error(400)}
+
+    async def steps(runner, op):
+        failed = await runner.run_slice(op, asyncio.get_running_loop().time() + 10)
+        n8n.errors = {}
+        # Continuing rescans from the start, where only the failed row is left
+        retried = await runner.run_slice(failed, asyncio.get_running_loop().time() + 10)
+        return failed, retried
+
+    failed, retried = asyncio.run(_run(PAUSE, steps))
+
+    assert failed["status"] == FAILED and failed["failed"] == 1 and failed["cursor"] == 0
+    assert "1 workflows failed" in failed["error"]
+    assert retried["status"] == SUCCEEDED and retried["failed"] == 0
+    assert _statuses(fake_sb) == {"1": "paused", "2": "paused", "3": "paused"}
+
+
+def test_pause_settles_rows_the_reconciler_marked_inactive_meanwhile(fake_sb, n8n):
+    fake_sb.db["workflows"] = _rows(2)
+
+    def reconciler_sees_it(wid):
+        for row in fake_sb.db["workflows"]:
+            if row["n8n_workflow_id"] == wid:
+                row["status"] = "inactive"
+
+    n8n.on_deactivate = reconciler_sees_it
+
+    async def steps(runner, op):
+        return await runner.run_slice(op, asyncio.get_running_loop().time() + 10)
+
+    op = asyncio.run(_run(PAUSE, steps))
+
+    assert op["changed"] == 2
+    assert _statuses(fake_sb) == {"1": "paused", "2": "paused"}
@@ -0,0 +1,96 @@
+# tests/test_garbage_collector.py
+import asyncio
+
+import pytest
+
+from n8n.sharding import DEFAULT_SHARD
+from workflows import garbage_collector
+from workflows.garbage_collector import OrphanCollector
+
+OLD = "2020-01-01T00:00:00.000Z"
+NEW = "2999-01-01T00:00:00.000Z"
+
+
+def _wf(wid: str, name: str, created: str = OLD, creds=()) -> dict:
+    return {
+        "id": wid,
+        "name": name,
+        "createdAt": created,
+        "nodes": [{"credentials": {"gmailOAuth2": {"id": c}}} for c in creds],
+    }
+
+
+class FakeN8N:
+    def __init__(self, workflows: list, credentials: list):
+        self.workflows = workflows
+        self.credentials = credentials
+
+    async def list_workflows(self, active=None, cursor=None):
+        return self.workflows, None
+
+    async def list_credentials(self, cursor=None):
+        return self.credentials, None
+
+
+@pytest.fixture
+def deleted(monkeypatch):
+    calls = []
+
+    async def fake_delete(shard, workflow_ids=(), credential_ids=(), reason="rollback"):
+        calls.append((shard, list(workflow_ids), list(credential_ids), reason))
+        return len(workflow_ids) + len(credential_ids), 0
+
+    monkeypatch.setattr(garbage_collector, "delete_n8n_resources", fake_delete)
+    return calls
+
+
+def _owned(n: int) -> list:
+    return [{"id": i, "n8n_workflow_id": str(i), "n8n_shard": DEFAULT_SHARD} for i in range(1, n + 1)]
+
+
+def test_collects_old_unowned_template_workflows_and_unused_credentials(fake_sb, monkeypatch, deleted):
+    fake_sb.db["workflows"] = _owned(3)
+    n8n = FakeN8N(
+        [
+            _wf("1", "gmail-summary-a", creds=["c-live"]),
+            _wf("2", "gmail-summary-b"),
+            _wf("3", "gmail-summary-c"),
+            _wf("90", "gmail-summary-orphan", creds=["c-orphan-wf"]),
+            _wf("91", "gmail-summary-in-flight", created=NEW),
+            _wf("92", "built by hand"),
+        ],
+        [
+            {"id": "c-live", "name": "gmail-oauth2-a", "createdAt": OLD},
+            {"id": "c-orphan-wf", "name": "gmail-oauth2-b", "createdAt": OLD},
+            {"id": "c-mine", "name": "my own credential", "createdAt": OLD},
+        ],
+    )
+    monkeypatch.setattr(garbage_collector, "get_async_client", lambda shard: n8n)
+
+    stats = asyncio.run(OrphanCollector().collect_shard(DEFAULT_SHARD))
+
+    assert stats == {"orphanWorkflows": 1, "orphanCredentials": 1, "deleted": 2, "failed": 0}
+    # The credential of a doomed workflow goes with it; hand-built and young resources stay
+    assert deleted == [(DEFAULT_SHARD, ["90"], ["c-orphan-wf"], "gc")]
+
+
+def test_refuses_when_most_template_workflows_look_orphaned(fake_sb, monkeypatch, deleted):
+    # e.g. the rows were read from the wrong project
+    fake_sb.db["workflows"] = _owned(2)
+    n8n = FakeN8N([_wf(str(i), f"gmail-summary-{i}") for i in range(1, 21)], [])
+    monkeypatch.setattr(garbage_collector, "get_async_client", lambda shard: n8n)
+
+    with pytest.raises(RuntimeError, match="18/20 template workflows have no row"):
+        asyncio.run(OrphanCollector().collect_shard(DEFAULT_SHARD))
+    assert deleted == []
+
+
+def test_dry_run_deletes_nothing(fake_sb, monkeypatch, deleted):
+    fake_sb.db["workflows"] = _owned(1)
+    n8n = FakeN8N([_wf("1", "gmail-summary-a"), _wf("2", "gmail-summary-b")], [])
+    monkeypatch.setattr(garbage_collector, "get_async_client", lambda shard: n8n)
+
+    stats = asyncio.run(OrphanCollector().collect_shard(DEFAULT_SHARD, dry_run=True))
+
+    assert stats["orphanWorkflows"] == 1 and stats["deleted"] == 0
+    assert deleted == []
@@ -0,0 +1,100 @@
+# tests/test_job_store.py
+import time
+
+import pytest
+
+from jobs.store import FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = JobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=0.2)
+    yield s
+    s.close()
+
+
+def test_claim_leases_oldest_runnable_job(store):
+    first = store.enqueue("install", {"n": 1})
+    store.enqueue("install", {"n": 2})
+    job = store.claim("w1")
+    assert job["id"] == first["id"]
+    assert job["status"] == RUNNING and job["locked_by"] == "w1" and job["attempts"] == 1
+
+
+def test_claim_skips_delayed_and_leased_jobs(store):
+    store.enqueue("install", {}, delay=60)
+    assert store.claim("w1") is None
+    store.enqueue("install", {})
+    assert store.claim("w1") is not None
+    assert store.claim("w2") is None
+
+
+def test_dedupe_key_returns_active_job(store):
+    a = store.enqueue("install", {"n": 1}, dedupe_key="u1:t1")
+    b = store.enqueue("install", {"n": 2}, dedupe_key="u1:t1")
+    assert a["id"] == b["id"]
+    job = store.claim("w1")
+    store.complete(job["id"], "w1", {"ok": True})
+    # Finished jobs no longer hold the key
+    assert store.enqueue("install", {}, dedupe_key="u1:t1")["id"] != a["id"]
+
+
+def test_expired_lease_is_reclaimed_and_stale_worker_cannot_finish(store):
+    job = store.enqueue("install", {})
+    store.claim("w1")
+    time.sleep(0.25)
+    again = store.claim("w2")
+    assert again["id"] == job["id"] and again["attempts"] == 2
+
+    assert store.complete(job["id"], "w1", {"from": "w1"}) is False
+    assert store.fail(job["id"], "w1", "late") is False
+    assert store.complete(job["id"], "w2", {"from": "w2"}) is True
+    stored = store.get(job["id"])
+    assert stored["status"] == SUCCEEDED and stored["result"] == {"from": "w2"}
+
+
+def test_expired_lease_after_max_attempts_fails_the_job(store):
+    job = store.enqueue("install", {}, max_attempts=2)
+    store.claim("w1")
+    time.sleep(0.25)
+    assert store.claim("w2")["attempts"] == 2
+    # The second worker dies too: the job is out of attempts, not leased a third time
+    time.sleep(0.25)
+    assert store.claim("w3") is None
+    stored = store.get(job["id"])
+    assert stored["status"] == FAILED and stored["attempts"] == 2
+    assert stored["error"] == "lease expired after max attempts" and stored["locked_by"] is None
+
+
+def test_renew_keeps_lease(store):
+    job = store.enqueue("install", {})
+    store.claim("w1")
+    for _ in range(3):
+        time.sleep(0.1)
+        assert store.renew(job["id"], "w1")
+    assert store.claim("w2") is None
+    assert store.renew(job["id"], "w2") is False
+
+
+def test_fail_with_retry_requeues(store):
+    job = store.enqueue("install", {})
+    store.claim("w1")
+    assert store.fail(job["id"], "w1", "boom", retry_at=time.time() + 60)
+    stored = store.get(job["id"])
+    assert stored["status"] == QUEUED and stored["error"] == "boom" and stored["locked_by"] is None
+    assert store.claim("w1") is None
+
+
+def test_fail_without_retry_is_permanent(store):
+    job = store.enqueue("install", {})
+    store.claim("w1")
+    store.fail(job["id"], "w1", "bad input")
+    assert store.get(job["id"])["status"] == FAILED
+
+
+def test_idempotency_keys(store):
+    assert store.get_idempotent("u1", "k") is None
+    saved = store.save_idempotent("u1", "k", "fp", 202, {"jobId": "1"})
+    assert saved == ("fp", 202, {"jobId": "1"})
+    # First response wins
+    assert store.save_idempotent("u1", "k", "fp2", 202, {"jobId": "2"}) == saved
@@ -0,0 +1,34 @@
+# tests/test_job_worker.py
+import asyncio
+
+from jobs import worker as worker_module
+from jobs.store import SUCCEEDED, JobStore
+from jobs.worker import JobWorkerPool
+
+
+def test_slow_job_keeps_its_lease_and_runs_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(worker_module, "JOB_HEARTBEAT_SECONDS", 0.05)
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=0.2)
+    runs = []
+
+    async def handler(payload):
+        runs.append(payload)
+        await asyncio.sleep(0.6)
+        return {"done": True}
+
+    async def main():
+        pool = JobWorkerPool(store, workers=2, poll_interval=0.02)
+        pool.register("slow", handler)
+        job = await pool.enqueue("slow", {"n": 1})
+        pool.start()
+        for _ in range(100):
+            if store.get(job["id"])["status"] == SUCCEEDED:
+                break
+            await asyncio.sleep(0.05)
+        await pool.stop()
+        return store.get(job["id"])
+
+    job = asyncio.run(main())
+    store.close()
+    assert job["status"] == SUCCEEDED and job["result"] == {"done": True}
+    assert len(runs) == 1 and job["attempts"] == 1
@@ -0,0 +1,53 @@
+# tests/test_live_status.py
+import asyncio
+
+from workflows import live_status as live_status_module
+from workflows.live_status import LiveStatusCache
+
+
+class FakeClient:
+    def __init__(self, workflows: list, executions: list):
+        self.workflows = workflows
+        self.executions = executions
+        self.listed = []
+
+    async def list_workflows(self, active=None, cursor=None):
+        self.listed.append(active)
+        return [wf for wf in self.workflows if active is None or wf["active"] == active], None
+
+    async def list_executions(self, cursor=None):
+        return self.executions, None
+
+
+def _row(wid, updated_at: str = "2020-01-01T00:00:00+00:00") -> dict:
+    return {"n8n_shard": "default", "n8n_workflow_id": wid, "updated_at": updated_at}
+
+
+def test_lookup_reports_unknown_for_rows_changed_since_the_snapshot(monkeypatch):
+    client = FakeClient(
+        [{"id": "1", "active": True}, {"id": "2", "active": False}],
+        [{"id": 9, "workflowId": "1", "status": "success", "startedAt": "a", "stoppedAt": "b"}],
+    )
+    monkeypatch.setattr(live_status_module, "get_async_client", lambda shard: client)
+
+    live = asyncio.run(LiveStatusCache().lookup([_row(1), _row(2), _row(3, "2999-01-01T00:00:00Z")]))
+
+    # Only the active workflows are listed
+    assert client.listed == [True]
+    assert live[("default", "1")] == {
+        "active": True,
+        "lastExecution": {"id": "9", "status": "success", "startedAt": "a", "stoppedAt": "b"},
+    }
+    assert live[("default", "2")] == {"active": False, "lastExecution": None}
+    # Installed or resumed after the listing started: the snapshot cannot vouch for it
+    assert live[("default", "3")] == {"active": None, "lastExecution": None}
+
+
+def test_lookup_leaves_out_shards_without_a_snapshot(monkeypatch):
+    class Down:
+        async def list_workflows(self, active=None, cursor=None):
+            raise ConnectionError("n8n down")
+
+    monkeypatch.setattr(live_status_module, "get_async_client", lambda shard: Down())
+
+    assert asyncio.run(LiveStatusCache().lookup([_row(1)])) == {}
@@ -0,0 +1,33 @@
+# tests/test_n8n_pool.py
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_n8n import StubN8N
+from n8n.n8n_client import N8NClient
+
+
+def test_pooled_client_reuses_keep_alive_connections():
+    with StubN8N() as stub:
+        client = N8NClient(stub.base_url, "test", pool_size=4)
+        try:
+            def install(i):
+                client.create_credential(f"cred-{i}", "openAiApi", {})
+                client.activate_workflow(client.create_workflow(f"wf-{i}", {"nodes": [], "connections": {}}))
+
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(install, range(40)))
+        finally:
+            client.close()
+        assert stub.httpd.created == 80
+        # 120 requests over at most pool_size sockets
+        assert stub.connections <= 4
+
+
+def test_warm_up_opens_pool_connections():
+    with StubN8N() as stub:
+        client = N8NClient(stub.base_url, "test", pool_size=3)
+        try:
+            assert client.warm_up() == 3
+            client.create_workflow("wf", {"nodes": [], "connections": {}})
+        finally:
+            client.close()
+        assert stub.connections <= 3
@@ -0,0 +1,46 @@
+# tests/test_rebalance_shards.py
+import asyncio
+
+from tools import rebalance_shards
+from workflows import gmail_credentials as gmail_credentials_module
+
+
+def _credential(user_id: str, shard: str, cred_id: str) -> dict:
+    return {
+        "user_id": user_id,
+        "n8n_shard": shard,
+        "n8n_credential_id": cred_id,
+        "name": f"gmail-oauth2-{user_id}",
+        "fingerprint": "fp",
+    }
+
+
+def test_release_shard_deletes_the_abandoned_gmail_credential(fake_sb, monkeypatch):
+    deleted = []
+
+    async def fake_delete(shard, workflow_ids=(), credential_ids=(), reason="rollback"):
+        deleted.append((shard, list(credential_ids), reason))
+        return len(credential_ids), 0
+
+    monkeypatch.setattr(gmail_credentials_module, "delete_n8n_resources", fake_delete)
+    fake_sb.db["workflows"] = [
+        {"id": 1, "user_id": "u1", "n8n_shard": "b", "status": "active"},
+        {"id": 2, "user_id": "u1", "n8n_shard": "old", "status": "deleted"},
+        {"id": 3, "user_id": "u2", "n8n_shard": "old", "status": "paused"},
+    ]
+    fake_sb.db["user_gmail_credentials"] = [
+        _credential("u1", "old", "10"),
+        _credential("u1", "b", "11"),
+        _credential("u2", "old", "12"),
+    ]
+
+    async def main():
+        await rebalance_shards.release_shard("u1", "old")
+        # u2 still has a workflow on the old shard, so its credential stays
+        await rebalance_shards.release_shard("u2", "old")
+
+    asyncio.run(main())
+
+    assert deleted == [("old", ["10"], "rebalance")]
+    left = {(row["user_id"], row["n8n_shard"]) for row in fake_sb.db["user_gmail_credentials"]}
+    assert left == {("u1", "b"), ("u2", "old")}
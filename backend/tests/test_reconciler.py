@@ -0,0 +1,62 @@
+# tests/test_reconciler.py
+import asyncio
+
+from n8n.sharding import DEFAULT_SHARD
+from workflows import reconciler
+from workflows.reconciler import WorkflowReconciler
+
+
+class FakeN8N:
+    def __init__(self, workflows: dict):
+        # n8n workflow id -> active
+        self.workflows = workflows
+
+    async def list_workflows(self, active=None, cursor=None):
+        page = [
+            {"id": wid, "active": on, "updatedAt": "2026-01-01T00:00:00.000Z"}
+            for wid, on in self.workflows.items()
+            if active is None or on == active
+        ]
+        return page, None
+
+
+def _rows(n: int) -> list:
+    return [
+        {
+            "id": i,
+            "user_id": "user-1",
+            "n8n_workflow_id": str(i),
+            "n8n_shard": DEFAULT_SHARD,
+            "status": "active",
+            "created_at": "2026-01-01T00:00:00+00:00",
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _statuses(fake_sb) -> dict:
+    return {row["n8n_workflow_id"]: row["status"] for row in fake_sb.db["workflows"]}
+
+
+def test_full_sweep_corrects_inactive_and_deleted_rows(fake_sb, monkeypatch):
+    fake_sb.db["workflows"] = _rows(4)
+    n8n = FakeN8N({"1": True, "2": False, "3": True})
+    monkeypatch.setattr(reconciler, "get_async_client", lambda shard: n8n)
+
+    stats = asyncio.run(WorkflowReconciler().reconcile_shard(DEFAULT_SHARD, full=True))
+
+    assert stats == {"pass": "full", "checked": 4, "active": 0, "inactive": 1, "deleted": 1}
+    assert _statuses(fake_sb) == {"1": "active", "2": "inactive", "3": "active", "4": "deleted"}
+
+
+def test_full_sweep_refuses_to_mark_most_of_a_shard_deleted(fake_sb, monkeypatch):
+    fake_sb.db["workflows"] = _rows(10)
+    # e.g. pointed at an empty or freshly restored n8n
+    n8n = FakeN8N({"1": True, "2": False})
+    monkeypatch.setattr(reconciler, "get_async_client", lambda shard: n8n)
+
+    stats = asyncio.run(WorkflowReconciler().reconcile_shard(DEFAULT_SHARD, full=True))
+
+    assert stats["deleted"] == 0
+    assert stats["inactive"] == 1
+    assert "deleted" not in _statuses(fake_sb).values()
@@ -0,0 +1,80 @@
+# tests/test_sharding.py
+import json
+
+import pytest
+
+from n8n.sharding import HashRing, Shard, parse_shards, pick_shard
+from tools.rebalance_shards import plan_moves
+
+
+def _shards(*specs):
+    return {name: Shard(name, f"http://{name}", "k", capacity, draining) for name, capacity, draining in specs}
+
+
+USERS = [f"user-{i}" for i in range(2000)]
+
+
+def test_walk_yields_every_shard_once():
+    ring = HashRing(_shards(("a", 5000, False), ("b", 5000, False), ("c", 5000, False)))
+    for user in USERS[:50]:
+        walk = list(ring.walk(user))
+        assert sorted(walk) == ["a", "b", "c"]
+        assert walk == list(ring.walk(user))
+
+
+def test_adding_a_shard_only_moves_users_to_it():
+    before = HashRing(_shards(("a", 5000, False), ("b", 5000, False)))
+    after = HashRing(_shards(("a", 5000, False), ("b", 5000, False), ("c", 5000, False)))
+    moved = 0
+    for user in USERS:
+        old, new = next(before.walk(user)), next(after.walk(user))
+        if old != new:
+            assert new == "c"
+            moved += 1
+    # Roughly a third of the users, not a reshuffle
+    assert 0.2 * len(USERS) < moved < 0.45 * len(USERS)
+
+
+def test_capacity_weights_placement():
+    ring = HashRing(_shards(("small", 2500, False), ("big", 7500, False)))
+    big = sum(next(ring.walk(user)) == "big" for user in USERS)
+    assert 0.65 * len(USERS) < big < 0.85 * len(USERS)
+
+
+def test_pick_shard_skips_draining_and_full_shards():
+    shards = _shards(("a", 10, False), ("b", 10, True), ("c", 10, False))
+    ring = HashRing(shards)
+    for user in USERS[:50]:
+        assert pick_shard(user, {}, shards, ring) != "b"
+        assert pick_shard(user, {"a": 10}, shards, ring) == "c"
+    # Everything full: least utilised open shard
+    assert pick_shard("u", {"a": 12, "c": 11}, shards, ring) == "c"
+
+
+def test_pick_shard_fails_when_all_draining():
+    shards = _shards(("a", 10, True))
+    with pytest.raises(RuntimeError):
+        pick_shard("u", {}, shards, HashRing(shards))
+
+
+def test_parse_shards():
+    default = parse_shards("", "http://n8n/", "key")
+    assert default["default"].base_url == "http://n8n" and default["default"].api_key == "key"
+    spec = json.dumps([{"name": "default", "url": "http://a"}, {"name": "b", "url": "http://b", "apiKey": "kb",
+                                                                  "capacity": 100, "draining": True}])
+    shards = parse_shards(spec, "http://unused", "key")
+    assert shards["b"] == Shard("b", "http://b", "kb", 100, True)
+    with pytest.raises(ValueError):
+        parse_shards(json.dumps([{"name": "a", "url": "http://a"}] * 2), "", "key")
+
+
+def test_plan_moves_keeps_each_user_together():
+    rows = [
+        {"id": 1, "user_id": "u1", "n8n_shard": "gone", "status": "active"},
+        {"id": 2, "user_id": "u1", "n8n_shard": "gone", "status": "paused"},
+        {"id": 3, "user_id": "u1", "n8n_shard": None, "status": "inactive"},
+    ]
+    moves, before, after = plan_moves(rows)
+    _, target, moved = moves["u1"]
+    assert {r["id"] for r in moved} == {1, 2, 3} - ({3} if target == "default" else set())
+    assert sum(after.values()) == 3
@@ -0,0 +1,59 @@
+# tests/test_singleflight.py
+import asyncio
+
+import pytest
+
+from workflows import provisioning
+from workflows.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def main():
+        sf = SingleFlight()
+        results = await asyncio.gather(*(sf.do("k", fn) for _ in range(5)))
+        assert not sf.in_flight("k")
+        return results
+
+    assert asyncio.run(main()) == [1] * 5
+
+
+def test_exception_reaches_every_caller():
+    async def fn():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        sf = SingleFlight()
+        return await asyncio.gather(sf.do("k", fn), sf.do("k", fn), return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(main()))
+
+
+def test_recorded_and_unrecorded_installs_do_not_coalesce(monkeypatch):
+    runs = []
+
+    async def fake_provision(user_id, template_id, integ_row, providers, record, shard, activate):
+        runs.append(record)
+        await asyncio.sleep(0.01)
+        return {"workflowId": str(len(runs)), **({} if record else {"row": {"user_id": user_id}})}
+
+    monkeypatch.setattr(provisioning, "_provision_template", fake_provision)
+
+    async def main():
+        return await asyncio.gather(
+            provisioning.provision_template("u1", "t1", {}, record=True),
+            provisioning.provision_template("u1", "t1", {}, record=False),
+            provisioning.provision_template("u1", "t1", {}, record=False),
+        )
+
+    job, bulk_a, bulk_b = asyncio.run(main())
+    assert sorted(runs) == [False, True]
+    assert "row" not in job
+    assert bulk_a is bulk_b and "row" in bulk_a
@@ -0,0 +1,50 @@
+# tests/test_token_refresh.py
+import asyncio
+from collections import Counter
+
+import httpx
+
+from workflows import token_refresh
+from workflows.token_refresh import TokenRefreshScheduler
+
+
+def _due_rows(n: int, expiry: str) -> list:
+    return [
+        {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "user_id": f"user-{i}",
+            "provider": "google",
+            "access_token": "old",
+            "refresh_token": f"rt-{i}",
+            "scope": "",
+            "expiry": expiry,
+            "refresh_error": None,
+        }
+        for i in range(n)
+    ]
+
+
+def test_tick_pages_past_rows_sharing_one_expiry(fake_sb, monkeypatch):
+    fake_sb.db["user_integrations"] = _due_rows(10, "2020-01-01T00:00:00Z")
+    attempts = Counter()
+
+    async def fake_refresh(refresh_token):
+        attempts[refresh_token] += 1
+        # Odd rows fail and stay in the window, as a Google outage would leave them
+        if int(refresh_token.split("-")[1]) % 2:
+            raise httpx.ConnectError("down")
+        return {"access_token": "new", "expires_in": 3600}
+
+    async def no_credentials(user_ids):
+        return []
+
+    monkeypatch.setattr(token_refresh, "refresh_access_token_async", fake_refresh)
+    monkeypatch.setattr(token_refresh.gmail_credentials, "lookup_many", no_credentials)
+
+    stats = asyncio.run(TokenRefreshScheduler(batch_size=3).tick())
+
+    assert attempts == Counter({f"rt-{i}": 1 for i in range(10)})
+    assert stats["refreshed"] == 5
+    assert stats["failed"] == 5
+    access = {row["user_id"]: row["access_token"] for row in fake_sb.db["user_integrations"]}
+    assert access == {f"user-{i}": "old" if i % 2 else "new" for i in range(10)}
@@ -2,10 +2,13 @@
 import os
 import base64
 import json
-import requests
+import httpx
 from urllib.parse import urlencode
 from dotenv import load_dotenv
 
+from observability.metrics import time_stage
+from observability.server_timing import span
+
 load_dotenv()
 
 GOOGLE_CLIENT_ID = os.environ["GOOGLE_CLIENT_ID"]
@@ -13,7 +16,7 @@ GOOGLE_CLIENT_SECRET = os.environ["GOOGLE_CLIENT_SECRET"]
 GOOGLE_REDIRECT_URI = os.environ.get("GOOGLE_REDIRECT_URI", "http://localhost:8000/oauth/google/callback")
 
 GOOGLE_AUTH_ENDPOINT = "https://accounts.google.com/o/oauth2/v2/auth"
-GOOGLE_TOKEN_ENDPOINT = "https://oauth2.googleapis.com/token"
+GOOGLE_TOKEN_ENDPOINT = os.environ.get("GOOGLE_TOKEN_ENDPOINT", "https://oauth2.googleapis.com/token")
 
 # The scopes you need for Gmail draft creation and reading
 SCOPES = [
@@ -38,7 +41,14 @@ def build_auth_url(state: str) -> str:
     }
     return f"{GOOGLE_AUTH_ENDPOINT}?{urlencode(params)}"
 
-def exchange_code_for_tokens(code: str) -> dict:
+
+# Shared across callbacks so the token endpoint connection is reused
+_http: httpx.AsyncClient = None
+
+async def exchange_code_for_tokens_async(code: str) -> dict:
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(timeout=30)
     data = {
         "code": code,
         "client_id": GOOGLE_CLIENT_ID,
@@ -46,6 +56,33 @@ def exchange_code_for_tokens(code: str) -> dict:
         "redirect_uri": GOOGLE_REDIRECT_URI,
         "grant_type": "authorization_code",
     }
-    r = requests.post(GOOGLE_TOKEN_ENDPOINT, data=data, timeout=30)
-    r.raise_for_status()
+    with time_stage("google_token_exchange"), span("google-token"):
+        r = await _http.post(GOOGLE_TOKEN_ENDPOINT, data=data)
+        r.raise_for_status()
     return r.json()
+
+async def refresh_access_token_async(refresh_token: str) -> dict:
+    """Exchange a refresh token for a new access token.
+
+    Raises httpx.HTTPStatusError; a 400 with error "invalid_grant" means the
+    refresh token was revoked or expired and the user has to reconnect.
+    """
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(timeout=30)
+    data = {
+        "refresh_token": refresh_token,
+        "client_id": GOOGLE_CLIENT_ID,
+        "client_secret": GOOGLE_CLIENT_SECRET,
+        "grant_type": "refresh_token",
+    }
+    with time_stage("google_token_refresh"), span("google-refresh"):
+        r = await _http.post(GOOGLE_TOKEN_ENDPOINT, data=data)
+        r.raise_for_status()
+    return r.json()
+
+async def close_http() -> None:
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
@@ -0,0 +1,216 @@
+# tools/rebalance_shards.py
+# Move tenants to the n8n shard the ring now assigns them, e.g. after adding
+# a shard to N8N_SHARDS or marking one "draining". Users are planned in id
+# order against projected loads, so capacity limits hold after the move;
+# with consistent hashing only the users whose ring position a new shard
+# took over are moved.
+#
+#   cd backend && python -m tools.rebalance_shards            # print the plan
+#   cd backend && python -m tools.rebalance_shards --apply --concurrency 4
+#
+# A move re-provisions every workflow of the user that is not deleted on the
+# target shard (new Gmail credential, current template version), repoints the
+# `workflows` row, then deletes the old workflow. Rows keep their status:
+# only active rows get an active workflow, so paused and inactive ones stay
+# off after the move. An active workflow runs on both shards for the few
+# seconds in between. Once a user has no rows left on a shard, their Gmail
+# credential there is deleted, so no live Google token stays behind.
+#
+# Running API processes cache each user's shard for up to
+# SHARD_PLACEMENT_TTL_SECONDS (workflows/placement.py); an install made in
+# that window can still land on the old shard. Run the tool again after the
+# TTL to move such stragglers (and drop the credential they recreated).
+import asyncio
+import argparse
+import logging
+
+import httpx
+
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+from database.integrations import get_google_integrations
+from n8n.sharding import DEFAULT_SHARD, SHARDS, pick_shard
+from n8n.n8n_async_client import close_async_client, delete_workflow
+from workflows.gmail_credentials import gmail_credentials
+from workflows.provisioning import ensure_gmail_cred, provision_template
+from workflows.saga import delete_n8n_resources
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+
+
+async def load_rows() -> list:
+    """Every `workflows` row that is not deleted: a tenant moves as a whole."""
+    sb = await get_async_sb()
+    rows, last_id = [], 0
+    while True:
+        res = await execute(
+            sb.table("workflows")
+            .select("id,user_id,template_id,n8n_workflow_id,n8n_shard,status")
+            .neq("status", "deleted")
+            .gt("id", last_id)
+            .order("id")
+            .limit(PAGE_SIZE),
+            "supabase-select",
+        )
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase select error: {err}")
+        page = get_data(res) or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        last_id = page[-1]["id"]
+
+
+def plan_moves(rows: list) -> tuple:
+    """Returns ({user_id: (from_shard, to_shard, rows)}, loads before, loads after)."""
+    by_user = {}
+    for row in rows:
+        row["n8n_shard"] = row.get("n8n_shard") or DEFAULT_SHARD
+        by_user.setdefault(row["user_id"], []).append(row)
+
+    before = {name: 0 for name in SHARDS}
+    for row in rows:
+        before[row["n8n_shard"]] = before.get(row["n8n_shard"], 0) + 1
+
+    projected = {name: 0 for name in SHARDS}
+    moves = {}
+    for user_id in sorted(by_user):
+        user_rows = by_user[user_id]
+        # Earliest shard on the user's ring walk that still has room once the
+        # users before them are placed; anything else is moved there
+        target = pick_shard(user_id, projected)
+        projected[target] += len(user_rows)
+        stray = [r for r in user_rows if r["n8n_shard"] != target]
+        if stray:
+            moves[user_id] = (stray[0]["n8n_shard"], target, stray)
+    return moves, before, projected
+
+
+async def move_user(user_id: str, target: str, rows: list, integ_row: dict) -> int:
+    """Re-provision `rows` on `target`; returns the number of workflows moved."""
+    sb = await get_async_sb()
+    gmail = asyncio.ensure_future(ensure_gmail_cred(user_id, integ_row, target))
+    moved = 0
+    try:
+        for row in rows:
+            result = await provision_template(
+                user_id,
+                row["template_id"],
+                integ_row,
+                providers={"gmail": lambda *_: asyncio.shield(gmail)},
+                record=False,
+                shard=target,
+                activate=row["status"] == "active",
+            )
+            new = result["row"]
+            res = await execute(
+                sb.table("workflows").update({
+                    "n8n_workflow_id": new["n8n_workflow_id"],
+                    "n8n_shard": target,
+                    "workflow_config": new["workflow_config"],
+                }).eq("id", row["id"]),
+                "supabase-update",
+            )
+            err = get_error(res)
+            if err:
+                # The row still points at the old workflow, which keeps running
+                await delete_n8n_resources(target, workflow_ids=[new["n8n_workflow_id"]])
+                raise RuntimeError(f"Supabase update error for workflow row {row['id']}: {err}")
+            moved += 1
+            try:
+                await delete_workflow(row["n8n_workflow_id"], shard=row["n8n_shard"])
+            except (httpx.HTTPError, KeyError) as e:
+                logger.warning(f"Moved row {row['id']} but could not delete old workflow {row['n8n_workflow_id']}: {e}")
+    finally:
+        if not gmail.done():
+            gmail.cancel()
+
+    for shard in sorted({row["n8n_shard"] for row in rows}):
+        await release_shard(user_id, shard)
+    return moved
+
+
+async def release_shard(user_id: str, shard: str) -> None:
+    """Delete the user's Gmail credential on `shard` unless workflows there still use it."""
+    sb = await get_async_sb()
+    res = await execute(
+        sb.table("workflows")
+        .select("id")
+        .eq("user_id", user_id)
+        .eq("n8n_shard", shard)
+        .neq("status", "deleted")
+        .limit(1),
+        "supabase-select",
+    )
+    err = get_error(res)
+    if err:
+        raise RuntimeError(f"Supabase select error: {err}")
+    if get_data(res):
+        logger.warning(f"User {user_id} still has workflows on {shard}; keeping their Gmail credential there")
+        return
+    await gmail_credentials.remove(user_id, shard)
+
+
+async def run(apply: bool, concurrency: int) -> int:
+    rows = await load_rows()
+    moves, before, after = plan_moves(rows)
+
+    print(f"{len(rows)} workflows, {len(moves)} users to move")
+    for name in sorted(set(before) | set(after)):
+        capacity = SHARDS[name].capacity if name in SHARDS else "-"
+        flag = " (draining)" if name in SHARDS and SHARDS[name].draining else ""
+        print(f"  {name:<16} {before.get(name, 0):>8} -> {after.get(name, 0):>8}  capacity {capacity}{flag}")
+    routes = {}
+    for current, target, user_rows in moves.values():
+        routes[(current, target)] = routes.get((current, target), 0) + len(user_rows)
+    for (current, target), n in sorted(routes.items()):
+        print(f"  move {n} workflows {current} -> {target}")
+    if not apply or not moves:
+        return 0
+
+    integrations = await get_google_integrations(list(moves))
+    sem = asyncio.Semaphore(max(1, concurrency))
+    failures = 0
+
+    async def one(user_id):
+        nonlocal failures
+        current, target, user_rows = moves[user_id]
+        integ_row = integrations.get(user_id)
+        if integ_row is None:
+            failures += 1
+            print(f"  skip {user_id}: no Google integration to recreate the Gmail credential")
+            return
+        async with sem:
+            try:
+                moved = await move_user(user_id, target, user_rows, integ_row)
+                print(f"  moved {user_id}: {moved} workflows {current} -> {target}")
+            except Exception as e:
+                failures += 1
+                print(f"  failed {user_id}: {getattr(e, 'detail', None) or e}")
+
+    await asyncio.gather(*(one(user_id) for user_id in moves))
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apply", action="store_true", help="perform the moves instead of printing the plan")
+    ap.add_argument("--concurrency", type=int, default=4, help="users moved in parallel")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    async def _main():
+        try:
+            return await run(args.apply, args.concurrency)
+        finally:
+            await close_async_client()
+
+    failures = asyncio.run(_main())
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# tools/schedule_load.py
+# Load histogram of tenant workflow triggers: poll fires across an hour and
+# daily scheduled runs across a day, with peak-to-mean ratios.
+#
+#   cd backend && python -m tools.schedule_load                      # active rows in Supabase
+#   cd backend && python -m tools.schedule_load --simulate 10000     # planned offsets for N tenants
+#   cd backend && python -m tools.schedule_load --simulate 10000 --unstaggered
+#
+# Rows provisioned before staggering have no workflow_config.schedule; they
+# are counted at the template's own interval with no offset, which is what
+# n8n actually does with them.
+import argparse
+
+from workflows.catalog import templates
+from workflows.staggering import SCHEDULE_TRIGGER, plan_schedule, template_poll_minutes
+
+HOUR = 3600
+DAY_MINUTES = 1440
+PAGE_SIZE = 1000
+
+
+def _default_schedule(template_id: str) -> dict:
+    """Schedule config equivalent to the unmodified template triggers."""
+    try:
+        _, tpl, _ = templates.get(template_id)
+    except KeyError:
+        return {}
+    schedule = {}
+    for _, name, node_type, params in tpl.triggers:
+        if node_type == SCHEDULE_TRIGGER:
+            items = (params.get("rule") or {}).get("interval") or []
+            if len(items) == 1 and "triggerAtHour" in items[0]:
+                schedule[name] = {
+                    "type": node_type,
+                    "triggerAtHour": int(items[0]["triggerAtHour"]),
+                    "triggerAtMinute": int(items[0].get("triggerAtMinute") or 0),
+                }
+        else:
+            minutes = template_poll_minutes(params)
+            if minutes:
+                schedule[name] = {"type": node_type, "intervalMinutes": minutes, "offsetSeconds": 0}
+    return schedule
+
+
+class LoadHistogram:
+    def __init__(self, bucket_seconds: int):
+        self.bucket_seconds = bucket_seconds
+        self.poll = [0.0] * (HOUR // bucket_seconds)
+        self.daily = [0] * DAY_MINUTES
+        self.workflows = 0
+
+    def add(self, schedule: dict) -> None:
+        self.workflows += 1
+        for config in schedule.values():
+            if "intervalMinutes" in config:
+                period = int(config["intervalMinutes"]) * 60
+                offset = int(config.get("offsetSeconds") or 0)
+                if period <= HOUR:
+                    for t in range(offset % period, HOUR, period):
+                        self.poll[t // self.bucket_seconds] += 1
+                else:
+                    # Fires once every few hours: spread its weight over the hour it lands in
+                    self.poll[(offset % HOUR) // self.bucket_seconds] += HOUR / period
+            elif "triggerAtHour" in config:
+                self.daily[int(config["triggerAtHour"]) * 60 + int(config.get("triggerAtMinute") or 0)] += 1
+
+
+def _summary(label: str, counts: list, unit: str) -> None:
+    total = sum(counts)
+    if not total:
+        print(f"{label}: no triggers")
+        return
+    mean = total / len(counts)
+    peak = max(counts)
+    busy = sum(1 for c in counts if c)
+    print(
+        f"{label}: {total:.0f} fires, peak {peak:.0f} per {unit} (bucket {counts.index(peak)}), "
+        f"mean {mean:.2f}, peak/mean {peak / mean:.1f}, {busy}/{len(counts)} buckets used"
+    )
+
+
+def _bars(counts: list, rows: int, label) -> None:
+    group = max(1, -(-len(counts) // rows))
+    sums = [sum(counts[i:i + group]) for i in range(0, len(counts), group)]
+    top = max(sums) or 1
+    for i, value in enumerate(sums):
+        print(f"  {label(i * group):>8} {value:>9.0f} {'#' * round(50 * value / top)}")
+
+
+def _from_db(hist: LoadHistogram) -> None:
+    from database.db import sb
+
+    last_id = 0
+    while True:
+        res = (
+            sb.table("workflows")
+            .select("id,user_id,template_id,workflow_config")
+            .eq("status", "active")
+            .gt("id", last_id)
+            .order("id")
+            .limit(PAGE_SIZE)
+            .execute()
+        )
+        rows = res.data or []
+        for row in rows:
+            schedule = (row.get("workflow_config") or {}).get("schedule")
+            hist.add(schedule if schedule else _default_schedule(row["template_id"]))
+        if len(rows) < PAGE_SIZE:
+            return
+        last_id = rows[-1]["id"]
+
+
+def _simulate(hist: LoadHistogram, tenants: int, unstaggered: bool) -> None:
+    for template_id in templates.ids():
+        spec, tpl, _ = templates.get(template_id)
+        default = _default_schedule(template_id)
+        for i in range(tenants):
+            if unstaggered:
+                hist.add(default)
+            else:
+                hist.add(plan_schedule(f"tenant-{i:07d}", template_id, tpl, spec.schedule_tier)[1])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--simulate", type=int, default=0, help="plan N synthetic tenants per template instead of reading Supabase")
+    ap.add_argument("--unstaggered", action="store_true", help="with --simulate, use the templates' own trigger times")
+    ap.add_argument("--bucket", type=int, default=10, help="poll histogram bucket in seconds (must divide 3600)")
+    ap.add_argument("--rows", type=int, default=30, help="rows per bar chart")
+    args = ap.parse_args()
+    if args.bucket <= 0 or HOUR % args.bucket:
+        ap.error("--bucket must divide 3600")
+
+    hist = LoadHistogram(args.bucket)
+    if args.simulate:
+        _simulate(hist, args.simulate, args.unstaggered)
+    else:
+        _from_db(hist)
+
+    print(f"{hist.workflows} workflows")
+    _summary("Poll fires per hour", hist.poll, f"{args.bucket}s")
+    _bars(hist.poll, args.rows, lambda b: f"{b * args.bucket // 60:02d}:{b * args.bucket % 60:02d}")
+    _summary("Scheduled runs per day", hist.daily, "minute")
+    start = next((i for i, c in enumerate(hist.daily) if c), 0)
+    end = max((i for i, c in enumerate(hist.daily) if c), default=0) + 1
+    if end > start:
+        _bars(hist.daily[start:end], args.rows, lambda m: f"{(start + m) // 60:02d}:{(start + m) % 60:02d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# workflows/bulk.py
+# Provision many (user, template) pairs in one call, e.g. when onboarding an
+# org. Token rows are fetched in batched selects, each user's Gmail credential
+# is created once and reused by all of their templates, installs run with
+# bounded concurrency, and the `workflows` rows are inserted in batches of
+# BULK_RECORD_BATCH_SIZE as installs finish. Results are produced as an async
+# stream of dicts; an install's line is sent once its row is recorded (or
+# its batch failed and was rolled back), so each pair gets exactly one line.
+import os
+import asyncio
+import logging
+
+from database.integrations import get_google_integrations
+from workflows.catalog import templates
+from workflows.template_registry import UnknownTemplate
+from workflows.provisioning import ensure_gmail_cred, insert_workflow_rows, provision_template
+from workflows.saga import delete_n8n_resources
+
+logger = logging.getLogger(__name__)
+
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", "1000"))
+BULK_MAX_CONCURRENCY = int(os.environ.get("BULK_MAX_CONCURRENCY", "8"))
+BULK_RECORD_BATCH_SIZE = int(os.environ.get("BULK_RECORD_BATCH_SIZE", "500"))
+
+_DONE = object()
+
+
+def _item(user_id: str, template_id: str, status: str, **extra) -> dict:
+    return {"type": "item", "userId": user_id, "templateId": template_id, "status": status, **extra}
+
+
+async def _run(pairs: list, concurrency: int, out: asyncio.Queue) -> None:
+    summary = {
+        "type": "summary", "requested": len(pairs), "provisioned": 0, "failed": 0, "recorded": 0, "rolledBack": 0,
+    }
+
+    todo = []
+    for user_id, template_id in pairs:
+        try:
+            templates.get(template_id)
+        except UnknownTemplate:
+            summary["failed"] += 1
+            await out.put(_item(user_id, template_id, "failed", error=f"Unknown template ID: {template_id}"))
+            continue
+        todo.append((user_id, template_id))
+
+    integrations = await get_google_integrations([user_id for user_id, _ in todo])
+
+    # One Gmail credential per user, shared by all of that user's templates
+    gmail_tasks = {}
+
+    def shared_gmail(user_id: str, integ_row: dict, shard: str):
+        # A user's templates all land on the user's shard
+        task = gmail_tasks.get(user_id)
+        if task is None:
+            task = gmail_tasks[user_id] = asyncio.ensure_future(ensure_gmail_cred(user_id, integ_row, shard))
+        return asyncio.shield(task)
+
+    sem = asyncio.Semaphore(concurrency)
+    # (result line, workflows row) of installs waiting for their batch insert
+    pending = []
+    flushing = asyncio.Lock()
+
+    async def record(batch: list) -> None:
+        try:
+            await insert_workflow_rows([row for _, row in batch])
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+            logger.error(f"Bulk record of {len(batch)} workflows failed, rolling them back: {error}")
+            # Unrecorded workflows would run untracked; delete them so a retry starts clean
+            by_shard = {}
+            for _, row in batch:
+                by_shard.setdefault(row["n8n_shard"], []).append(row["n8n_workflow_id"])
+            for shard, wids in by_shard.items():
+                deleted, _ = await delete_n8n_resources(shard, workflow_ids=wids)
+                summary["rolledBack"] += deleted
+            summary["failed"] += len(batch)
+            for line, _ in batch:
+                await out.put(_item(
+                    line["userId"], line["templateId"], "failed", workflowId=line["workflowId"], error=error
+                ))
+            return
+        summary["provisioned"] += len(batch)
+        summary["recorded"] += len(batch)
+        for line, _ in batch:
+            await out.put(line)
+
+    async def flush(final: bool = False) -> None:
+        async with flushing:
+            while pending and (final or len(pending) >= BULK_RECORD_BATCH_SIZE):
+                batch = pending[:BULK_RECORD_BATCH_SIZE]
+                del pending[:len(batch)]
+                await record(batch)
+
+    async def one(user_id: str, template_id: str) -> None:
+        integ_row = integrations.get(user_id)
+        if integ_row is None:
+            summary["failed"] += 1
+            await out.put(_item(user_id, template_id, "needsAuth", error="No Google integration for user"))
+            return
+        async with sem:
+            try:
+                result = await provision_template(
+                    user_id, template_id, integ_row, providers={"gmail": shared_gmail}, record=False
+                )
+            except Exception as e:
+                summary["failed"] += 1
+                error = getattr(e, "detail", None) or str(e)
+                logger.error(f"Bulk install failed user={user_id} template={template_id}: {error}")
+                await out.put(_item(user_id, template_id, "failed", error=error))
+                return
+        line = _item(
+            user_id,
+            template_id,
+            "provisioned",
+            workflowId=result["workflowId"],
+            templateVersion=result.get("templateVersion"),
+            totalMs=result["timing"]["totalMs"],
+        )
+        pending.append((line, result["row"]))
+        await flush()
+
+    await asyncio.gather(*(one(user_id, template_id) for user_id, template_id in todo))
+    await flush(final=True)
+
+    await out.put(summary)
+
+
+async def bulk_provision(pairs: list, concurrency: int = BULK_MAX_CONCURRENCY):
+    """Yield one result per distinct (user_id, template_id) pair, then a summary.
+
+    The work runs in its own task, so a client that stops reading does not
+    leave provisioned workflows unrecorded.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    concurrency = max(1, min(concurrency, BULK_MAX_CONCURRENCY))
+    out = asyncio.Queue()
+
+    async def runner():
+        try:
+            await _run(pairs, concurrency, out)
+        except Exception as e:
+            logger.error(f"Bulk provisioning aborted: {e}")
+            await out.put({"type": "error", "error": getattr(e, "detail", None) or str(e)})
+        finally:
+            await out.put(_DONE)
+
+    task = asyncio.create_task(runner())
+    while True:
+        line = await out.get()
+        if line is _DONE:
+            break
+        yield line
+    await task
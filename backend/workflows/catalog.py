@@ -0,0 +1,34 @@
+# workflows/catalog.py
+# Installable templates. Adding a template means dropping its JSON export into
+# templates/ and registering it here.
+from workflows.template_registry import TemplateSpec, templates
+
+templates.register(TemplateSpec(
+    template_id="gmail-ai-responder",
+    filename="gmail_ai_responder.json",
+    description="Auto provisioned Gmail AI responder",
+    credentials=("gmail", "openai", "gemini"),
+    schedule_tier="realtime",
+))
+
+templates.register(TemplateSpec(
+    template_id="gmail-summary",
+    filename="gmail_summary.json",
+    description="Auto provisioned Gmail summary agent",
+))
+
+templates.register(TemplateSpec(
+    template_id="gmail-ai-labelling",
+    filename="gmail_ai_labelling.json",
+    description="Auto provisioned Gmail AI Labelling Agent",
+    schedule_tier="standard",
+))
+
+# The WhatsApp/Airtable nodes still reference the template author's credentials;
+# stays hidden until per-tenant provisioning exists for those credential types.
+templates.register(TemplateSpec(
+    template_id="gmail-via-whatsapp",
+    filename="gmail_viaWhatsApp.json",
+    description="Auto provisioned Gmail assistant via WhatsApp",
+    enabled=False,
+))
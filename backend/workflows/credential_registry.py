@@ -0,0 +1,204 @@
+# workflows/credential_registry.py
+# Platform-wide secrets (OPENAI_API_KEY, GEMINI_API_KEY) are the same for every
+# tenant, so they only need to exist once per n8n shard. The registry maps each
+# logical secret ("slot") on a shard to a single n8n credential, keyed by a
+# fingerprint of the secret material, with an in-process LRU in front of the
+# Supabase mapping.
+import os
+import hmac
+import json
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import httpx
+
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+from n8n.common import N8N_KEY
+from n8n.n8n_async_client import get_async_client
+from n8n.sharding import DEFAULT_SHARD
+from workflows.saga import delete_n8n_resources
+
+logger = logging.getLogger(__name__)
+
+SHARED_CREDENTIALS_TABLE = "n8n_shared_credentials"
+CREDENTIAL_REGISTRY_CACHE_SIZE = int(os.environ.get("CREDENTIAL_REGISTRY_CACHE_SIZE", "256"))
+# Keyed fingerprints so the stored value cannot be checked against guessed keys
+CREDENTIAL_FINGERPRINT_SECRET = os.environ.get("CREDENTIAL_FINGERPRINT_SECRET", N8N_KEY)
+
+
+def fingerprint(cred_type: str, data: dict) -> str:
+    material = cred_type + "\0" + json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hmac.new(
+        CREDENTIAL_FINGERPRINT_SECRET.encode("utf-8"),
+        material.encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
+
+
+class LRUCache:
+    """Small bounded mapping evicting the least recently used entry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key):
+        try:
+            self._data.move_to_end(key)
+            return self._data[key]
+        except KeyError:
+            return None
+
+    def put(self, key, value) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SharedCredentialRegistry:
+    def __init__(self, maxsize: int = CREDENTIAL_REGISTRY_CACHE_SIZE):
+        self._cache = LRUCache(maxsize)
+        self._locks = {}
+
+    async def ensure(self, slot: str, cred_type: str, data: dict, shard: str = DEFAULT_SHARD) -> dict:
+        """Return {"id", "name"} of the n8n credential holding `data` for `slot` on `shard`.
+
+        Creates it on first use. If `slot` is mapped to a credential with a
+        different fingerprint (the key was rotated) that credential is updated
+        in place so existing workflows pick up the new key.
+        """
+        fp = fingerprint(cred_type, data)
+        hit = self._cache.get((shard, cred_type, fp))
+        if hit:
+            return hit
+
+        # Serialise misses per slot so a burst of installs creates one credential
+        lock = self._locks.setdefault((slot, shard), asyncio.Lock())
+        async with lock:
+            hit = self._cache.get((shard, cred_type, fp))
+            if hit:
+                return hit
+
+            row = await self._load(slot, shard)
+            if row and row["fingerprint"] == fp and row["cred_type"] == cred_type:
+                cred = {"id": row["n8n_credential_id"], "name": row["name"]}
+            elif row:
+                cred = await self._rotate(slot, shard, row, cred_type, data, fp)
+            else:
+                cred = await self._create(slot, shard, cred_type, data, fp)
+
+            self._cache.put((shard, cred_type, fp), cred)
+            return cred
+
+    def invalidate(self) -> None:
+        self._cache = LRUCache(self._cache.maxsize)
+
+    async def _load(self, slot: str, shard: str):
+        sb = await get_async_sb()
+        res = await execute(
+            sb.table(SHARED_CREDENTIALS_TABLE).select("*").eq("slot", slot).eq("n8n_shard", shard).limit(1),
+            "supabase-select",
+        )
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase select error: {err}")
+        rows = get_data(res) or []
+        return rows[0] if rows else None
+
+    async def _create(self, slot: str, shard: str, cred_type: str, data: dict, fp: str) -> dict:
+        client = get_async_client(shard)
+        cred = await client.create_credential(f"{slot}-shared-{fp[:12]}", cred_type, data)
+        sb = await get_async_sb()
+        try:
+            res = await execute(
+                sb.table(SHARED_CREDENTIALS_TABLE).upsert(
+                    {
+                        "slot": slot,
+                        "n8n_shard": shard,
+                        "cred_type": cred_type,
+                        "fingerprint": fp,
+                        "n8n_credential_id": str(cred["id"]),
+                        "name": cred["name"],
+                    },
+                    on_conflict="slot,n8n_shard",
+                    ignore_duplicates=True,
+                ),
+                "supabase-upsert",
+            )
+            err = get_error(res)
+            if err:
+                raise RuntimeError(f"Supabase upsert error: {err}")
+        except Exception:
+            # Unregistered, so nothing would ever reuse or clean it up
+            await delete_n8n_resources(shard, credential_ids=[str(cred["id"])])
+            raise
+
+        # Another process may have registered the slot first; keep theirs
+        winner = await self._load(slot, shard)
+        if winner and winner["n8n_credential_id"] != str(cred["id"]):
+            logger.info(f"Shared credential for {slot} registered concurrently, dropping duplicate {cred['id']}")
+            await delete_n8n_resources(shard, credential_ids=[str(cred["id"])], reason="duplicate")
+            return {"id": winner["n8n_credential_id"], "name": winner["name"]}
+
+        logger.info(f"Registered shared credential slot={slot} shard={shard} id={cred['id']}")
+        return {"id": str(cred["id"]), "name": cred["name"]}
+
+    async def _rotate(self, slot: str, shard: str, row: dict, cred_type: str, data: dict, fp: str) -> dict:
+        logger.info(
+            f"Secret for shared credential slot={slot} shard={shard} changed, "
+            f"replacing credential {row['n8n_credential_id']}"
+        )
+        name = f"{slot}-shared-{fp[:12]}"
+        client = get_async_client(shard)
+        created = False
+        try:
+            cred = await client.update_credential(row["n8n_credential_id"], name, cred_type, data)
+        except httpx.HTTPStatusError as e:
+            # Deleted in n8n, or an n8n without credential PATCH: fall back to a new one
+            logger.warning(f"In-place update of credential {row['n8n_credential_id']} failed ({e}); creating a new one")
+            cred = await client.create_credential(name, cred_type, data)
+            created = True
+
+        sb = await get_async_sb()
+        # Compare-and-set on the old fingerprint so two rotating processes do not clobber each other
+        try:
+            res = await execute(
+                sb.table(SHARED_CREDENTIALS_TABLE).update(
+                    {
+                        "cred_type": cred_type,
+                        "fingerprint": fp,
+                        "n8n_credential_id": str(cred["id"]),
+                        "name": cred["name"],
+                        "updated_at": datetime.now(timezone.utc).isoformat(),
+                    }
+                ).eq("slot", slot).eq("n8n_shard", shard).eq("fingerprint", row["fingerprint"]),
+                "supabase-update",
+            )
+            err = get_error(res)
+            if err:
+                raise RuntimeError(f"Supabase update error: {err}")
+        except Exception:
+            if created:
+                await delete_n8n_resources(shard, credential_ids=[str(cred["id"])])
+            raise
+        if not get_data(res):
+            winner = await self._load(slot, shard)
+            if winner:
+                if created and winner["n8n_credential_id"] != str(cred["id"]):
+                    await delete_n8n_resources(shard, credential_ids=[str(cred["id"])], reason="duplicate")
+                return {"id": winner["n8n_credential_id"], "name": winner["name"]}
+        return {"id": str(cred["id"]), "name": cred["name"]}
+
+
+shared_credentials = SharedCredentialRegistry()
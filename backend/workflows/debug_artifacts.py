@@ -0,0 +1,141 @@
+# workflows/debug_artifacts.py
+# Optional dumps of the workflow JSON sent to n8n, for debugging installs.
+# Capture is sampled, files are written by a background thread, and the output
+# directory is a bounded ring buffer (oldest files are deleted first).
+import os
+import re
+import json
+import time
+import queue
+import logging
+import itertools
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# off | sample | always
+DEBUG_ARTIFACTS_MODE = os.environ.get("DEBUG_ARTIFACTS_MODE", "off").lower()
+# In sample mode, capture one install out of N
+DEBUG_ARTIFACTS_SAMPLE_N = int(os.environ.get("DEBUG_ARTIFACTS_SAMPLE_N", "100"))
+DEBUG_ARTIFACTS_DIR = os.environ.get("DEBUG_ARTIFACTS_DIR", "debug_artifacts")
+DEBUG_ARTIFACTS_MAX_FILES = int(os.environ.get("DEBUG_ARTIFACTS_MAX_FILES", "200"))
+DEBUG_ARTIFACTS_MAX_BYTES = int(os.environ.get("DEBUG_ARTIFACTS_MAX_BYTES", str(50 * 1024 * 1024)))
+DEBUG_ARTIFACTS_QUEUE_SIZE = int(os.environ.get("DEBUG_ARTIFACTS_QUEUE_SIZE", "64"))
+
+_STOP = object()
+
+
+class DebugArtifactWriter:
+    def __init__(
+        self,
+        mode: str = DEBUG_ARTIFACTS_MODE,
+        sample_n: int = DEBUG_ARTIFACTS_SAMPLE_N,
+        directory: str = DEBUG_ARTIFACTS_DIR,
+        max_files: int = DEBUG_ARTIFACTS_MAX_FILES,
+        max_bytes: int = DEBUG_ARTIFACTS_MAX_BYTES,
+        queue_size: int = DEBUG_ARTIFACTS_QUEUE_SIZE,
+    ):
+        if mode not in ("off", "sample", "always"):
+            logger.warning(f"Unknown DEBUG_ARTIFACTS_MODE={mode!r}, disabling debug artifacts")
+            mode = "off"
+        self.mode = mode
+        self.sample_n = max(1, sample_n)
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.dropped = 0
+
+        self._counter = itertools.count()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._files = deque()  # (path, size), oldest first
+        self._total_bytes = 0
+
+    def should_capture(self) -> bool:
+        if self.mode == "always":
+            return True
+        if self.mode == "sample":
+            return next(self._counter) % self.sample_n == 0
+        return False
+
+    def submit(self, name: str, body: bytes, meta: dict = None) -> bool:
+        """Queue an already serialised workflow body for writing.
+
+        Never blocks: when the writer falls behind the artifact is dropped.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((name, body, meta or {}))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="debug-artifacts", daemon=True)
+                self._thread.start()
+
+    def _scan_existing(self):
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(path), path, os.path.getsize(path)))
+                except OSError:
+                    pass
+        for _, path, size in sorted(entries):
+            self._files.append((path, size))
+            self._total_bytes += size
+
+    def _run(self):
+        try:
+            self._scan_existing()
+        except OSError as e:
+            logger.error(f"Debug artifact directory {self.directory} unusable: {e}")
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            try:
+                self._write(*item)
+            except Exception as e:
+                logger.error(f"Failed to save debug artifact: {e}")
+
+    def _write(self, name: str, body: bytes, meta: dict):
+        doc = {"meta": meta, "workflow": json.loads(body)}
+        data = json.dumps(doc, indent=2, ensure_ascii=False).encode("utf-8")
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        path = os.path.join(self.directory, f"{int(time.time() * 1000)}_{safe_name}.json")
+        with open(path, "wb") as f:
+            f.write(data)
+        self._files.append((path, len(data)))
+        self._total_bytes += len(data)
+        logger.debug(f"Saved debug artifact {path} credential slots={meta.get('credentialSlots')}")
+        self._prune()
+
+    def _prune(self):
+        while self._files and (len(self._files) > self.max_files or self._total_bytes > self.max_bytes):
+            path, size = self._files.popleft()
+            self._total_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+debug_artifacts = DebugArtifactWriter()
@@ -0,0 +1,364 @@
+# workflows/execution_stats.py
+# Per-workflow, per-hour execution rollups (count, failures, duration
+# histogram) in workflow_execution_stats, so success rates and runtimes
+# never need n8n's execution API per workflow. Per shard, each pass:
+#   1. pages through n8n's execution list (newest first, without run data)
+#      back to the shard's watermark in sync_watermarks (the highest execution
+#      id already counted), folding each finished execution into in-memory
+#      rollups keyed by (n8n workflow id, hour started),
+#   2. hands them to the ingest_execution_stats SQL function (migration 008),
+#      which moves the watermark with a compare-and-set and adds the rollups
+#      into their rows in one transaction. A range is thereby counted exactly
+#      once, whether passes race, fail halfway or are retried.
+# An execution still new, running or waiting holds the watermark below it, so
+# it is counted once it finishes; one pending longer than
+# EXECUTION_STATS_MAX_PENDING_SECONDS (by startedAt, else createdAt, else
+# since a pass first saw it) no longer holds anything back and is never
+# counted. Finished executions without stoppedAt (e.g. crashed) count with
+# an unknown duration. Durations are kept as fixed log-spaced histograms,
+# which merge by adding counts; percentiles are interpolated within a bucket.
+import os
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+from database.watermarks import get_watermark
+from n8n.n8n_async_client import get_async_client
+from n8n.sharding import SHARDS
+from observability.metrics import EXECUTIONS_INGESTED
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_STATS_TABLE = "workflow_execution_stats"
+EXECUTION_STATS_ENABLED = os.environ.get("EXECUTION_STATS_ENABLED", "true").lower() in ("1", "true", "yes")
+EXECUTION_STATS_INTERVAL_SECONDS = float(os.environ.get("EXECUTION_STATS_INTERVAL_SECONDS", "300"))
+# A shard without a watermark starts from its newest pages only
+EXECUTION_STATS_BOOTSTRAP_PAGES = int(os.environ.get("EXECUTION_STATS_BOOTSTRAP_PAGES", "20"))
+EXECUTION_STATS_MAX_PENDING_SECONDS = float(os.environ.get("EXECUTION_STATS_MAX_PENDING_SECONDS", "21600"))
+# n8n workflow ids per select of their workflows rows
+EXECUTION_STATS_LOOKUP_BATCH = int(os.environ.get("EXECUTION_STATS_LOOKUP_BATCH", "500"))
+EXECUTION_STATS_MAX_HOURS = 24 * 30
+
+# Upper bounds (ms) of the duration histogram buckets; the last is open-ended
+DURATION_BUCKETS_MS = (
+    50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, 300000, 600000, 1800000, None,
+)
+FAILED_STATUSES = ("error", "crashed")
+PENDING_STATUSES = ("new", "running", "waiting")
+
+
+def _parse(ts: str):
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")) if ts else None
+    except ValueError:
+        return None
+
+
+def _hour(ts: datetime) -> str:
+    # Same text Postgres returns for a timestamptz, so rows match on read back
+    return ts.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:00:00+00:00")
+
+
+def _bucket(duration_ms: int) -> int:
+    for i, bound in enumerate(DURATION_BUCKETS_MS):
+        if bound is None or duration_ms <= bound:
+            return i
+
+
+def percentile(buckets: list, q: float, max_ms: int):
+    """Estimate the q-quantile (0..1) of a duration histogram, interpolating within its bucket."""
+    total = sum(buckets)
+    if not total:
+        return None
+    rank, seen = q * total, 0
+    for i, n in enumerate(buckets):
+        if n and seen + n >= rank:
+            lower = DURATION_BUCKETS_MS[i - 1] if i else 0
+            upper = DURATION_BUCKETS_MS[i] or max_ms
+            return int(min(lower + (upper - lower) * (rank - seen) / n, max_ms))
+        seen += n
+    return max_ms
+
+
+class Rollup:
+    """Execution counts and duration histogram of one workflow in one hour.
+
+    Executions of unknown duration count in `executions` but not in the
+    duration fields, so sum(buckets) is the number with a duration.
+    """
+
+    __slots__ = ("executions", "failures", "duration_sum_ms", "duration_max_ms", "buckets")
+
+    def __init__(self):
+        self.executions = 0
+        self.failures = 0
+        self.duration_sum_ms = 0
+        self.duration_max_ms = 0
+        self.buckets = [0] * len(DURATION_BUCKETS_MS)
+
+    def add(self, failed: bool, duration_ms: int = None) -> None:
+        self.executions += 1
+        self.failures += failed
+        if duration_ms is None:
+            return
+        self.duration_sum_ms += duration_ms
+        self.duration_max_ms = max(self.duration_max_ms, duration_ms)
+        self.buckets[_bucket(duration_ms)] += 1
+
+    def merge(self, row: dict) -> None:
+        """Add a stored rollup row (or another rollup's as_row()) into this one."""
+        self.executions += row.get("executions") or 0
+        self.failures += row.get("failures") or 0
+        self.duration_sum_ms += row.get("duration_sum_ms") or 0
+        self.duration_max_ms = max(self.duration_max_ms, row.get("duration_max_ms") or 0)
+        for i, n in enumerate((row.get("duration_buckets") or [])[:len(self.buckets)]):
+            self.buckets[i] += n
+
+    def as_row(self) -> dict:
+        return {
+            "executions": self.executions,
+            "failures": self.failures,
+            "duration_sum_ms": self.duration_sum_ms,
+            "duration_max_ms": self.duration_max_ms,
+            "duration_buckets": self.buckets,
+        }
+
+    def summary(self) -> dict:
+        timed = sum(self.buckets)
+        return {
+            "executions": self.executions,
+            "failures": self.failures,
+            "successRate": round(1 - self.failures / self.executions, 4) if self.executions else None,
+            "avgMs": self.duration_sum_ms // timed if timed else None,
+            "p50Ms": percentile(self.buckets, 0.50, self.duration_max_ms),
+            "p95Ms": percentile(self.buckets, 0.95, self.duration_max_ms),
+            "p99Ms": percentile(self.buckets, 0.99, self.duration_max_ms),
+            "maxMs": self.duration_max_ms if timed else None,
+        }
+
+
+def _watermark_key(shard: str) -> str:
+    return f"executions:{shard}"
+
+
+class ExecutionStatsIngester:
+    def __init__(
+        self,
+        interval: float = EXECUTION_STATS_INTERVAL_SECONDS,
+        bootstrap_pages: int = EXECUTION_STATS_BOOTSTRAP_PAGES,
+        batch_size: int = EXECUTION_STATS_LOOKUP_BATCH,
+    ):
+        self.interval = interval
+        self.bootstrap_pages = bootstrap_pages
+        self.batch_size = batch_size
+        # shard -> {execution id: monotonic time first seen} of pending executions without any timestamp
+        self._undated = {}
+        self._task = None
+
+    def start(self) -> None:
+        if EXECUTION_STATS_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Execution stats tick failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def tick(self) -> dict:
+        """Ingest new executions on every shard. Returns {shard: counts}."""
+        names = list(SHARDS)
+        results = await asyncio.gather(*(self.ingest_shard(name) for name in names), return_exceptions=True)
+        out = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Execution stats ingest on shard {name} failed: {result}")
+                out[name] = {"error": str(result)}
+            else:
+                out[name] = result
+        return out
+
+    async def ingest_shard(self, shard: str) -> dict:
+        t0 = time.perf_counter()
+        key = _watermark_key(shard)
+        since = await get_watermark(key)
+        since_id = int(since) if since else None
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=EXECUTION_STATS_MAX_PENDING_SECONDS)
+        now, undated_seen, undated = time.monotonic(), self._undated.get(shard, {}), {}
+
+        rollups, through, stats = {}, None, {"executions": 0, "pending": 0, "rows": 0, "unowned": 0}
+        async for page in self._pages(shard, None if since_id is not None else self.bootstrap_pages):
+            for ex in page:
+                eid = int(ex["id"])
+                if since_id is not None and eid <= since_id:
+                    break
+                if through is None:
+                    through = eid
+                status = ex.get("status")
+                started, stopped = _parse(ex.get("startedAt")), _parse(ex.get("stoppedAt"))
+                began = started or _parse(ex.get("createdAt"))
+                if status in PENDING_STATUSES:
+                    if began is not None:
+                        stale = began < stale_before
+                    else:
+                        undated[eid] = undated_seen.get(eid, now)
+                        stale = now - undated[eid] >= EXECUTION_STATS_MAX_PENDING_SECONDS
+                    if stale:
+                        continue
+                    # Everything newer waits until this one finishes: drop it and count it next pass
+                    rollups.clear()
+                    through = eid - 1
+                    stats["pending"] += 1
+                    continue
+                failed = status in FAILED_STATUSES if status else not ex.get("finished")
+                # A crashed execution may never have stopped (or started): counted, duration unknown
+                duration_ms = max(0, int((stopped - started).total_seconds() * 1000)) if started and stopped else None
+                hour = _hour(began or stopped or datetime.now(timezone.utc))
+                rollups.setdefault((str(ex.get("workflowId")), hour), Rollup()).add(failed, duration_ms)
+            if since_id is not None and page and int(page[-1]["id"]) <= since_id:
+                break
+        self._undated[shard] = undated
+
+        if through is None or through == since_id:
+            return stats
+        stats["executions"] = sum(r.executions for r in rollups.values())
+        owners = await self._owners(shard, {wid for wid, _ in rollups})
+        rows = []
+        for (wid, hour), rollup in sorted(rollups.items()):
+            if wid not in owners:
+                stats["unowned"] += rollup.executions
+                continue
+            workflow_id, user_id = owners[wid]
+            rows.append({
+                "n8n_shard": shard,
+                "n8n_workflow_id": wid,
+                "hour": hour,
+                "workflow_id": workflow_id,
+                "user_id": user_id,
+                **rollup.as_row(),
+            })
+        written = await self._commit(key, since, str(through), rows)
+        if written is None:
+            logger.info(f"Execution stats on shard {shard}: range after {since} already counted by another pass")
+            return {**stats, "executions": 0, "unowned": 0}
+        stats["rows"] = written
+        EXECUTIONS_INGESTED.labels("counted").inc(stats["executions"] - stats["unowned"])
+        EXECUTIONS_INGESTED.labels("unowned").inc(stats["unowned"])
+        if stats["executions"]:
+            logger.info(
+                f"Execution stats on shard {shard}: {stats} up to execution {through} "
+                f"in {time.perf_counter() - t0:.2f}s"
+            )
+        return stats
+
+    async def _pages(self, shard: str, max_pages: int = None):
+        client = get_async_client(shard)
+        cursor, pages = None, 0
+        while max_pages is None or pages < max_pages:
+            page, cursor = await client.list_executions(cursor=cursor)
+            pages += 1
+            yield page
+            if not cursor:
+                return
+
+    async def _commit(self, key: str, since, through: str, rows: list):
+        """Move watermark `key` from `since` to `through` and add `rows` into their rollups, atomically.
+
+        Returns the rows written, or None if the watermark no longer held `since`.
+        """
+        sb = await get_async_sb()
+        res = await execute(
+            sb.rpc(
+                "ingest_execution_stats",
+                {"watermark_name": key, "since_id": since, "through_id": through, "rollups": rows},
+            ),
+            "supabase-rpc",
+        )
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase rpc error: {err}")
+        written = get_data(res)
+        # A null result can arrive as an empty body
+        return written if isinstance(written, int) else None
+
+    async def _owners(self, shard: str, wids: set) -> dict:
+        """{n8n workflow id: (workflows.id, user_id)} for the tenant workflows among `wids`."""
+        sb = await get_async_sb()
+        owners, wids = {}, sorted(wids)
+        for i in range(0, len(wids), self.batch_size):
+            res = await execute(
+                sb.table("workflows")
+                .select("id,user_id,n8n_workflow_id")
+                .eq("n8n_shard", shard)
+                .in_("n8n_workflow_id", wids[i:i + self.batch_size]),
+                "supabase-select",
+            )
+            err = get_error(res)
+            if err:
+                raise RuntimeError(f"Supabase select error: {err}")
+            for row in get_data(res) or []:
+                owners[str(row["n8n_workflow_id"])] = (row["id"], row["user_id"])
+        return owners
+
+
+async def _user_rows(user_id: str, since: str, page_size: int = 1000):
+    sb = await get_async_sb()
+    offset = 0
+    while True:
+        res = await execute(
+            sb.table(EXECUTION_STATS_TABLE)
+            .select("workflow_id,hour,executions,failures,duration_sum_ms,duration_max_ms,duration_buckets")
+            .eq("user_id", user_id)
+            .gte("hour", since)
+            .order("hour")
+            .order("n8n_shard")
+            .order("n8n_workflow_id")
+            .range(offset, offset + page_size - 1),
+            "supabase-select",
+        )
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase select error: {err}")
+        rows = get_data(res) or []
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        offset += page_size
+
+
+async def user_execution_stats(user_id: str, hours: int) -> list:
+    """The user's rollups over the last `hours`, summed per workflow with hourly detail."""
+    per_workflow = {}
+    async for row in _user_rows(user_id, _hour(datetime.now(timezone.utc) - timedelta(hours=hours - 1))):
+        total, hourly = per_workflow.setdefault(row["workflow_id"], (Rollup(), []))
+        # A rebalanced workflow has rows under both shards for the same hour
+        if hourly and hourly[-1][0] == row["hour"]:
+            hourly[-1][1].merge(row)
+        else:
+            hour = Rollup()
+            hour.merge(row)
+            hourly.append((row["hour"], hour))
+        total.merge(row)
+    return [
+        {
+            "workflowId": workflow_id,
+            **total.summary(),
+            "hours": [{"hour": hour, **rollup.summary()} for hour, rollup in hourly],
+        }
+        for workflow_id, (total, hourly) in per_workflow.items()
+    ]
+
+
+execution_ingester = ExecutionStatsIngester()
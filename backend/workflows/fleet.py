@@ -0,0 +1,272 @@
+# workflows/fleet.py
+# Fleet-wide load shedding: pause (deactivate in n8n) or resume (re-activate)
+# every tenant workflow matching a selector of templates, shards and tenant
+# tiers (profiles.subscription_status). An operation is a fleet_operations
+# row holding its selector, progress cursor (the last `workflows.id` done)
+# and counters; jobs/fleet_jobs.py runs it in time-boxed slices that
+# checkpoint after every page, so a crashed or cancelled operation continues
+# from its cursor instead of starting over.
+#
+# Rows are read keyset-paged in id order. Per page the n8n calls run with
+# bounded concurrency (behind each shard's n8n admission control), then the
+# rows that succeeded move to their new status in one bulk update. Rows
+# whose workflow no longer exists in n8n are marked "deleted".
+#
+# Calls n8n did not take (open breaker, admission timeout, 429/5xx, network
+# errors) do not count against a row: the slice records what it settled and
+# raises without moving the cursor, so the job queue retries the page with
+# backoff once n8n recovers. Other errors are counted per row and skipped;
+# an operation that finishes with such failures ends "failed" with its
+# cursor reset, so continuing it rescans for just the rows still in the
+# source status; `failed` counts the rows that failed in the current scan.
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+import httpx
+from fastapi import HTTPException
+
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+from n8n.admission import RETRYABLE_STATUSES, AdmissionTimeout, CircuitOpenError
+from n8n.n8n_async_client import get_async_client
+from n8n.sharding import SHARDS
+from observability.metrics import FLEET_WORKFLOW_ACTIONS
+
+logger = logging.getLogger(__name__)
+
+FLEET_OPERATIONS_TABLE = "fleet_operations"
+FLEET_PAGE_SIZE = int(os.environ.get("FLEET_PAGE_SIZE", "200"))
+FLEET_MAX_CONCURRENCY = int(os.environ.get("FLEET_MAX_CONCURRENCY", "16"))
+
+PAUSE = "pause"
+RESUME = "resume"
+# action -> (status of the rows it selects, status they end up in)
+TRANSITIONS = {PAUSE: ("active", "paused"), RESUME: ("paused", "active")}
+# Statuses a row may have reached meanwhile that the action still settles: the
+# reconciler can see a workflow this pause deactivated and mark it inactive
+# before the row is updated, which would strand it outside any resume.
+ALSO_SETTLES = {PAUSE: ("inactive",), RESUME: ()}
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class FleetBackoff(RuntimeError):
+    """n8n shed part of a page; the page is retried from the last checkpoint."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _is_overload(exc: Exception) -> bool:
+    """The call was refused or lost before n8n handled it, so retrying later can succeed."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUSES
+    return isinstance(exc, (CircuitOpenError, AdmissionTimeout, httpx.TransportError))
+
+
+def validate_selector(selector: dict) -> dict:
+    """Normalise {"templateIds", "shards", "tiers", "all"}; an empty selector needs all=True."""
+    out = {k: sorted(set(selector.get(k) or [])) for k in ("templateIds", "shards", "tiers")}
+    unknown = [s for s in out["shards"] if s not in SHARDS]
+    if unknown:
+        raise HTTPException(400, f"Unknown shards: {unknown}")
+    if not any(out.values()) and not selector.get("all"):
+        raise HTTPException(400, "Select templateIds, shards or tiers, or set all=true for the whole fleet")
+    return out
+
+
+async def create_operation(action: str, selector: dict, concurrency: int) -> dict:
+    sb = await get_async_sb()
+    res = await execute(
+        sb.table(FLEET_OPERATIONS_TABLE).insert({
+            "action": action,
+            "selector": selector,
+            "concurrency": max(1, min(concurrency, FLEET_MAX_CONCURRENCY)),
+            "status": QUEUED,
+            "cursor": 0,
+        }),
+        "supabase-insert",
+    )
+    err = get_error(res)
+    if err:
+        raise HTTPException(500, f"Supabase insert error: {err}")
+    return get_data(res)[0]
+
+
+async def get_operation(op_id: str):
+    sb = await get_async_sb()
+    res = await execute(sb.table(FLEET_OPERATIONS_TABLE).select("*").eq("id", op_id).limit(1), "supabase-select")
+    err = get_error(res)
+    if err:
+        raise RuntimeError(f"Supabase select error: {err}")
+    rows = get_data(res) or []
+    return rows[0] if rows else None
+
+
+async def update_operation(op_id: str, fields: dict, expect_status=None):
+    """Update an operation, optionally only while its status is in `expect_status`.
+
+    Returns the updated row, or None if the status no longer matched.
+    """
+    sb = await get_async_sb()
+    q = sb.table(FLEET_OPERATIONS_TABLE).update({**fields, "updated_at": _now()}).eq("id", op_id)
+    if expect_status:
+        q = q.in_("status", list(expect_status))
+    res = await execute(q, "supabase-update")
+    err = get_error(res)
+    if err:
+        raise RuntimeError(f"Supabase update error: {err}")
+    rows = get_data(res) or []
+    return rows[0] if rows else None
+
+
+class FleetRunner:
+    def __init__(self, page_size: int = FLEET_PAGE_SIZE):
+        self.page_size = page_size
+
+    async def run_slice(self, op: dict, deadline: float) -> dict:
+        """Process pages of `op` until done, cancelled or `deadline` (loop time). Returns the op row."""
+        loop = asyncio.get_running_loop()
+        op_id = op["id"]
+        start = {"status": RUNNING}
+        if not op.get("cursor"):
+            # A scan (re)starting from the first row retries every earlier failure
+            start["failed"] = 0
+        op = await update_operation(op_id, start, expect_status=(QUEUED, RUNNING, FAILED))
+        if op is None:
+            # Cancelled or finished before this slice started
+            return await get_operation(op_id)
+        while loop.time() < deadline:
+            rows, last_id = await self._page(op)
+            if last_id is None:
+                return await self._finish(op)
+            counts = await self._apply(op, rows) if rows else {}
+            shed = counts.pop("shed", 0)
+            # A page n8n shed part of is redone from the same checkpoint
+            progress = {"cursor": op["cursor"] if shed else last_id, "error": counts.pop("error", op.get("error"))}
+            for key in ("processed", "changed", "missing", "failed"):
+                progress[key] = (op.get(key) or 0) + counts.get(key, 0)
+            # What the page settled is recorded either way; a cancelled operation stops here
+            op = await update_operation(op["id"], progress, expect_status=(RUNNING, CANCELLED))
+            if op is None or op["status"] != RUNNING:
+                logger.info(f"Fleet operation {op_id} stopped at workflow row {progress['cursor']}")
+                return op or await get_operation(op_id)
+            if shed:
+                raise FleetBackoff(
+                    f"n8n shed {shed} of {len(rows)} calls; retrying after workflow row {op['cursor']}"
+                )
+        return op
+
+    async def _finish(self, op: dict) -> dict:
+        if not op.get("failed"):
+            return await update_operation(op["id"], {"status": SUCCEEDED}, expect_status=(RUNNING,)) or op
+        # Rows that failed still have the source status; continuing rescans for just those
+        error = f"{op['failed']} workflows failed, continue to retry them; last error: {op.get('error')}"[:500]
+        logger.warning(f"Fleet operation {op['id']} finished with failures: {error}")
+        return await update_operation(
+            op["id"], {"status": FAILED, "cursor": 0, "error": error}, expect_status=(RUNNING,)
+        ) or op
+
+    async def _page(self, op: dict) -> tuple:
+        """Next page of matching rows after the cursor, and the id to checkpoint (None when done)."""
+        selector = op["selector"]
+        source, _ = TRANSITIONS[op["action"]]
+        sb = await get_async_sb()
+        q = (
+            sb.table("workflows")
+            .select("id,user_id,n8n_workflow_id,n8n_shard")
+            .eq("status", source)
+            .gt("id", op["cursor"] or 0)
+        )
+        if selector.get("templateIds"):
+            q = q.in_("template_id", selector["templateIds"])
+        if selector.get("shards"):
+            q = q.in_("n8n_shard", selector["shards"])
+        res = await execute(q.order("id").limit(self.page_size), "supabase-select")
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase select error: {err}")
+        rows = get_data(res) or []
+        if not rows:
+            return [], None
+        last_id = rows[-1]["id"]
+        if selector.get("tiers"):
+            tiers = await self._tiers({row["user_id"] for row in rows})
+            rows = [row for row in rows if tiers.get(row["user_id"], "free") in selector["tiers"]]
+        return rows, last_id
+
+    async def _tiers(self, user_ids: set) -> dict:
+        sb = await get_async_sb()
+        res = await execute(
+            sb.table("profiles").select("id,subscription_status").in_("id", list(user_ids)),
+            "supabase-select",
+        )
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase select error: {err}")
+        return {row["id"]: row.get("subscription_status") or "free" for row in get_data(res) or []}
+
+    async def _apply(self, op: dict, rows: list) -> dict:
+        action = op["action"]
+        source, target = TRANSITIONS[action]
+        sem = asyncio.Semaphore(op.get("concurrency") or 1)
+        done, missing, errors, shed = [], [], [], []
+
+        async def one(row):
+            client = get_async_client(row["n8n_shard"])
+            call = client.deactivate_workflow if action == PAUSE else client.activate_workflow
+            async with sem:
+                try:
+                    await call(row["n8n_workflow_id"])
+                    done.append(row)
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code == 404:
+                        missing.append((row, e))
+                    else:
+                        (shed if _is_overload(e) else errors).append((row, e))
+                except Exception as e:
+                    (shed if _is_overload(e) else errors).append((row, e))
+
+        await asyncio.gather(*(one(row) for row in rows))
+        changed = await self._set_status([row["id"] for row in done], (source, *ALSO_SETTLES[action]), target)
+        await self._set_status([row["id"] for row, _ in missing], (source,), "deleted")
+        FLEET_WORKFLOW_ACTIONS.labels(action, "ok").inc(len(done))
+        FLEET_WORKFLOW_ACTIONS.labels(action, "missing").inc(len(missing))
+        FLEET_WORKFLOW_ACTIONS.labels(action, "failed").inc(len(errors))
+        FLEET_WORKFLOW_ACTIONS.labels(action, "shed").inc(len(shed))
+        counts = {"processed": len(rows), "changed": changed, "missing": len(missing), "failed": len(errors)}
+        if shed:
+            # The page is redone, so only the rows settled now count as processed
+            counts.update(processed=len(done) + len(missing), failed=0, shed=len(shed))
+        if errors:
+            row, e = errors[-1]
+            counts["error"] = f"workflow {row['n8n_workflow_id']} on {row['n8n_shard']}: {e}"[:500]
+            logger.warning(f"Fleet {action}: {len(errors)}/{len(rows)} n8n calls failed, last: {counts['error']}")
+        return counts
+
+    async def _set_status(self, row_ids: list, sources: tuple, target: str) -> int:
+        if not row_ids:
+            return 0
+        sb = await get_async_sb()
+        # Conditioned on the source statuses so any other concurrent change (reconciler, user) wins
+        res = await execute(
+            sb.table("workflows")
+            .update({"status": target, "updated_at": _now()})
+            .in_("id", row_ids)
+            .in_("status", list(sources)),
+            "supabase-update",
+        )
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase update error: {err}")
+        return len(get_data(res) or [])
+
+
+fleet_runner = FleetRunner()
@@ -0,0 +1,224 @@
+# workflows/garbage_collector.py
+# Periodically deletes n8n resources that nothing owns: workflows without a
+# `workflows` row (an install that died between create and record, beyond
+# what its saga could roll back) and gmail-oauth2-*, openai-* and gemini-*
+# credentials that no n8n workflow uses and no registry maps (left by failed
+# installs, or the per-install credentials created before the registries).
+# Per shard, one pass:
+#   1. lists the shard's workflows and credentials from n8n by cursor,
+#   2. loads the workflow ids the shard's rows reference and the credential
+#      ids the registries map, in keyset-paged selects,
+#   3. deletes what is unowned and older than GC_MIN_AGE_SECONDS (so an
+#      install in flight is never collected) with bounded concurrency, at
+#      most GC_MAX_DELETES per pass.
+# Only workflows named after a catalog template are candidates, so workflows
+# built by hand in n8n are never touched.
+import os
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+from n8n.n8n_async_client import get_async_client
+from n8n.sharding import SHARDS
+from workflows.catalog import templates
+from workflows.credential_registry import SHARED_CREDENTIALS_TABLE
+from workflows.gmail_credentials import GMAIL_CREDENTIALS_TABLE
+from workflows.saga import delete_n8n_resources
+
+logger = logging.getLogger(__name__)
+
+GC_ENABLED = os.environ.get("GC_ENABLED", "true").lower() in ("1", "true", "yes")
+GC_INTERVAL_SECONDS = float(os.environ.get("GC_INTERVAL_SECONDS", "3600"))
+GC_MIN_AGE_SECONDS = float(os.environ.get("GC_MIN_AGE_SECONDS", "3600"))
+GC_MAX_DELETES = int(os.environ.get("GC_MAX_DELETES", "500"))
+GC_PAGE_SIZE = int(os.environ.get("GC_PAGE_SIZE", "1000"))
+# More orphans than this share of a shard's workflows means the rows were not
+# read from the right place; refuse rather than wipe the shard
+GC_MAX_ORPHAN_FRACTION = float(os.environ.get("GC_MAX_ORPHAN_FRACTION", "0.5"))
+GC_CREDENTIAL_PREFIXES = ("gmail-oauth2-", "openai-", "gemini-")
+
+
+def _iso(ts: datetime) -> str:
+    return ts.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _is_old(item: dict, cutoff: str) -> bool:
+    created = item.get("createdAt")
+    return bool(created) and created < cutoff
+
+
+class OrphanCollector:
+    def __init__(
+        self,
+        interval: float = GC_INTERVAL_SECONDS,
+        min_age: float = GC_MIN_AGE_SECONDS,
+        max_deletes: int = GC_MAX_DELETES,
+        page_size: int = GC_PAGE_SIZE,
+    ):
+        self.interval = interval
+        self.min_age = min_age
+        self.max_deletes = max_deletes
+        self.page_size = page_size
+        self._task = None
+
+    def start(self) -> None:
+        if GC_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error(f"Orphan collection failed: {e}")
+
+    async def collect(self, dry_run: bool = False) -> dict:
+        """One pass over every shard. Returns {shard: counts}."""
+        names = list(SHARDS)
+        results = await asyncio.gather(*(self.collect_shard(name, dry_run) for name in names), return_exceptions=True)
+        out = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Orphan collection on shard {name} failed: {result}")
+                out[name] = {"error": str(result)}
+            else:
+                out[name] = result
+        return out
+
+    async def collect_shard(self, shard: str, dry_run: bool = False) -> dict:
+        t0 = time.perf_counter()
+        cutoff = _iso(datetime.now(timezone.utc) - timedelta(seconds=self.min_age))
+        client = get_async_client(shard)
+
+        workflows = await self._n8n_list(client.list_workflows)
+        owned = await self._owned_workflow_ids(shard)
+        prefixes = tuple(f"{template_id}-" for template_id in templates.ids(include_disabled=True))
+        candidates = [wf for wf in workflows if (wf.get("name") or "").startswith(prefixes)]
+        orphan_wfs = [wf for wf in candidates if str(wf["id"]) not in owned and _is_old(wf, cutoff)]
+        if len(orphan_wfs) > 10 and len(orphan_wfs) > len(candidates) * GC_MAX_ORPHAN_FRACTION:
+            raise RuntimeError(
+                f"{len(orphan_wfs)}/{len(candidates)} template workflows have no row; not collecting"
+            )
+        doomed = {str(wf["id"]) for wf in orphan_wfs[:self.max_deletes]}
+
+        orphan_creds = await self._orphan_credentials(shard, client, workflows, doomed, cutoff)
+        credential_ids = orphan_creds[:max(0, self.max_deletes - len(doomed))]
+
+        stats = {
+            "orphanWorkflows": len(orphan_wfs),
+            "orphanCredentials": len(orphan_creds),
+            "deleted": 0,
+            "failed": 0,
+        }
+        if not dry_run and (doomed or credential_ids):
+            stats["deleted"], stats["failed"] = await delete_n8n_resources(
+                shard, workflow_ids=sorted(doomed), credential_ids=credential_ids, reason="gc"
+            )
+        if orphan_wfs or orphan_creds:
+            logger.info(
+                f"Orphan collection on shard {shard}{' (dry run)' if dry_run else ''}: {stats} "
+                f"in {time.perf_counter() - t0:.2f}s"
+            )
+        return stats
+
+    async def _orphan_credentials(self, shard: str, client, workflows: list, doomed: set, cutoff: str) -> list:
+        try:
+            credentials = await self._n8n_list(client.list_credentials)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in (404, 405):
+                raise
+            logger.info(f"n8n on shard {shard} cannot list credentials; skipping credential collection")
+            return []
+
+        used = set()
+        for wf in workflows:
+            if "nodes" not in wf:
+                # Without node data every credential would look unused
+                logger.warning(f"n8n on shard {shard} listed workflows without nodes; skipping credential collection")
+                return []
+            if str(wf["id"]) in doomed:
+                continue
+            for node in wf["nodes"] or []:
+                for ref in (node.get("credentials") or {}).values():
+                    if isinstance(ref, dict) and ref.get("id") is not None:
+                        used.add(str(ref["id"]))
+        used |= await self._registered_credential_ids(shard)
+
+        return [
+            str(cred["id"]) for cred in credentials
+            if (cred.get("name") or "").startswith(GC_CREDENTIAL_PREFIXES)
+            and str(cred["id"]) not in used
+            and _is_old(cred, cutoff)
+        ]
+
+    @staticmethod
+    async def _n8n_list(list_page) -> list:
+        items, cursor = [], None
+        while True:
+            page, cursor = await list_page(cursor=cursor)
+            items.extend(page)
+            if not cursor:
+                return items
+
+    async def _owned_workflow_ids(self, shard: str) -> set:
+        sb = await get_async_sb()
+        owned, last_id = set(), 0
+        while True:
+            res = await execute(
+                sb.table("workflows")
+                .select("id,n8n_workflow_id")
+                .eq("n8n_shard", shard)
+                .gt("id", last_id)
+                .order("id")
+                .limit(self.page_size),
+                "supabase-select",
+            )
+            err = get_error(res)
+            if err:
+                raise RuntimeError(f"Supabase select error: {err}")
+            rows = get_data(res) or []
+            owned.update(str(row["n8n_workflow_id"]) for row in rows)
+            if len(rows) < self.page_size:
+                return owned
+            last_id = rows[-1]["id"]
+
+    async def _registered_credential_ids(self, shard: str) -> set:
+        sb = await get_async_sb()
+        res = await execute(
+            sb.table(SHARED_CREDENTIALS_TABLE).select("n8n_credential_id").eq("n8n_shard", shard),
+            "supabase-select",
+        )
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase select error: {err}")
+        registered = {str(row["n8n_credential_id"]) for row in get_data(res) or []}
+
+        last_user = None
+        while True:
+            q = sb.table(GMAIL_CREDENTIALS_TABLE).select("user_id,n8n_credential_id").eq("n8n_shard", shard)
+            if last_user is not None:
+                q = q.gt("user_id", last_user)
+            res = await execute(q.order("user_id").limit(self.page_size), "supabase-select")
+            err = get_error(res)
+            if err:
+                raise RuntimeError(f"Supabase select error: {err}")
+            rows = get_data(res) or []
+            registered.update(str(row["n8n_credential_id"]) for row in rows)
+            if len(rows) < self.page_size:
+                return registered
+            last_user = rows[-1]["user_id"]
+
+
+orphan_collector = OrphanCollector()
@@ -0,0 +1,193 @@
+# workflows/gmail_credentials.py
+# One n8n Gmail credential per user (per shard), shared by all of the user's
+# workflows. The mapping lives in user_gmail_credentials with an in-process
+# LRU in front. The stored fingerprint is a keyed hash of the token data, so
+# an install with unchanged tokens costs no n8n call at all, and new tokens
+# (proactive refresh, re-consent) PATCH the credential in place instead of
+# adding another copy.
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+from n8n.common import _gmail_credential_data
+from n8n.n8n_async_client import upsert_gmail_credential
+from n8n.sharding import DEFAULT_SHARD
+from workflows.credential_registry import LRUCache, fingerprint
+from workflows.saga import delete_n8n_resources
+
+logger = logging.getLogger(__name__)
+
+GMAIL_CREDENTIALS_TABLE = "user_gmail_credentials"
+GMAIL_CREDENTIAL_CACHE_SIZE = int(os.environ.get("GMAIL_CREDENTIAL_CACHE_SIZE", "10000"))
+# Users per `in` filter in lookups
+GMAIL_CREDENTIAL_LOOKUP_BATCH = 200
+
+
+def credential_name(user_id: str) -> str:
+    return f"gmail-oauth2-{user_id}"
+
+
+class GmailCredentialRegistry:
+    def __init__(self, maxsize: int = GMAIL_CREDENTIAL_CACHE_SIZE):
+        self._cache = LRUCache(maxsize)
+        self._locks = {}
+
+    async def ensure(self, user_id: str, payload: dict, shard: str = DEFAULT_SHARD) -> dict:
+        """Return {"id", "name"} of the user's Gmail credential on `shard` holding `payload`.
+
+        `payload` is the credential payload (see provisioning.gmail_credential_payload).
+        Creates the credential on first use and updates it in place when the
+        token data changed.
+        """
+        fp = fingerprint("gmailOAuth2", _gmail_credential_data(payload))
+        key = (user_id, shard)
+        hit = self._cache.get(key)
+        if hit and hit["fingerprint"] == fp:
+            return {"id": hit["id"], "name": hit["name"]}
+
+        # Serialise per user so concurrent installs of several templates share one
+        # credential; entries are [lock, holders] and dropped when unused
+        slot = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                hit = self._cache.get(key) or await self._load(user_id, shard)
+                if hit and hit["fingerprint"] == fp:
+                    self._cache.put(key, hit)
+                    return {"id": hit["id"], "name": hit["name"]}
+                entry = await self._write(user_id, shard, payload, fp, hit)
+                self._cache.put(key, entry)
+                return {"id": entry["id"], "name": entry["name"]}
+        finally:
+            slot[1] -= 1
+            if not slot[1]:
+                self._locks.pop(key, None)
+
+    async def lookup_many(self, user_ids: list) -> list:
+        """Stored credentials of `user_ids`, as {"user_id", "shard", "id", "name", "fingerprint"}."""
+        sb = await get_async_sb()
+        found = []
+        for i in range(0, len(user_ids), GMAIL_CREDENTIAL_LOOKUP_BATCH):
+            res = await execute(
+                sb.table(GMAIL_CREDENTIALS_TABLE).select("*").in_("user_id", user_ids[i:i + GMAIL_CREDENTIAL_LOOKUP_BATCH]),
+                "supabase-select",
+            )
+            err = get_error(res)
+            if err:
+                raise RuntimeError(f"Supabase select error: {err}")
+            for row in get_data(res) or []:
+                found.append({"user_id": row["user_id"], "shard": row["n8n_shard"], **self._entry(row)})
+        return found
+
+    def forget(self, user_id: str, shard: str = DEFAULT_SHARD) -> None:
+        self._cache.pop((user_id, shard))
+
+    async def remove(self, user_id: str, shard: str) -> bool:
+        """Unregister and delete the user's Gmail credential on `shard`, e.g. once they moved off it.
+
+        Returns False if there was none. A credential n8n fails to delete is
+        unregistered either way, so the orphan collector removes it later.
+        """
+        current = await self._load(user_id, shard)
+        self.forget(user_id, shard)
+        if current is None:
+            return False
+        sb = await get_async_sb()
+        res = await execute(
+            sb.table(GMAIL_CREDENTIALS_TABLE)
+            .delete()
+            .eq("user_id", user_id)
+            .eq("n8n_shard", shard)
+            .eq("n8n_credential_id", current["id"]),
+            "supabase-delete",
+        )
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase delete error: {err}")
+        await delete_n8n_resources(shard, credential_ids=[current["id"]], reason="rebalance")
+        logger.info(f"Removed Gmail credential {current['id']} for user={user_id} shard={shard}")
+        return True
+
+    @staticmethod
+    def _entry(row: dict) -> dict:
+        return {"id": row["n8n_credential_id"], "name": row["name"], "fingerprint": row["fingerprint"]}
+
+    async def _load(self, user_id: str, shard: str):
+        sb = await get_async_sb()
+        res = await execute(
+            sb.table(GMAIL_CREDENTIALS_TABLE).select("*").eq("user_id", user_id).eq("n8n_shard", shard).limit(1),
+            "supabase-select",
+        )
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase select error: {err}")
+        rows = get_data(res) or []
+        return self._entry(rows[0]) if rows else None
+
+    async def _write(self, user_id: str, shard: str, payload: dict, fp: str, current) -> dict:
+        name = credential_name(user_id)
+        cred = await upsert_gmail_credential(name, payload, shard=shard, cred_id=current["id"] if current else None)
+        entry = {"id": str(cred["id"]), "name": cred["name"], "fingerprint": fp}
+        # Only a credential created here is unreferenced; a patched one may back workflows
+        created = current is None or current["id"] != entry["id"]
+        sb = await get_async_sb()
+
+        try:
+            if current is not None:
+                # Compare-and-set on the credential id: only the replacement path changes it
+                res = await execute(
+                    sb.table(GMAIL_CREDENTIALS_TABLE).update({
+                        "n8n_credential_id": entry["id"],
+                        "name": entry["name"],
+                        "fingerprint": fp,
+                        "updated_at": datetime.now(timezone.utc).isoformat(),
+                    }).eq("user_id", user_id).eq("n8n_shard", shard).eq("n8n_credential_id", current["id"]),
+                    "supabase-update",
+                )
+                err = get_error(res)
+                if err:
+                    raise RuntimeError(f"Supabase update error: {err}")
+                if get_data(res):
+                    logger.info(f"Updated Gmail credential {entry['id']} for user={user_id} shard={shard} in place")
+                    return entry
+            else:
+                res = await execute(
+                    sb.table(GMAIL_CREDENTIALS_TABLE).upsert(
+                        {
+                            "user_id": user_id,
+                            "n8n_shard": shard,
+                            "n8n_credential_id": entry["id"],
+                            "name": entry["name"],
+                            "fingerprint": fp,
+                        },
+                        on_conflict="user_id,n8n_shard",
+                        ignore_duplicates=True,
+                    ),
+                    "supabase-upsert",
+                )
+                err = get_error(res)
+                if err:
+                    raise RuntimeError(f"Supabase upsert error: {err}")
+        except Exception:
+            if created:
+                # Unregistered, so nothing would ever reuse or clean it up
+                await delete_n8n_resources(shard, credential_ids=[entry["id"]])
+            raise
+
+        # Another process registered or replaced the user's credential first; keep theirs
+        winner = await self._load(user_id, shard)
+        if winner and winner["id"] != entry["id"]:
+            if created:
+                logger.info(f"Gmail credential for {user_id} registered concurrently, dropping duplicate {entry['id']}")
+                await delete_n8n_resources(shard, credential_ids=[entry["id"]], reason="duplicate")
+            if winner["fingerprint"] != fp:
+                return await self._write(user_id, shard, payload, fp, winner)
+            return winner
+        logger.info(f"Registered Gmail credential {entry['id']} for user={user_id} shard={shard}")
+        return entry
+
+
+gmail_credentials = GmailCredentialRegistry()
@@ -0,0 +1,155 @@
+# workflows/live_status.py
+# Cached live n8n state for workflow listings: whether each workflow is
+# active in n8n and how its last execution went. One snapshot per shard,
+# shared by every request and refreshed at most every LIVE_STATUS_TTL_SECONDS:
+#   - the ids of the shard's active workflows (n8n's workflow list filtered
+#     on active=true, so paused and deactivated workflows cost nothing per
+#     refresh). A workflow missing from it is reported inactive when its row
+#     has not changed since the listing started; a row updated after that,
+#     e.g. just installed or resumed, is reported as active=None (unknown).
+#     Drift the rows have not caught up with yet is the reconciler's job,
+#   - the newest execution per workflow from the first
+#     LIVE_STATUS_EXECUTION_PAGES pages of n8n's execution list (newest
+#     first), merged into what earlier refreshes saw.
+# A stale snapshot is served while one refresh runs in the background. Only
+# a shard without any snapshot makes the request wait, and if n8n cannot be
+# reached the listing simply carries no live state.
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from n8n.n8n_async_client import get_async_client
+from workflows.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+LIVE_STATUS_TTL_SECONDS = float(os.environ.get("LIVE_STATUS_TTL_SECONDS", "30"))
+LIVE_STATUS_EXECUTION_PAGES = int(os.environ.get("LIVE_STATUS_EXECUTION_PAGES", "4"))
+# Longest a cold request waits for its shard's first snapshot
+LIVE_STATUS_WAIT_SECONDS = float(os.environ.get("LIVE_STATUS_WAIT_SECONDS", "2"))
+
+
+def _execution(ex: dict) -> dict:
+    return {
+        "id": str(ex.get("id")),
+        "status": ex.get("status"),
+        "startedAt": ex.get("startedAt"),
+        "stoppedAt": ex.get("stoppedAt"),
+    }
+
+
+def _changed_since(row: dict, when: datetime) -> bool:
+    """Whether `row` (a workflows row) was created or updated at or after `when`; True if unknown."""
+    stamp = row.get("updated_at") or row.get("created_at")
+    if not stamp:
+        return True
+    try:
+        changed = datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+    except ValueError:
+        return True
+    if changed.tzinfo is None:
+        changed = changed.replace(tzinfo=timezone.utc)
+    return changed >= when
+
+
+class _Snapshot:
+    __slots__ = ("active", "listed_at", "last_execution", "refreshed_at")
+
+    def __init__(self):
+        self.active = set()
+        # When the active listing started; rows changed since are not vouched for
+        self.listed_at = datetime.min.replace(tzinfo=timezone.utc)
+        self.last_execution = {}
+        self.refreshed_at = 0.0
+
+
+class LiveStatusCache:
+    def __init__(self, ttl: float = LIVE_STATUS_TTL_SECONDS, execution_pages: int = LIVE_STATUS_EXECUTION_PAGES):
+        self.ttl = ttl
+        self.execution_pages = execution_pages
+        self._snapshots = {}
+        self._refreshes = SingleFlight()
+
+    async def lookup(self, rows: list) -> dict:
+        """Live state of `rows` (workflows rows) as {(shard, n8n workflow id): {"active", "lastExecution"}}.
+
+        "active" is None for rows changed since the snapshot's listing
+        started, which it cannot vouch for. Rows on shards whose state is
+        unavailable are left out.
+        """
+        shards = {row["n8n_shard"] for row in rows}
+        snapshots = dict(zip(shards, await asyncio.gather(*(self._snapshot(s) for s in shards))))
+        out = {}
+        for row in rows:
+            snap = snapshots.get(row["n8n_shard"])
+            if snap is None:
+                continue
+            wid = str(row["n8n_workflow_id"])
+            if wid in snap.active:
+                active = True
+            else:
+                active = None if _changed_since(row, snap.listed_at) else False
+            out[(row["n8n_shard"], wid)] = {
+                "active": active,
+                "lastExecution": snap.last_execution.get(wid),
+            }
+        return out
+
+    async def _snapshot(self, shard: str):
+        snap = self._snapshots.get(shard)
+        if snap is not None:
+            if time.monotonic() - snap.refreshed_at >= self.ttl and not self._refreshes.in_flight(shard):
+                task = asyncio.ensure_future(self._refreshes.do(shard, lambda: self._refresh(shard)))
+                # Failures are logged in _refresh; the stale snapshot keeps being served
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            return snap
+        try:
+            return await asyncio.wait_for(
+                self._refreshes.do(shard, lambda: self._refresh(shard)), LIVE_STATUS_WAIT_SECONDS
+            )
+        except Exception:
+            return None
+
+    async def _refresh(self, shard: str) -> _Snapshot:
+        client = get_async_client(shard)
+        t0 = time.perf_counter()
+        try:
+            listed_at = datetime.now(timezone.utc)
+            active, cursor = set(), None
+            while True:
+                page, cursor = await client.list_workflows(active=True, cursor=cursor)
+                active.update(str(wf["id"]) for wf in page)
+                if not cursor:
+                    break
+
+            newest, cursor = {}, None
+            for _ in range(self.execution_pages):
+                page, cursor = await client.list_executions(cursor=cursor)
+                for ex in page:
+                    # Newest first: the first execution seen for a workflow is its last one
+                    newest.setdefault(str(ex.get("workflowId")), _execution(ex))
+                if not cursor:
+                    break
+        except Exception as e:
+            logger.warning(f"Live status refresh of shard {shard} failed: {e}")
+            stale = self._snapshots.get(shard)
+            if stale is not None:
+                # Keep serving it and retry after another TTL rather than on every request
+                stale.refreshed_at = time.monotonic()
+            raise
+
+        previous = self._snapshots.get(shard)
+        snap = _Snapshot()
+        snap.active = active
+        snap.listed_at = listed_at
+        snap.last_execution = {**(previous.last_execution if previous else {}), **newest}
+        snap.refreshed_at = time.monotonic()
+        self._snapshots[shard] = snap
+        logger.debug(f"Live status of shard {shard}: {len(active)} active, "
+                     f"{len(newest)} recent executions in {time.perf_counter() - t0:.2f}s")
+        return snap
+
+
+live_status = LiveStatusCache()
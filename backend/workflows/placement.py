@@ -0,0 +1,92 @@
+# workflows/placement.py
+# Which n8n shard a tenant lives on. A user's workflows and Gmail credential
+# all sit on one shard: the one recorded on their existing `workflows` rows,
+# or for a new user the capacity-aware ring choice (n8n/sharding.py) against
+# per-shard active workflow counts that are refreshed from Supabase
+# periodically and bumped locally on every placement.
+import os
+import time
+import asyncio
+import logging
+
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+from n8n.sharding import DEFAULT_SHARD, SHARDS, pick_shard
+from workflows.credential_registry import LRUCache
+
+logger = logging.getLogger(__name__)
+
+SHARD_LOAD_REFRESH_SECONDS = float(os.environ.get("SHARD_LOAD_REFRESH_SECONDS", "30"))
+SHARD_PLACEMENT_CACHE_SIZE = int(os.environ.get("SHARD_PLACEMENT_CACHE_SIZE", "10000"))
+# Cached placements expire so moves made by tools/rebalance_shards.py are picked up
+SHARD_PLACEMENT_TTL_SECONDS = float(os.environ.get("SHARD_PLACEMENT_TTL_SECONDS", "300"))
+
+
+async def count_active_workflows(shard: str) -> int:
+    sb = await get_async_sb()
+    res = await execute(
+        sb.table("workflows").select("id", count="exact").eq("n8n_shard", shard).eq("status", "active").limit(1),
+        "supabase-count",
+    )
+    err = get_error(res)
+    if err:
+        raise RuntimeError(f"Supabase count error: {err}")
+    return res.count or 0
+
+
+async def shard_loads() -> dict:
+    """Active workflows per configured shard."""
+    counts = await asyncio.gather(*(count_active_workflows(name) for name in SHARDS))
+    return dict(zip(SHARDS, counts))
+
+
+class ShardPlacement:
+    def __init__(self, refresh_seconds: float = SHARD_LOAD_REFRESH_SECONDS, cache_size: int = SHARD_PLACEMENT_CACHE_SIZE):
+        self.refresh_seconds = refresh_seconds
+        self._users = LRUCache(cache_size)
+        self._loads = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def shard_for_user(self, user_id: str) -> str:
+        if len(SHARDS) == 1:
+            return next(iter(SHARDS))
+        cached = self._users.get(user_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        shard = await self._recorded_shard(user_id)
+        if shard is None:
+            async with self._lock:
+                loads = await self._current_loads()
+                shard = pick_shard(user_id, loads)
+                loads[shard] = loads.get(shard, 0) + 1
+            logger.info(f"Placed user {user_id} on n8n shard {shard}")
+        self._users.put(user_id, (shard, time.monotonic() + SHARD_PLACEMENT_TTL_SECONDS))
+        return shard
+
+    def forget(self, user_id: str) -> None:
+        """Drop a cached placement, e.g. after the user was moved to another shard."""
+        self._users.pop(user_id)
+
+    async def _recorded_shard(self, user_id: str):
+        sb = await get_async_sb()
+        res = await execute(
+            sb.table("workflows").select("n8n_shard").eq("user_id", user_id).limit(1),
+            "supabase-select",
+        )
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase select error: {err}")
+        rows = get_data(res) or []
+        return (rows[0].get("n8n_shard") or DEFAULT_SHARD) if rows else None
+
+    async def _current_loads(self) -> dict:
+        now = time.monotonic()
+        if self._loads is None or now - self._loaded_at >= self.refresh_seconds:
+            self._loads = await shard_loads()
+            self._loaded_at = now
+        return self._loads
+
+
+placement = ShardPlacement()
@@ -0,0 +1,372 @@
+# workflows/provisioning.py
+# Shared provisioning engine. An install is modelled as a small DAG of async
+# steps (credentials -> build -> create -> activate -> record); steps whose
+# dependencies are satisfied run concurrently, so all credentials cost a single
+# n8n round trip instead of one each.
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from fastapi import HTTPException
+
+from database.db import get_async_sb
+from database.sb_utils import execute, get_error
+from n8n.common import _gemini_credential_data
+from n8n.sharding import DEFAULT_SHARD
+from n8n.n8n_async_client import (
+    create_workflow_body,
+    activate_workflow,
+)
+from workflows.credential_registry import shared_credentials
+from workflows.gmail_credentials import gmail_credentials
+from workflows.template_compiler import CompiledTemplate
+from workflows.catalog import templates
+from workflows.debug_artifacts import debug_artifacts
+from workflows.singleflight import SingleFlight
+from workflows.staggering import plan_schedule
+from workflows.placement import placement
+from workflows.saga import ProvisioningSaga
+from observability.metrics import INSTALLS_IN_FLIGHT, time_stage
+
+logger = logging.getLogger(__name__)
+
+OPENAI_KEY = os.environ["OPENAI_API_KEY"]
+GEMINI_KEY = os.environ["GEMINI_API_KEY"]
+GOOGLE_CLIENT_ID = os.environ["GOOGLE_CLIENT_ID"]
+GOOGLE_CLIENT_SECRET = os.environ["GOOGLE_CLIENT_SECRET"]
+
+# Upper bound on steps of a single install that may be in flight at once
+PROVISION_MAX_CONCURRENCY = int(os.environ.get("PROVISION_MAX_CONCURRENCY", "4"))
+
+
+class ProvisionDAG:
+    """Run named async steps respecting their dependencies.
+
+    Each step is `async fn(results) -> value`, where `results` maps the names
+    of already finished steps to their return values.
+    """
+
+    def __init__(self, max_concurrency: int = PROVISION_MAX_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self._steps = {}
+
+    def add(self, name: str, fn, deps=()) -> "ProvisionDAG":
+        if name in self._steps:
+            raise ValueError(f"Duplicate provisioning step: {name}")
+        self._steps[name] = (fn, tuple(deps))
+        return self
+
+    def _check(self):
+        for name, (_, deps) in self._steps.items():
+            missing = [d for d in deps if d not in self._steps]
+            if missing:
+                raise ValueError(f"Step {name} depends on unknown steps {missing}")
+        # Kahn's algorithm, only to reject cycles before anything runs
+        indegree = {n: len(deps) for n, (_, deps) in self._steps.items()}
+        ready = [n for n, d in indegree.items() if d == 0]
+        seen = 0
+        while ready:
+            n = ready.pop()
+            seen += 1
+            for m, (_, deps) in self._steps.items():
+                if n in deps:
+                    indegree[m] -= 1
+                    if indegree[m] == 0:
+                        ready.append(m)
+        if seen != len(self._steps):
+            raise ValueError("Provisioning steps contain a cycle")
+
+    async def run(self):
+        """Execute the graph. Returns (results, timing report).
+
+        The first failing step cancels everything still running and its
+        exception is re-raised.
+        """
+        self._check()
+        sem = asyncio.Semaphore(self.max_concurrency)
+        results, spans = {}, {}
+        t0 = time.perf_counter()
+
+        async def _run_step(name, fn):
+            async with sem:
+                start = time.perf_counter()
+                try:
+                    return await fn(results)
+                finally:
+                    spans[name] = (start - t0, time.perf_counter() - t0)
+
+        pending = dict(self._steps)
+        running = {}
+        try:
+            while pending or running:
+                for name in [n for n, (_, deps) in pending.items() if all(d in results for d in deps)]:
+                    fn, _ = pending.pop(name)
+                    running[asyncio.ensure_future(_run_step(name, fn))] = name
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[running.pop(task)] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return results, self._report(spans, time.perf_counter() - t0)
+
+    def _report(self, spans: dict, total: float) -> dict:
+        # Walk back from the last step to finish, always through the dependency
+        # that finished last: that chain is what bounded the install latency.
+        path = []
+        current = max(spans, key=lambda n: spans[n][1]) if spans else None
+        while current is not None:
+            path.append(current)
+            deps = self._steps[current][1]
+            current = max(deps, key=lambda n: spans[n][1]) if deps else None
+        path.reverse()
+        return {
+            "totalMs": round(total * 1000, 2),
+            "criticalPath": path,
+            "criticalPathMs": round(sum(spans[n][1] - spans[n][0] for n in path) * 1000, 2),
+            "steps": {
+                n: {"startMs": round(s * 1000, 2), "durationMs": round((e - s) * 1000, 2)}
+                for n, (s, e) in spans.items()
+            },
+        }
+
+
+def gmail_credential_payload(integ_row: dict) -> dict:
+    """gmailOAuth2 credential payload for a user_integrations row."""
+    payload = {
+        "clientId": GOOGLE_CLIENT_ID,
+        "clientSecret": GOOGLE_CLIENT_SECRET,
+        "oauthTokenData": {
+            "access_token": integ_row["access_token"],
+            "refresh_token": integ_row.get("refresh_token") or "",
+            "scope": integ_row.get("scope", ""),
+            "token_type": "Bearer",
+        },
+    }
+    if integ_row.get("expiry"):
+        try:
+            expiry_ms = int(datetime.fromisoformat(integ_row["expiry"].replace("Z", "+00:00")).timestamp() * 1000)
+            payload["oauthTokenData"]["expiry_date"] = expiry_ms
+        except Exception as e:
+            logger.warning(f"Could not parse expiry date: {e}")
+    return payload
+
+
+async def ensure_gmail_cred(user_id: str, integ_row: dict, shard: str = DEFAULT_SHARD):
+    # One credential per user and shard, reused across templates and updated in place
+    return await gmail_credentials.ensure(user_id, gmail_credential_payload(integ_row), shard)
+
+async def ensure_openai_cred(shard: str = DEFAULT_SHARD):
+    # Platform key, shared by every tenant on the shard
+    return await shared_credentials.ensure("openai", "openAiApi", {"apiKey": OPENAI_KEY}, shard)
+
+async def ensure_gemini_cred(shard: str = DEFAULT_SHARD):
+    return await shared_credentials.ensure("gemini", "googlePalmApi", _gemini_credential_data(GEMINI_KEY), shard)
+
+
+def workflow_row(
+    user_id: str,
+    template_id: str,
+    description: str,
+    workflow_id,
+    workflow_config: dict = None,
+    shard: str = DEFAULT_SHARD,
+) -> dict:
+    return {
+        "user_id": user_id,
+        "template_id": template_id,
+        "name": template_id,
+        "description": description,
+        "n8n_workflow_id": str(workflow_id),
+        "n8n_shard": shard,
+        "status": "active",
+        "workflow_config": workflow_config or {},
+    }
+
+
+async def insert_workflow_rows(rows: list) -> None:
+    """Insert `workflows` rows in a single request."""
+    sb = await get_async_sb()
+    with time_stage("workflows_insert"):
+        ins = await execute(sb.table("workflows").insert(rows), "supabase-insert")
+    err = get_error(ins)
+    if err:
+        raise HTTPException(500, f"Supabase insert error: {err}")
+
+
+async def provision_workflow(
+    user_id: str,
+    template_id: str,
+    tpl: CompiledTemplate,
+    credentials: dict,
+    description: str,
+    workflow_config: dict = None,
+    record: bool = True,
+    trigger_params: dict = None,
+    shard: str = DEFAULT_SHARD,
+    activate: bool = True,
+) -> dict:
+    """Provision one workflow for one user on n8n shard `shard`.
+
+    `credentials` maps a role (e.g. "gmail") to a zero-argument coroutine
+    function returning {"id", "name"}; all of them run concurrently and fill
+    the matching credential slots of the compiled template.
+
+    With `record=False` the `workflows` row is returned under "row" instead of
+    inserted, so batch callers can insert many rows at once (and must delete
+    the workflow if that insert fails). `trigger_params` replaces trigger node
+    parameters (see workflows/staggering.py). The credentials used are
+    recorded under workflow_config["credentials"]. With `activate=False` the
+    workflow is created but left inactive in n8n.
+
+    If a step fails, the workflow already created in n8n is deleted again
+    (see workflows/saga.py).
+    """
+    logger.info(f"Provision start user={user_id} template={template_id}")
+    saga = ProvisioningSaga(shard, f"{template_id}-{user_id}")
+
+    async def _build(results):
+        creds = {role: results[f"cred:{role}"] for role in credentials}
+        body = tpl.render_body(f"{template_id}-{user_id}", creds, trigger_params)
+        if debug_artifacts.should_capture():
+            debug_artifacts.submit(
+                f"{template_id}_{user_id}",
+                body,
+                meta={"userId": user_id, "templateId": template_id, "credentialSlots": tpl.slot_counts()},
+            )
+        return body
+
+    async def _create(results):
+        with time_stage("create_workflow"):
+            wid = await create_workflow_body(results["build"], shard=shard)
+        saga.track_workflow(wid)
+        logger.info(f"Created workflow id={wid}")
+        return wid
+
+    async def _activate(results):
+        wid = results["create"]
+        try:
+            with time_stage("activate_workflow"):
+                await activate_workflow(wid, shard=shard)
+            logger.info(f"Activated workflow id={wid}")
+        except Exception as e:
+            logger.error(f"Activation failed: {e}")
+            raise
+
+    def _config(results):
+        used = {}
+        for role in credentials:
+            cred = results[f"cred:{role}"]
+            used[role] = {"id": str(cred["id"]), "name": cred["name"]}
+        return {**(workflow_config or {}), "credentials": used}
+
+    async def _record(results):
+        await insert_workflow_rows(
+            [workflow_row(user_id, template_id, description, results["create"], _config(results), shard)]
+        )
+
+    async def _credential(role, ensure):
+        with time_stage(f"credential_{role}"):
+            return await ensure()
+
+    dag = ProvisionDAG()
+    for role, ensure in credentials.items():
+        dag.add(f"cred:{role}", lambda _results, role=role, ensure=ensure: _credential(role, ensure))
+    dag.add("build", _build, deps=[f"cred:{role}" for role in credentials])
+    dag.add("create", _create, deps=["build"])
+    if activate:
+        dag.add("activate", _activate, deps=["create"])
+    if record:
+        dag.add("record", _record, deps=["activate" if activate else "create"])
+
+    INSTALLS_IN_FLIGHT.inc()
+    try:
+        results, timing = await dag.run()
+        saga.commit()
+    except BaseException:
+        # Shielded so a second cancellation cannot interrupt the rollback
+        await asyncio.shield(saga.compensate())
+        raise
+    finally:
+        INSTALLS_IN_FLIGHT.dec()
+    logger.info(
+        f"Provision done user={user_id} template={template_id} shard={shard} total={timing['totalMs']}ms "
+        f"critical_path={' -> '.join(timing['criticalPath'])}"
+    )
+    result = {"activated": activate, "workflowId": results["create"], "shard": shard, "timing": timing}
+    if not record:
+        result["row"] = workflow_row(user_id, template_id, description, results["create"], _config(results), shard)
+    return result
+
+
+# Credential role -> coroutine function(user_id, integ_row, shard) resolving it
+CREDENTIAL_PROVIDERS = {
+    "gmail": ensure_gmail_cred,
+    "openai": lambda user_id, integ_row, shard: ensure_openai_cred(shard),
+    "gemini": lambda user_id, integ_row, shard: ensure_gemini_cred(shard),
+}
+
+_installs = SingleFlight()
+
+
+async def provision_template(
+    user_id: str,
+    template_id: str,
+    integ_row: dict,
+    providers: dict = None,
+    record: bool = True,
+    shard: str = None,
+    activate: bool = True,
+) -> dict:
+    """Provision a registered template (see workflows/catalog.py) for a user.
+
+    The n8n shard is the user's placement (workflows/placement.py) unless
+    `shard` is given. Concurrent calls for the same user, template, shard,
+    `record` and `activate` modes share one provisioning run, so a joined
+    caller always gets the outcome of a run that did what it asked for.
+    """
+    return await _installs.do(
+        (user_id, template_id, shard, record, activate),
+        lambda: _provision_template(user_id, template_id, integ_row, providers, record, shard, activate),
+    )
+
+
+async def _provision_template(
+    user_id: str,
+    template_id: str,
+    integ_row: dict,
+    providers: dict = None,
+    record: bool = True,
+    shard: str = None,
+    activate: bool = True,
+) -> dict:
+    # `providers` overrides entries of CREDENTIAL_PROVIDERS, e.g. to share one credential per user
+    spec, tpl, version = templates.get(template_id)
+    providers = {**CREDENTIAL_PROVIDERS, **(providers or {})}
+    shard = shard or await placement.shard_for_user(user_id)
+    trigger_params, schedule = plan_schedule(user_id, template_id, tpl, spec.schedule_tier)
+    workflow_config = {"templateVersion": version}
+    if schedule:
+        workflow_config["schedule"] = schedule
+    result = await provision_workflow(
+        user_id,
+        template_id,
+        tpl,
+        credentials={
+            role: (lambda provider=providers[role]: provider(user_id, integ_row, shard))
+            for role in spec.credentials
+            if role in tpl.roles
+        },
+        description=spec.description,
+        workflow_config=workflow_config,
+        record=record,
+        trigger_params=trigger_params,
+        shard=shard,
+        activate=activate,
+    )
+    result["templateVersion"] = version
+    return result
@@ -0,0 +1,232 @@
+# workflows/reconciler.py
+# Keeps `workflows.status` in line with n8n. Rows say "active" from install
+# on, but n8n deactivates workflows whose triggers keep failing, and
+# workflows get deactivated or deleted in the n8n UI. Per shard:
+#   - every RECONCILE_INTERVAL_SECONDS an incremental pass pages (by cursor)
+#     through n8n's list of *inactive* workflows and diffs only those
+#     updated since the shard's watermark in sync_watermarks,
+#   - every RECONCILE_FULL_SWEEP_SECONDS a full sweep diffs every workflow on
+#     the shard against its rows, which is how deletions and re-activations
+#     are found (n8n's list has no updatedAt filter or tombstones).
+# Corrections are bulk updates keyed by (shard, n8n workflow id) and limited
+# to the statuses the reconciler owns, so rows a rebalance repointed in the
+# meantime are left alone.
+import os
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+from database.watermarks import get_watermark, set_watermark
+from n8n.n8n_async_client import get_async_client
+from n8n.sharding import SHARDS
+from observability.metrics import WORKFLOW_DRIFT_CORRECTIONS
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_ENABLED = os.environ.get("RECONCILE_ENABLED", "true").lower() in ("1", "true", "yes")
+RECONCILE_INTERVAL_SECONDS = float(os.environ.get("RECONCILE_INTERVAL_SECONDS", "120"))
+RECONCILE_FULL_SWEEP_SECONDS = float(os.environ.get("RECONCILE_FULL_SWEEP_SECONDS", "21600"))
+RECONCILE_PAGE_SIZE = int(os.environ.get("RECONCILE_PAGE_SIZE", "1000"))
+# n8n workflow ids per bulk update (one `in` filter)
+RECONCILE_UPDATE_BATCH = int(os.environ.get("RECONCILE_UPDATE_BATCH", "200"))
+# A sweep that would mark more than this share of a shard's rows deleted is
+# almost certainly looking at the wrong (or a freshly restored) n8n; skip it
+RECONCILE_MAX_DELETED_FRACTION = float(os.environ.get("RECONCILE_MAX_DELETED_FRACTION", "0.5"))
+
+ACTIVE = "active"
+INACTIVE = "inactive"
+DELETED = "deleted"
+# Statuses the reconciler may change; anything else was set on purpose
+RECONCILED_STATUSES = (ACTIVE, INACTIVE, DELETED)
+
+
+def _iso(ts: datetime) -> str:
+    return ts.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _inactive_key(shard: str) -> str:
+    return f"reconcile:inactive:{shard}"
+
+
+def _sweep_key(shard: str) -> str:
+    return f"reconcile:sweep:{shard}"
+
+
+class WorkflowReconciler:
+    def __init__(
+        self,
+        interval: float = RECONCILE_INTERVAL_SECONDS,
+        full_sweep_every: float = RECONCILE_FULL_SWEEP_SECONDS,
+        page_size: int = RECONCILE_PAGE_SIZE,
+    ):
+        self.interval = interval
+        self.full_sweep_every = full_sweep_every
+        self.page_size = page_size
+        self._task = None
+
+    def start(self) -> None:
+        if RECONCILE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Reconcile tick failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def tick(self, full: bool = None) -> dict:
+        """Reconcile every shard; full sweeps where due (or everywhere with full=True).
+
+        Returns {shard: {"pass", "checked", status: rows changed}}.
+        """
+        names = list(SHARDS)
+        results = await asyncio.gather(*(self.reconcile_shard(name, full) for name in names), return_exceptions=True)
+        out = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Reconcile of shard {name} failed: {result}")
+                out[name] = {"error": str(result)}
+            else:
+                out[name] = result
+        return out
+
+    async def reconcile_shard(self, shard: str, full: bool = None) -> dict:
+        t0 = time.perf_counter()
+        if full is None:
+            last = await get_watermark(_sweep_key(shard))
+            cutoff = _iso(datetime.now(timezone.utc) - timedelta(seconds=self.full_sweep_every))
+            full = last is None or last < cutoff
+        stats = await (self._full_sweep(shard) if full else self._incremental(shard))
+        changed = {k: v for k, v in stats.items() if k in RECONCILED_STATUSES and v}
+        if changed:
+            logger.info(
+                f"Reconciled shard {shard} ({stats['pass']}, {stats['checked']} checked): "
+                f"{changed} in {time.perf_counter() - t0:.2f}s"
+            )
+        return stats
+
+    async def _incremental(self, shard: str) -> dict:
+        """Mark rows inactive whose workflow n8n deactivated since the watermark."""
+        since = await get_watermark(_inactive_key(shard))
+        newest, wids = since, []
+        async for page in self._n8n_pages(shard, active=False):
+            for wf in page:
+                updated = wf.get("updatedAt") or ""
+                # >= so a workflow sharing the watermark's timestamp is not missed
+                if since is None or updated >= since:
+                    wids.append(str(wf["id"]))
+                    newest = max(newest or "", updated)
+        stats = {"pass": "incremental", "checked": len(wids), INACTIVE: await self._set_status(shard, wids, INACTIVE)}
+        if newest and newest != since:
+            await set_watermark(_inactive_key(shard), newest)
+        return stats
+
+    async def _full_sweep(self, shard: str) -> dict:
+        """Diff every row of the shard against n8n's full workflow list."""
+        # Rows are inserted after their workflow is created, so every row older
+        # than the start of the listing has its workflow in the listing
+        started = datetime.now(timezone.utc)
+        live, newest_inactive = {}, ""
+        async for page in self._n8n_pages(shard):
+            for wf in page:
+                live[str(wf["id"])] = bool(wf.get("active"))
+                if not wf.get("active"):
+                    newest_inactive = max(newest_inactive, wf.get("updatedAt") or "")
+
+        wanted = {ACTIVE: [], INACTIVE: [], DELETED: []}
+        checked = 0
+        async for rows in self._row_pages(shard, _iso(started)):
+            checked += len(rows)
+            for row in rows:
+                wid = str(row["n8n_workflow_id"])
+                status = DELETED if wid not in live else ACTIVE if live[wid] else INACTIVE
+                if row["status"] != status:
+                    wanted[status].append(wid)
+
+        if checked and len(wanted[DELETED]) > checked * RECONCILE_MAX_DELETED_FRACTION:
+            logger.error(
+                f"Shard {shard}: {len(wanted[DELETED])}/{checked} workflows missing from n8n, "
+                f"not marking them deleted"
+            )
+            wanted[DELETED] = []
+
+        stats = {"pass": "full", "checked": checked}
+        for status, wids in wanted.items():
+            stats[status] = await self._set_status(shard, wids, status)
+        if newest_inactive:
+            await set_watermark(_inactive_key(shard), newest_inactive)
+        await set_watermark(_sweep_key(shard), _iso(started))
+        return stats
+
+    async def _n8n_pages(self, shard: str, active: bool = None):
+        client = get_async_client(shard)
+        cursor = None
+        while True:
+            page, cursor = await client.list_workflows(active=active, cursor=cursor)
+            yield page
+            if not cursor:
+                return
+
+    async def _row_pages(self, shard: str, created_before: str):
+        sb = await get_async_sb()
+        last_id = 0
+        while True:
+            res = await execute(
+                sb.table("workflows")
+                .select("id,n8n_workflow_id,status")
+                .eq("n8n_shard", shard)
+                .in_("status", list(RECONCILED_STATUSES))
+                .lt("created_at", created_before)
+                .gt("id", last_id)
+                .order("id")
+                .limit(self.page_size),
+                "supabase-select",
+            )
+            err = get_error(res)
+            if err:
+                raise RuntimeError(f"Supabase select error: {err}")
+            rows = get_data(res) or []
+            if rows:
+                yield rows
+            if len(rows) < self.page_size:
+                return
+            last_id = rows[-1]["id"]
+
+    async def _set_status(self, shard: str, wids: list, status: str) -> int:
+        """Move the rows of n8n workflows `wids` to `status`; returns the rows changed."""
+        if not wids:
+            return 0
+        sb = await get_async_sb()
+        others = [s for s in RECONCILED_STATUSES if s != status]
+        now = datetime.now(timezone.utc).isoformat()
+        changed = 0
+        for i in range(0, len(wids), RECONCILE_UPDATE_BATCH):
+            res = await execute(
+                sb.table("workflows")
+                .update({"status": status, "updated_at": now})
+                .eq("n8n_shard", shard)
+                .in_("n8n_workflow_id", wids[i:i + RECONCILE_UPDATE_BATCH])
+                .in_("status", others),
+                "supabase-update",
+            )
+            err = get_error(res)
+            if err:
+                raise RuntimeError(f"Supabase update error: {err}")
+            changed += len(get_data(res) or [])
+        if changed:
+            WORKFLOW_DRIFT_CORRECTIONS.labels(status).inc(changed)
+        return changed
+
+
+reconciler = WorkflowReconciler()
@@ -0,0 +1,88 @@
+# workflows/saga.py
+# Compensation for installs that fail halfway. Each n8n resource an install
+# owns is recorded in the install's ProvisioningSaga as soon as n8n returns
+# its id; if a later step (activation, the `workflows` insert) fails, the saga
+# deletes them again, newest first. Credentials are not tracked here: Gmail
+# and platform credentials are shared through their registries, which clean
+# up their own half-registered credentials. Anything compensation cannot
+# reach (n8n down, the process killed) is left for the periodic collector in
+# workflows/garbage_collector.py.
+import os
+import asyncio
+import logging
+
+import httpx
+
+from n8n.n8n_async_client import get_async_client
+from observability.metrics import N8N_ORPHAN_DELETES
+
+logger = logging.getLogger(__name__)
+
+N8N_DELETE_CONCURRENCY = int(os.environ.get("N8N_DELETE_CONCURRENCY", "8"))
+
+WORKFLOW = "workflow"
+CREDENTIAL = "credential"
+
+
+async def delete_n8n_resources(
+    shard: str,
+    workflow_ids=(),
+    credential_ids=(),
+    reason: str = "rollback",
+    concurrency: int = N8N_DELETE_CONCURRENCY,
+) -> tuple:
+    """Delete workflows, then credentials, on `shard` with bounded concurrency.
+
+    Already missing resources count as deleted. Returns (deleted, failed).
+    """
+    client = get_async_client(shard)
+    sem = asyncio.Semaphore(max(1, concurrency))
+    outcomes = []
+
+    async def one(kind, rid):
+        delete = client.delete_workflow if kind == WORKFLOW else client.delete_credential
+        async with sem:
+            try:
+                await delete(rid)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 404:
+                    logger.warning(f"Could not delete n8n {kind} {rid} on {shard} ({reason}): {e}")
+                    outcomes.append(False)
+                    return
+            except httpx.HTTPError as e:
+                logger.warning(f"Could not delete n8n {kind} {rid} on {shard} ({reason}): {e}")
+                outcomes.append(False)
+                return
+        N8N_ORPHAN_DELETES.labels(kind, reason).inc()
+        outcomes.append(True)
+
+    # Workflows first so no surviving workflow points at a deleted credential
+    await asyncio.gather(*(one(WORKFLOW, wid) for wid in workflow_ids))
+    await asyncio.gather(*(one(CREDENTIAL, cid) for cid in credential_ids))
+    return outcomes.count(True), outcomes.count(False)
+
+
+class ProvisioningSaga:
+    """Undo log of the n8n resources one install created on `shard`."""
+
+    def __init__(self, shard: str, label: str = ""):
+        self.shard = shard
+        self.label = label
+        self._created = []
+
+    def track_workflow(self, wid) -> None:
+        self._created.append(str(wid))
+
+    def commit(self) -> None:
+        """The install succeeded; its resources are owned by the `workflows` row now."""
+        self._created.clear()
+
+    async def compensate(self) -> None:
+        if not self._created:
+            return
+        created, self._created = self._created[::-1], []
+        deleted, failed = await delete_n8n_resources(self.shard, workflow_ids=created)
+        logger.warning(
+            f"Rolled back install {self.label} on {self.shard}: deleted {deleted} n8n resources"
+            + (f", {failed} left for garbage collection" if failed else "")
+        )
@@ -0,0 +1,22 @@
+# workflows/singleflight.py
+# Coalesce concurrent calls for the same key: the first caller runs the
+# coroutine, later callers await the same result (or exception).
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+
+    def in_flight(self, key) -> bool:
+        return key in self._inflight
+
+    async def do(self, key, fn):
+        """Run `fn()` for `key` unless a call for `key` is already running."""
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(fn())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one cancelled caller must not cancel the shared call
+        return await asyncio.shield(fut)
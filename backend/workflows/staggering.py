@@ -0,0 +1,142 @@
+# workflows/staggering.py
+# Spreads tenants' polling and scheduled runs so thousands of workflows built
+# from the same template do not all fire on the same second. Each tenant gets
+# a deterministic offset from a hash of its user id (salted with template and
+# node, so one user's workflows are spread too) within the period of its
+# interval tier:
+#   gmailTrigger     pollTimes become a 6-field cron "<sec> <min>/<interval> * * * *"
+#   scheduleTrigger  daily triggerAtHour/triggerAtMinute move within a window
+#                    of STAGGER_DAILY_WINDOW_MINUTES after the template's time
+# The chosen tier and offsets are recorded in the workflow's workflow_config.
+import os
+import hashlib
+import logging
+
+from workflows.template_compiler import CompiledTemplate
+
+logger = logging.getLogger(__name__)
+
+STAGGER_ENABLED = os.environ.get("STAGGER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Poll interval tiers, "name=minutes,..."; a tier must divide an hour or be whole hours dividing a day
+STAGGER_TIERS = os.environ.get("STAGGER_TIERS", "realtime=1,standard=5,relaxed=15,hourly=60")
+# Tier for templates that do not name one; empty keeps each template's own poll interval
+STAGGER_DEFAULT_TIER = os.environ.get("STAGGER_DEFAULT_TIER", "")
+STAGGER_DAILY_WINDOW_MINUTES = int(os.environ.get("STAGGER_DAILY_WINDOW_MINUTES", "60"))
+
+GMAIL_TRIGGER = "n8n-nodes-base.gmailTrigger"
+SCHEDULE_TRIGGER = "n8n-nodes-base.scheduleTrigger"
+
+
+def _valid_interval(minutes: int) -> bool:
+    return minutes > 0 and (60 % minutes == 0 or (minutes % 60 == 0 and 1440 % minutes == 0))
+
+
+def parse_tiers(spec: str) -> dict:
+    tiers = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, _, minutes = part.partition("=")
+        minutes = int(minutes)
+        if not _valid_interval(minutes):
+            raise ValueError(f"Stagger tier {name.strip()}={minutes}: interval must divide 60 or 1440 minutes")
+        tiers[name.strip()] = minutes
+    return tiers
+
+
+TIERS = parse_tiers(STAGGER_TIERS)
+
+
+def tenant_offset(user_id: str, salt: str, period: int) -> int:
+    """Deterministic, uniformly spread offset in [0, period)."""
+    digest = hashlib.sha256(f"{salt}:{user_id}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % period
+
+
+def poll_cron(interval_minutes: int, offset_seconds: int) -> str:
+    """6-field cron firing every `interval_minutes`, shifted by `offset_seconds`."""
+    sec = offset_seconds % 60
+    minute = offset_seconds // 60 % 60
+    if interval_minutes < 60:
+        step = f"{minute}/{interval_minutes}" if interval_minutes > 1 else "*"
+        return f"{sec} {step} * * * *"
+    hours = interval_minutes // 60
+    hour = offset_seconds // 3600
+    return f"{sec} {minute} {f'{hour}/{hours}' if hours > 1 else '*'} * * *"
+
+
+def template_poll_minutes(params: dict):
+    """Poll interval of a gmailTrigger as exported, or None if it is not a fixed interval."""
+    items = (params.get("pollTimes") or {}).get("item") or []
+    if len(items) != 1:
+        return None
+    item = items[0]
+    mode = item.get("mode")
+    if mode == "everyMinute":
+        return 1
+    if mode == "everyHour":
+        return 60
+    if mode == "everyX":
+        value = int(item.get("value") or 1)
+        return value * 60 if item.get("unit") == "hours" else value
+    return None
+
+
+def _stagger_poll(user_id: str, salt: str, params: dict, tier: str):
+    minutes = TIERS[tier] if tier else template_poll_minutes(params)
+    if minutes is None or not _valid_interval(minutes):
+        return None, None
+    offset = tenant_offset(user_id, salt, minutes * 60)
+    cron = poll_cron(minutes, offset)
+    params = {**params, "pollTimes": {"item": [{"mode": "custom", "cronExpression": cron}]}}
+    return params, {"tier": tier or "template", "intervalMinutes": minutes, "offsetSeconds": offset, "cron": cron}
+
+
+def _stagger_daily(user_id: str, salt: str, params: dict):
+    rule = params.get("rule") or {}
+    items = rule.get("interval") or []
+    # Only plain daily rules ({"triggerAtHour": h[, "triggerAtMinute": m]}) are moved
+    if len(items) != 1 or items[0].get("field", "days") != "days" or "triggerAtHour" not in items[0]:
+        return None, None
+    if STAGGER_DAILY_WINDOW_MINUTES <= 0:
+        return None, None
+    item = items[0]
+    offset = tenant_offset(user_id, salt, STAGGER_DAILY_WINDOW_MINUTES)
+    at = (int(item["triggerAtHour"]) * 60 + int(item.get("triggerAtMinute") or 0) + offset) % 1440
+    item = {**item, "triggerAtHour": at // 60, "triggerAtMinute": at % 60}
+    params = {**params, "rule": {**rule, "interval": [item]}}
+    return params, {
+        "windowMinutes": STAGGER_DAILY_WINDOW_MINUTES,
+        "offsetMinutes": offset,
+        "triggerAtHour": at // 60,
+        "triggerAtMinute": at % 60,
+    }
+
+
+def plan_schedule(user_id: str, template_id: str, tpl: CompiledTemplate, tier: str = None):
+    """Per-tenant trigger parameters for `tpl`.
+
+    Returns (trigger_params for CompiledTemplate.render_body, schedule config
+    to record), both keyed by trigger node name; empty when staggering is off.
+    """
+    tier = tier or STAGGER_DEFAULT_TIER or None
+    if tier is not None and tier not in TIERS:
+        raise ValueError(f"Unknown stagger tier {tier!r} for template {template_id}")
+    trigger_params, schedule = {}, {}
+    if not STAGGER_ENABLED:
+        return trigger_params, schedule
+
+    for _, name, node_type, params in tpl.triggers:
+        salt = f"{template_id}:{name}"
+        if node_type == GMAIL_TRIGGER:
+            new_params, config = _stagger_poll(user_id, salt, params, tier)
+        elif node_type == SCHEDULE_TRIGGER:
+            new_params, config = _stagger_daily(user_id, salt, params)
+        else:
+            continue
+        if new_params is None:
+            logger.debug(f"Not staggering {template_id}/{name}: unsupported trigger settings")
+            continue
+        trigger_params[name] = new_params
+        schedule[name] = {"type": node_type, **config}
+    return trigger_params, schedule
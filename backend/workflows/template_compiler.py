@@ -0,0 +1,155 @@
+# workflows/template_compiler.py
+# Templates are compiled once into the node list n8n needs plus the exact
+# credential slots (and trigger parameters) to fill in. Per install we only
+# patch those slots, either by
+# shallow-copying the few affected nodes (render) or by splicing credentials
+# into a pre-serialised byte skeleton (render_body), instead of deep-copying and
+# walking the whole template.
+import os
+import json
+import secrets
+import logging
+
+logger = logging.getLogger(__name__)
+
+# n8n credential type -> role supplied by the provisioner
+CREDENTIAL_ROLES = {
+    "gmailOAuth2": "gmail",
+    "openAiApi": "openai",
+    "googlePalmApi": "gemini",
+}
+# Placeholder credential keys used in some exported templates
+CREDENTIAL_TYPE_ALIASES = {
+    "GEMINI_CREDENTIAL_TYPE_PLACEHOLDER": "googlePalmApi",
+}
+# Nodes with no runtime effect, dropped before upload when stripping is on
+NON_FUNCTIONAL_NODE_TYPES = {"n8n-nodes-base.stickyNote"}
+# Trigger nodes whose parameters may be replaced per install (see workflows/staggering.py)
+SCHEDULED_TRIGGER_TYPES = {"n8n-nodes-base.gmailTrigger", "n8n-nodes-base.scheduleTrigger"}
+
+TEMPLATE_STRIP_NOTES = os.environ.get("TEMPLATE_STRIP_NOTES", "true").lower() in ("1", "true", "yes")
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CompiledTemplate:
+    """Immutable, install-ready form of an n8n workflow template.
+
+    `slots` is a tuple of (node_index, credential_type, role) and `triggers`
+    a tuple of (node_index, node_name, node_type, parameters). Dicts returned
+    by `render` share every untouched node with the compiled template, so
+    callers must treat them as read-only.
+    """
+
+    def __init__(self, template_id: str, tpl: dict, strip_notes: bool = TEMPLATE_STRIP_NOTES):
+        self.template_id = template_id
+        self.settings = tpl.get("settings") or {}
+        self.connections = tpl["connections"]
+
+        nodes, slots, triggers = [], [], []
+        for n in tpl["nodes"]:
+            if strip_notes and n.get("type") in NON_FUNCTIONAL_NODE_TYPES:
+                continue
+            n = dict(n)
+            if n.get("type") in SCHEDULED_TRIGGER_TYPES:
+                triggers.append((len(nodes), n["name"], n["type"], n.get("parameters") or {}))
+            creds = {}
+            for cred_type, value in (n.get("credentials") or {}).items():
+                cred_type = CREDENTIAL_TYPE_ALIASES.get(cred_type, cred_type)
+                creds[cred_type] = value
+                role = CREDENTIAL_ROLES.get(cred_type)
+                if role:
+                    slots.append((len(nodes), cred_type, role))
+            if creds:
+                n["credentials"] = creds
+            nodes.append(n)
+
+        self.nodes = tuple(nodes)
+        self.slots = tuple(slots)
+        self.triggers = tuple(triggers)
+        self.roles = frozenset(role for _, _, role in slots)
+        self.stripped_nodes = len(tpl["nodes"]) - len(nodes)
+        self._skeleton, self._fills = self._compile_skeleton()
+
+    def _compile_skeleton(self):
+        # Serialise once with unique string sentinels in place of the workflow
+        # name, each credential slot and each trigger's parameters, then split
+        # on them in the order they appear in the output.
+        token = secrets.token_hex(8)
+        markers = {("name", 0): f"__wf_name_{token}__"}
+
+        nodes = list(self.nodes)
+        for i, (idx, cred_type, _) in enumerate(self.slots):
+            marker = markers[("slot", i)] = f"__wf_slot_{token}_{i}__"
+            node = dict(nodes[idx])
+            node["credentials"] = {**node["credentials"], cred_type: marker}
+            nodes[idx] = node
+        for i, (idx, _, _, _) in enumerate(self.triggers):
+            marker = markers[("trigger", i)] = f"__wf_trigger_{token}_{i}__"
+            nodes[idx] = {**nodes[idx], "parameters": marker}
+
+        raw = _dumps({"name": markers[("name", 0)], "nodes": nodes, "connections": self.connections, "settings": {}})
+        fills = sorted(markers, key=lambda fill: raw.index(_dumps(markers[fill])))
+        chunks = []
+        for fill in fills:
+            head, raw = raw.split(_dumps(markers[fill]), 1)
+            chunks.append(head)
+        chunks.append(raw)
+        return tuple(chunks), tuple(fills)
+
+    def _slot_value(self, creds: dict, role: str) -> dict:
+        try:
+            cred = creds[role]
+        except KeyError:
+            raise ValueError(f"Template {self.template_id} needs a {role} credential") from None
+        return {"id": str(cred["id"]), "name": cred["name"]}
+
+    def render(self, creds: dict, trigger_params: dict = None) -> dict:
+        """Workflow JSON ({"nodes", "connections", "settings"}) with credentials filled in.
+
+        `trigger_params` maps trigger node names to replacement parameters.
+        """
+        nodes = list(self.nodes)
+        for idx, cred_type, role in self.slots:
+            node = nodes[idx]
+            if node is self.nodes[idx]:
+                node = nodes[idx] = {**node, "credentials": dict(node["credentials"])}
+            node["credentials"][cred_type] = self._slot_value(creds, role)
+        for idx, name, _, _ in self.triggers:
+            if trigger_params and name in trigger_params:
+                nodes[idx] = {**nodes[idx], "parameters": trigger_params[name]}
+        return {"nodes": nodes, "connections": self.connections, "settings": self.settings}
+
+    def render_body(self, name: str, creds: dict, trigger_params: dict = None) -> bytes:
+        """Complete POST /workflows request body as UTF-8 JSON bytes."""
+        parts = [self._skeleton[0]]
+        for i, (kind, k) in enumerate(self._fills):
+            if kind == "name":
+                value = name
+            elif kind == "slot":
+                value = self._slot_value(creds, self.slots[k][2])
+            else:
+                _, node_name, _, params = self.triggers[k]
+                value = (trigger_params or {}).get(node_name, params)
+            parts.append(_dumps(value))
+            parts.append(self._skeleton[i + 1])
+        return b"".join(parts)
+
+    def slot_counts(self) -> dict:
+        """Number of credential assignments per credential type."""
+        counts = {}
+        for _, cred_type, _ in self.slots:
+            counts[cred_type] = counts.get(cred_type, 0) + 1
+        return counts
+
+
+def compile_template(template_id: str, tpl: dict, strip_notes: bool = TEMPLATE_STRIP_NOTES) -> CompiledTemplate:
+    compiled = CompiledTemplate(template_id, tpl, strip_notes=strip_notes)
+    logger.info(
+        f"Compiled template {template_id}: {len(compiled.nodes)} nodes "
+        f"({compiled.stripped_nodes} stripped), credential slots {compiled.slot_counts()}, "
+        f"triggers {[name for _, name, _, _ in compiled.triggers]}"
+    )
+    return compiled
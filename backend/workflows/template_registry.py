@@ -0,0 +1,146 @@
+# workflows/template_registry.py
+# Single source of truth for installable templates. Templates are registered by
+# id, loaded and validated lazily on first use, cached in compiled form with a
+# content hash, and reloaded when the JSON file changes on disk.
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+
+from workflows.template_compiler import CompiledTemplate, compile_template
+from workflows.staggering import TIERS
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+# Minimum seconds between mtime checks of a template file; 0 checks on every access
+TEMPLATE_RELOAD_INTERVAL = float(os.environ.get("TEMPLATE_RELOAD_INTERVAL", "2"))
+
+
+class TemplateError(ValueError):
+    pass
+
+
+class UnknownTemplate(KeyError):
+    pass
+
+
+@dataclass(frozen=True)
+class TemplateSpec:
+    template_id: str
+    filename: str
+    description: str
+    # Credential roles the provisioner supplies, see template_compiler.CREDENTIAL_ROLES
+    credentials: tuple = ("gmail", "openai")
+    enabled: bool = True
+    # Poll interval tier, see workflows/staggering.py; None keeps the template's interval
+    schedule_tier: str = None
+
+
+@dataclass
+class _Entry:
+    spec: TemplateSpec
+    compiled: CompiledTemplate = None
+    version: str = None
+    mtime: float = None
+    checked_at: float = 0.0
+
+
+def validate_template(spec: TemplateSpec, tpl: dict, compiled: CompiledTemplate) -> None:
+    nodes = tpl.get("nodes")
+    if not isinstance(nodes, list) or not nodes:
+        raise TemplateError(f"{spec.template_id}: template has no nodes")
+    if not isinstance(tpl.get("connections"), dict):
+        raise TemplateError(f"{spec.template_id}: template has no connections")
+
+    names = [n.get("name") for n in nodes]
+    if any(not n.get("name") or not n.get("type") for n in nodes):
+        raise TemplateError(f"{spec.template_id}: every node needs a name and a type")
+    if len(set(names)) != len(names):
+        raise TemplateError(f"{spec.template_id}: node names are not unique")
+
+    known = set(names)
+    for source, outputs in tpl["connections"].items():
+        if source not in known:
+            raise TemplateError(f"{spec.template_id}: connection from unknown node {source!r}")
+        for branches in outputs.values():
+            for branch in branches or []:
+                for link in branch or []:
+                    if link.get("node") not in known:
+                        raise TemplateError(f"{spec.template_id}: connection to unknown node {link.get('node')!r}")
+
+    missing = compiled.roles - set(spec.credentials)
+    if missing:
+        raise TemplateError(f"{spec.template_id}: no provisioner for credential roles {sorted(missing)}")
+    if spec.schedule_tier is not None and spec.schedule_tier not in TIERS:
+        raise TemplateError(f"{spec.template_id}: unknown schedule tier {spec.schedule_tier!r}")
+
+
+class TemplateRegistry:
+    def __init__(self, templates_dir: str = TEMPLATES_DIR, reload_interval: float = TEMPLATE_RELOAD_INTERVAL):
+        self.templates_dir = templates_dir
+        self.reload_interval = reload_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, spec: TemplateSpec) -> TemplateSpec:
+        with self._lock:
+            if spec.template_id in self._entries:
+                raise ValueError(f"Template {spec.template_id} is already registered")
+            self._entries[spec.template_id] = _Entry(spec)
+        return spec
+
+    def ids(self, include_disabled: bool = False) -> list:
+        return [tid for tid, e in self._entries.items() if include_disabled or e.spec.enabled]
+
+    def spec(self, template_id: str) -> TemplateSpec:
+        entry = self._entries.get(template_id)
+        if entry is None or not entry.spec.enabled:
+            raise UnknownTemplate(template_id)
+        return entry.spec
+
+    def get(self, template_id: str):
+        """Return (spec, compiled template, version) for an enabled template."""
+        entry = self._entries.get(template_id)
+        if entry is None or not entry.spec.enabled:
+            raise UnknownTemplate(template_id)
+
+        now = time.monotonic()
+        if entry.compiled is None or now - entry.checked_at >= self.reload_interval:
+            self._refresh(entry, now)
+        return entry.spec, entry.compiled, entry.version
+
+    def _refresh(self, entry: _Entry, now: float) -> None:
+        path = os.path.join(self.templates_dir, entry.spec.filename)
+        with self._lock:
+            if entry.compiled is not None and now - entry.checked_at < self.reload_interval:
+                return
+            try:
+                mtime = os.stat(path).st_mtime
+                if entry.compiled is not None and mtime == entry.mtime:
+                    return
+
+                with open(path, "rb") as f:
+                    raw = f.read()
+                version = hashlib.sha256(raw).hexdigest()[:12]
+                if version != entry.version:
+                    tpl = json.loads(raw)
+                    compiled = compile_template(entry.spec.template_id, tpl)
+                    validate_template(entry.spec, tpl, compiled)
+                    if entry.compiled is not None:
+                        logger.info(f"Reloaded template {entry.spec.template_id} {entry.version} -> {version}")
+                    entry.compiled, entry.version = compiled, version
+                entry.mtime = mtime
+            except (OSError, ValueError) as e:
+                # Keep serving the last good version; a broken edit must not take installs down
+                if entry.compiled is None:
+                    raise TemplateError(f"Failed to load template {entry.spec.template_id}: {e}") from e
+                logger.error(f"Failed to reload template {entry.spec.template_id}, keeping {entry.version}: {e}")
+            finally:
+                entry.checked_at = now
+
+
+templates = TemplateRegistry()
@@ -0,0 +1,217 @@
+# workflows/token_refresh.py
+# Refreshes Google access tokens before they expire, so n8n's Gmail
+# credentials never have to refresh on a poll (extra latency, and a failed
+# execution when Google is slow). Each tick reads only the rows expiring
+# within TOKEN_REFRESH_LEAD_SECONDS, keyset-paged in (expiry, id) order
+# through the (provider, expiry, id) index. Per batch it:
+#   1. refreshes the tokens concurrently against Google's token endpoint,
+#   2. writes them back in one upsert (and through integration_cache),
+#   3. PATCHes the new token data into the users' n8n Gmail credentials
+#      (workflows/gmail_credentials.py), one per user and shard.
+# A revoked refresh token (invalid_grant) is marked in refresh_error and
+# skipped until the user reconnects.
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from database.db import get_async_sb
+from database.sb_utils import execute, get_data, get_error
+from database.integration_cache import integration_cache
+from observability.metrics import GOOGLE_TOKEN_REFRESHES
+from thirdPartyIntegrations.google_oauth import refresh_access_token_async
+from workflows.provisioning import gmail_credential_payload
+from workflows.gmail_credentials import gmail_credentials
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REFRESH_ENABLED = os.environ.get("TOKEN_REFRESH_ENABLED", "true").lower() in ("1", "true", "yes")
+TOKEN_REFRESH_INTERVAL_SECONDS = float(os.environ.get("TOKEN_REFRESH_INTERVAL_SECONDS", "60"))
+# Refresh tokens expiring within this window; must exceed the interval
+TOKEN_REFRESH_LEAD_SECONDS = float(os.environ.get("TOKEN_REFRESH_LEAD_SECONDS", "600"))
+TOKEN_REFRESH_BATCH_SIZE = int(os.environ.get("TOKEN_REFRESH_BATCH_SIZE", "100"))
+TOKEN_REFRESH_CONCURRENCY = int(os.environ.get("TOKEN_REFRESH_CONCURRENCY", "10"))
+
+
+def _iso(ts: datetime) -> str:
+    return ts.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _is_revoked(exc: Exception) -> bool:
+    if not isinstance(exc, httpx.HTTPStatusError) or exc.response.status_code not in (400, 401):
+        return False
+    try:
+        return exc.response.json().get("error") in ("invalid_grant", "unauthorized_client")
+    except ValueError:
+        return False
+
+
+class TokenRefreshScheduler:
+    def __init__(
+        self,
+        interval: float = TOKEN_REFRESH_INTERVAL_SECONDS,
+        lead: float = TOKEN_REFRESH_LEAD_SECONDS,
+        batch_size: int = TOKEN_REFRESH_BATCH_SIZE,
+        concurrency: int = TOKEN_REFRESH_CONCURRENCY,
+    ):
+        self.interval = interval
+        self.lead = lead
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self._task = None
+
+    def start(self) -> None:
+        if TOKEN_REFRESH_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Token refresh tick failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def tick(self) -> dict:
+        """Refresh every token expiring within the lead window. Returns outcome counts."""
+        t0 = time.perf_counter()
+        stats = {"refreshed": 0, "failed": 0, "revoked": 0, "credentialsUpdated": 0, "credentialErrors": 0}
+        horizon = _iso(datetime.now(timezone.utc) + timedelta(seconds=self.lead))
+        cursor, due = None, 0
+        while True:
+            rows = await self._due(horizon, cursor)
+            if not rows:
+                break
+            due += len(rows)
+            # Failed rows stay in the window, so page forward instead of re-reading the head.
+            # A refreshed batch shares nearly one expiry, hence the id tiebreak.
+            cursor = (rows[-1]["expiry"], rows[-1]["id"])
+            await self._refresh_batch(rows, stats)
+            if len(rows) < self.batch_size:
+                break
+        if due:
+            logger.info(f"Token refresh: {stats} in {time.perf_counter() - t0:.2f}s")
+        return stats
+
+    async def _due(self, horizon: str, cursor: tuple) -> list:
+        """Next page of due rows after `cursor` = (expiry, id) of the last row seen."""
+        sb = await get_async_sb()
+        q = (
+            sb.table("user_integrations")
+            .select("*")
+            .eq("provider", "google")
+            .is_("refresh_error", "null")
+            .neq("refresh_token", "")
+            .lt("expiry", horizon)
+        )
+        if cursor is not None:
+            expiry, last_id = cursor
+            q = q.or_(f'expiry.gt."{expiry}",and(expiry.eq."{expiry}",id.gt."{last_id}")')
+        res = await execute(q.order("expiry").order("id").limit(self.batch_size), "supabase-select")
+        err = get_error(res)
+        if err:
+            raise RuntimeError(f"Supabase select error: {err}")
+        return get_data(res) or []
+
+    async def _refresh_batch(self, rows: list, stats: dict) -> None:
+        sem = asyncio.Semaphore(self.concurrency)
+        refreshed, revoked = [], []
+
+        async def one(row):
+            async with sem:
+                try:
+                    tokens = await refresh_access_token_async(row["refresh_token"])
+                except Exception as e:
+                    if _is_revoked(e):
+                        revoked.append(row)
+                    else:
+                        stats["failed"] += 1
+                        GOOGLE_TOKEN_REFRESHES.labels("failed").inc()
+                        logger.warning(f"Token refresh failed for user {row['user_id']}: {e}")
+                    return
+            expires_in = int(tokens.get("expires_in", 3600))
+            refreshed.append({
+                **row,
+                "access_token": tokens["access_token"],
+                # Google only rotates the refresh token occasionally
+                "refresh_token": tokens.get("refresh_token") or row["refresh_token"],
+                "scope": tokens.get("scope") or row.get("scope", ""),
+                "expiry": _iso(datetime.now(timezone.utc) + timedelta(seconds=expires_in)),
+            })
+
+        await asyncio.gather(*(one(row) for row in rows))
+        if revoked:
+            await self._mark_revoked(revoked)
+            stats["revoked"] += len(revoked)
+            GOOGLE_TOKEN_REFRESHES.labels("revoked").inc(len(revoked))
+        if not refreshed:
+            return
+
+        await self._write_back(refreshed)
+        stats["refreshed"] += len(refreshed)
+        GOOGLE_TOKEN_REFRESHES.labels("refreshed").inc(len(refreshed))
+        updated, errors = await self._update_credentials(refreshed)
+        stats["credentialsUpdated"] += updated
+        stats["credentialErrors"] += errors
+
+    async def _write_back(self, rows: list) -> None:
+        sb = await get_async_sb()
+        res = await execute(
+            sb.table("user_integrations").upsert(rows, on_conflict="user_id,provider"),
+            "supabase-upsert",
+        )
+        err = get_error(res)
+        if err:
+            for row in rows:
+                integration_cache.invalidate(row["user_id"], "google")
+            raise RuntimeError(f"Supabase upsert error: {err}")
+        written = {r["user_id"]: r for r in (get_data(res) or [])}
+        for row in rows:
+            integration_cache.put(row["user_id"], "google", written.get(row["user_id"], row))
+
+    async def _mark_revoked(self, rows: list) -> None:
+        sb = await get_async_sb()
+        for row in rows:
+            logger.warning(f"Google refresh token revoked for user {row['user_id']}; reconnect needed")
+            res = await execute(
+                sb.table("user_integrations").update({"refresh_error": "invalid_grant"}).eq("id", row["id"]),
+                "supabase-update",
+            )
+            err = get_error(res)
+            if err:
+                logger.error(f"Could not mark token of user {row['user_id']} revoked: {err}")
+            integration_cache.invalidate(row["user_id"], "google")
+
+    async def _update_credentials(self, rows: list) -> tuple:
+        """PATCH refreshed tokens into the users' n8n Gmail credentials. Returns (updated, errors)."""
+        by_user = {row["user_id"]: row for row in rows}
+        stored = await gmail_credentials.lookup_many(list(by_user))
+        sem = asyncio.Semaphore(self.concurrency)
+        results = []
+
+        async def one(cred):
+            payload = gmail_credential_payload(by_user[cred["user_id"]])
+            async with sem:
+                try:
+                    await gmail_credentials.ensure(cred["user_id"], payload, cred["shard"])
+                    results.append(True)
+                except Exception as e:
+                    logger.warning(
+                        f"Could not update Gmail credential {cred['id']} on {cred['shard']} for {cred['user_id']}: {e}"
+                    )
+                    results.append(False)
+
+        await asyncio.gather(*(one(cred) for cred in stored))
+        return results.count(True), results.count(False)
+
+
+token_refresher = TokenRefreshScheduler()
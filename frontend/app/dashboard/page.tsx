@@ -10,9 +10,47 @@ import { getSupabaseJwt } from '@/lib/supabase'
 
 type InstallResponse =
   | { needsAuth: true; authUrl: string; state: string; templateId: string }
-  | { activated: true; workflowId: number }
+  | { jobId: string; status: JobStatus; templateId: string }
   | { error: string }
 
+type JobStatus = 'queued' | 'running' | 'succeeded' | 'failed'
+
+type JobResponse = {
+  jobId: string
+  status: JobStatus
+  templateId: string
+  result: { activated: boolean; workflowId: string } | null
+  error: string | null
+}
+
+const JOB_POLL_INTERVAL_MS = 1000
+const JOB_POLL_TIMEOUT_MS = 5 * 60 * 1000
+
+// Installs run as background jobs on the backend. Poll until the job settles.
+async function waitForJob(jobId: string): Promise<JobResponse> {
+  const api = process.env.NEXT_PUBLIC_API_URL
+  const deadline = Date.now() + JOB_POLL_TIMEOUT_MS
+  while (Date.now() < deadline) {
+    const token = await getSupabaseJwt()
+    const res = await fetch(`${api}/jobs/${jobId}`, {
+      headers: { 'Authorization': `Bearer ${token}` },
+    })
+    if (!res.ok) throw new Error(`Job status request failed (${res.status})`)
+    const job: JobResponse = await res.json()
+    if (job.status === 'succeeded' || job.status === 'failed') return job
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+  }
+  throw new Error('Timed out waiting for install')
+}
+
+function reportJob(job: JobResponse) {
+  if (job.status === 'succeeded' && job.result?.activated) {
+    alert('Workflow installed and activated')
+  } else {
+    alert(job.error || 'Install failed')
+  }
+}
+
 export default function Dashboard() {
   const { user, profile, loading, signOut } = useAuth()
   const { workflows } = useWorkflows()
@@ -29,6 +67,24 @@ export default function Dashboard() {
     }
   }, [user, loading, router])
 
+  // Returning from Google OAuth: the callback queued the install and passed its job id
+  useEffect(() => {
+    if (!user) return
+    const params = new URLSearchParams(window.location.search)
+    const jobId = params.get('jobId')
+    const installing = params.get('installing')
+    if (!jobId) return
+    router.replace('/dashboard')
+    setInstallingId(installing)
+    waitForJob(jobId)
+      .then(reportJob)
+      .catch((err) => {
+        console.error(err)
+        alert('Could not confirm install status')
+      })
+      .finally(() => setInstallingId(null))
+  }, [user, router])
+
   const handleSignOut = async () => {
     await signOut()
     router.push('/login')
@@ -38,6 +94,7 @@ export default function Dashboard() {
   const handleInstallTemplate = async (template: WorkflowTemplate) => {
     try {
       setInstallingId(template.id)
+      const idempotencyKey = crypto.randomUUID()
 
       const token = await getSupabaseJwt()
       const api = process.env.NEXT_PUBLIC_API_URL
@@ -67,6 +124,8 @@ export default function Dashboard() {
         headers: {
           'Content-Type': 'application/json',
           'Authorization': `Bearer ${token}`,
+          // One key per click: network retries of this request replay the same install
+          'Idempotency-Key': idempotencyKey,
         },
         // For namespaced install endpoints we do not need a body
         body: url.endsWith('/install') && !url.endsWith('/workflows/install')
@@ -87,8 +146,8 @@ export default function Dashboard() {
         return
       }
 
-      if ('activated' in data && data.activated) {
-        alert('Workflow installed and activated')
+      if ('jobId' in data && data.jobId) {
+        reportJob(await waitForJob(data.jobId))
         // router.refresh()
         return
       }
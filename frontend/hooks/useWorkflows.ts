@@ -1,14 +1,23 @@
 // hooks/useWorkflows.ts
 'use client'
 
-import { useState, useEffect } from 'react'
-import { supabase, type Workflow } from '@/lib/supabase'
+import { useState, useEffect, useRef } from 'react'
+import { supabase, getSupabaseJwt, type Workflow, type WorkflowSummary } from '@/lib/supabase'
 import { useAuth } from './useAuth'
 
+const WORKFLOWS_PAGE_SIZE = 500
+
+type WorkflowsPage = {
+  items: WorkflowSummary[]
+  nextCursor: string | null
+}
+
 export function useWorkflows() {
-  const [workflows, setWorkflows] = useState<Workflow[]>([])
+  const [workflows, setWorkflows] = useState<WorkflowSummary[]>([])
   const [loading, setLoading] = useState(true)
   const { user } = useAuth()
+  // ETag and body of the first page, so a refetch can revalidate with If-None-Match
+  const firstPage = useRef<{ etag: string; page: WorkflowsPage } | null>(null)
 
   useEffect(() => {
     if (user) {
@@ -19,17 +28,42 @@ export function useWorkflows() {
   const fetchWorkflows = async () => {
     try {
       setLoading(true)
-      const { data, error } = await supabase
-        .from('workflows')
-        .select('*')
-        .order('created_at', { ascending: false })
-
-      if (error) {
-        console.error('Error fetching workflows:', error)
+      const api = process.env.NEXT_PUBLIC_API_URL
+      const token = await getSupabaseJwt()
+      const headers = { 'Authorization': `Bearer ${token}` }
+
+      const res = await fetch(`${api}/workflows?limit=${WORKFLOWS_PAGE_SIZE}`, {
+        headers: firstPage.current ? { ...headers, 'If-None-Match': firstPage.current.etag } : headers,
+      })
+      let page: WorkflowsPage
+      if (res.status === 304 && firstPage.current) {
+        page = firstPage.current.page
+      } else if (res.ok) {
+        page = await res.json()
+        const etag = res.headers.get('ETag')
+        firstPage.current = etag ? { etag, page } : null
+      } else {
+        console.error('Error fetching workflows:', res.status)
         return
       }
 
-      setWorkflows(data || [])
+      // Nothing changed and everything fits on one page: keep the current state
+      if (res.status === 304 && !page.nextCursor) return
+
+      const items = [...page.items]
+      let cursor = page.nextCursor
+      while (cursor) {
+        const more = await fetch(`${api}/workflows?limit=${WORKFLOWS_PAGE_SIZE}&cursor=${cursor}`, { headers })
+        if (!more.ok) {
+          console.error('Error fetching workflows:', more.status)
+          break
+        }
+        const next: WorkflowsPage = await more.json()
+        items.push(...next.items)
+        cursor = next.nextCursor
+      }
+
+      setWorkflows(items)
     } catch (error) {
       console.error('Error fetching workflows:', error)
     } finally {
@@ -59,6 +93,7 @@ export function useWorkflows() {
 
       // Add to local state
       setWorkflows(prev => [data, ...prev])
+      firstPage.current = null
       return { data }
     } catch (error) {
       console.error('Error creating workflow:', error)
@@ -84,6 +119,7 @@ export function useWorkflows() {
       setWorkflows(prev => 
         prev.map(w => w.id === id ? { ...w, ...data } : w)
       )
+      firstPage.current = null
       return { data }
     } catch (error) {
       console.error('Error updating workflow:', error)
@@ -105,6 +141,7 @@ export function useWorkflows() {
 
       // Remove from local state
       setWorkflows(prev => prev.filter(w => w.id !== id))
+      firstPage.current = null
       return { success: true }
     } catch (error) {
       console.error('Error deleting workflow:', error)
@@ -27,16 +27,37 @@ export type Profile = {
 export type Workflow = {
   id: string
   user_id: string
+  template_id: string | null
   name: string
   description: string | null
   n8n_workflow_id: string | null
   n8n_webhook_url: string | null
   workflow_config: any
-  status: 'active' | 'paused'
+  status: 'active' | 'paused' | 'inactive' | 'deleted'
   created_at: string
   updated_at: string
 }
 
+// Live n8n state the backend attaches to listed workflows (null when unknown);
+// active is null for a workflow n8n's last snapshot did not include
+export type WorkflowLiveStatus = {
+  active: boolean | null
+  lastExecution: {
+    id: string
+    status: string | null
+    startedAt: string | null
+    stoppedAt: string | null
+  } | null
+}
+
+// A row of GET /workflows: the listing columns plus live n8n state
+export type WorkflowSummary = Pick<
+  Workflow,
+  'id' | 'template_id' | 'name' | 'description' | 'status' | 'n8n_workflow_id' | 'created_at' | 'updated_at'
+> & {
+  n8n?: WorkflowLiveStatus | null
+}
+
 export type Execution = {
   id: string
   workflow_id: string